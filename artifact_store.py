@@ -0,0 +1,224 @@
+"""Armazenamento endereçado por conteúdo para os arquivos gerados.
+
+Cada artefato é gravado uma única vez em `outputs/store/<aa>/<sha256><ext>`
+e indexado na tabela ARTEFATOS. A tabela ARTEFATOS_ENTRADAS associa uma
+chave de entradas (tipo + parâmetros) ao artefato, de modo que a mesma
+requisição devolve o arquivo existente sem renderizar de novo.
+
+`refcount` conta as linhas de PROPOSTAS que apontam para o artefato e é
+mantido por triggers (criados em `migrations.py`). `coletar_lixo` remove artefatos sem referências que
+não são acessados há algum tempo, além de arquivos órfãos no diretório.
+
+Uso:
+    python artifact_store.py gc [--idade-minima SEGUNDOS]
+    python artifact_store.py importar outputs/*.pdf
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import database
+import migrations
+
+DB_PATH = 'ai_sales_copilot.db'
+STORE_DIR = os.path.join('outputs', 'store')
+
+# Artefatos sem referência só são coletados depois deste tempo sem acesso.
+GC_IDADE_MINIMA = 7 * 24 * 3600
+
+
+def chave_entradas(tipo, entradas):
+    """Chave determinística para (tipo, entradas serializáveis em JSON)."""
+    bruto = json.dumps([tipo, entradas], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(bruto.encode('utf-8')).hexdigest()
+
+
+def caminho_para(hash_conteudo, extensao):
+    return os.path.join(STORE_DIR, hash_conteudo[:2], hash_conteudo + extensao)
+
+
+def _gravar_arquivo(dados, extensao):
+    hash_conteudo = hashlib.sha256(dados).hexdigest()
+    caminho = caminho_para(hash_conteudo, extensao)
+    if not os.path.exists(caminho):
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        tmp = f'{caminho}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(dados)
+        os.replace(tmp, caminho)
+    return hash_conteudo, caminho
+
+
+def guardar(dados, extensao, db_path=None):
+    """Grava `dados` (bytes) no store, se ainda não existirem; retorna o caminho."""
+    db_path = db_path or DB_PATH
+    migrations.migrar(db_path)
+    hash_conteudo, caminho = _gravar_arquivo(dados, extensao)
+    with database.transaction(db_path) as conn:
+        conn.execute(
+            'INSERT INTO ARTEFATOS (hash, caminho, tamanho) VALUES (?, ?, ?) '
+            'ON CONFLICT(hash) DO UPDATE SET ultimo_acesso = CURRENT_TIMESTAMP',
+            (hash_conteudo, caminho, len(dados)),
+        )
+    return caminho
+
+
+def buscar(tipo, entradas, db_path=None):
+    """Caminho do artefato já gerado para (tipo, entradas), ou None."""
+    db_path = db_path or DB_PATH
+    migrations.migrar(db_path)
+    with database.connection(db_path) as conn:
+        row = conn.execute(
+            'SELECT a.hash, a.caminho FROM ARTEFATOS_ENTRADAS e JOIN ARTEFATOS a ON a.hash = e.hash WHERE e.chave = ?',
+            (chave_entradas(tipo, entradas),),
+        ).fetchone()
+    if row is None or not os.path.exists(row[1]):
+        return None
+    with database.transaction(db_path) as conn:
+        conn.execute('UPDATE ARTEFATOS SET ultimo_acesso = CURRENT_TIMESTAMP WHERE hash = ?', (row[0],))
+    return row[1]
+
+
+def registrar(tipo, entradas, dados, extensao, db_path=None):
+    """Guarda `dados` e associa o artefato à chave de (tipo, entradas)."""
+    db_path = db_path or DB_PATH
+    caminho = guardar(dados, extensao, db_path)
+    with database.transaction(db_path) as conn:
+        conn.execute(
+            'INSERT OR REPLACE INTO ARTEFATOS_ENTRADAS (chave, hash, tipo) '
+            'SELECT ?, hash, ? FROM ARTEFATOS WHERE caminho = ?',
+            (chave_entradas(tipo, entradas), tipo, caminho),
+        )
+    return caminho
+
+
+def buscar_em_lote(tipo, lista_entradas, db_path=None):
+    """Como `buscar` para várias entradas, com uma consulta; lista alinhada (None = ausente)."""
+    db_path = db_path or DB_PATH
+    migrations.migrar(db_path)
+    chaves = [chave_entradas(tipo, entradas) for entradas in lista_entradas]
+    if not chaves:
+        return []
+    with database.connection(db_path) as conn:
+        achados = {
+            chave: (hash_conteudo, caminho)
+            for chave, hash_conteudo, caminho in conn.execute(
+                'SELECT e.chave, a.hash, a.caminho FROM ARTEFATOS_ENTRADAS e JOIN ARTEFATOS a ON a.hash = e.hash '
+                'WHERE e.chave IN (SELECT value FROM json_each(?))',
+                (json.dumps(sorted(set(chaves))),),
+            )
+            if os.path.exists(caminho)
+        }
+    if achados:
+        with database.transaction(db_path) as conn:
+            conn.execute(
+                'UPDATE ARTEFATOS SET ultimo_acesso = CURRENT_TIMESTAMP WHERE hash IN (SELECT value FROM json_each(?))',
+                (json.dumps(sorted({h for h, _ in achados.values()})),),
+            )
+    return [achados[chave][1] if chave in achados else None for chave in chaves]
+
+
+def registrar_em_lote(tipo, itens, extensao, db_path=None):
+    """Como `registrar` para [(entradas, dados), ...] em uma transação; retorna os caminhos."""
+    db_path = db_path or DB_PATH
+    migrations.migrar(db_path)
+    gravados = [(entradas, len(dados), *_gravar_arquivo(dados, extensao)) for entradas, dados in itens]
+    with database.transaction(db_path) as conn:
+        conn.executemany(
+            'INSERT INTO ARTEFATOS (hash, caminho, tamanho) VALUES (?, ?, ?) '
+            'ON CONFLICT(hash) DO UPDATE SET ultimo_acesso = CURRENT_TIMESTAMP',
+            [(h, caminho, tamanho) for _, tamanho, h, caminho in gravados],
+        )
+        conn.executemany(
+            'INSERT OR REPLACE INTO ARTEFATOS_ENTRADAS (chave, hash, tipo) VALUES (?, ?, ?)',
+            [(chave_entradas(tipo, entradas), h, tipo) for entradas, _, h, _ in gravados],
+        )
+    return [caminho for *_, caminho in gravados]
+
+
+def obter_ou_criar(tipo, entradas, renderizar, extensao, db_path=None):
+    """Retorna o artefato já gerado para as mesmas entradas ou chama `renderizar()`.
+
+    `renderizar` só é executado quando não há artefato para a chave (ou o
+    arquivo sumiu do disco) e deve retornar os bytes do documento.
+    """
+    return buscar(tipo, entradas, db_path) or registrar(tipo, entradas, renderizar(), extensao, db_path)
+
+
+def coletar_lixo(db_path=None, idade_minima=GC_IDADE_MINIMA):
+    """Remove artefatos sem referência e arquivos órfãos do store.
+
+    Retorna um dict com a quantidade de artefatos e bytes liberados.
+    """
+    db_path = db_path or DB_PATH
+    migrations.migrar(db_path)
+    with database.transaction(db_path) as conn:
+        candidatos = conn.execute(
+            'SELECT hash, caminho, tamanho FROM ARTEFATOS a WHERE refcount <= 0 '
+            "AND ultimo_acesso < datetime('now', ?) "
+            'AND NOT EXISTS (SELECT 1 FROM PROPOSTAS p WHERE p.caminho_arquivo = a.caminho)',
+            (f'-{int(idade_minima)} seconds',),
+        ).fetchall()
+        hashes = [(c[0],) for c in candidatos]
+        conn.executemany('DELETE FROM ARTEFATOS_ENTRADAS WHERE hash = ?', hashes)
+        conn.executemany('DELETE FROM ARTEFATOS WHERE hash = ?', hashes)
+        conhecidos = {os.path.normpath(r[0]) for r in conn.execute('SELECT caminho FROM ARTEFATOS')}
+    removidos = 0
+    liberados = 0
+    for _, caminho, tamanho in candidatos:
+        if os.path.exists(caminho):
+            os.remove(caminho)
+            liberados += tamanho
+        removidos += 1
+    # Arquivos sem linha em ARTEFATOS (ex.: processo morto entre a escrita e o INSERT).
+    limite = time.time() - idade_minima
+    for raiz, _, arquivos in os.walk(STORE_DIR):
+        for nome in arquivos:
+            caminho = os.path.join(raiz, nome)
+            if os.path.normpath(caminho) not in conhecidos and os.path.getmtime(caminho) < limite:
+                liberados += os.path.getsize(caminho)
+                os.remove(caminho)
+                removidos += 1
+    return {'removidos': removidos, 'bytes': liberados}
+
+
+def importar(caminhos, db_path=None, mover=False):
+    """Importa arquivos existentes para o store e reaponta PROPOSTAS para eles."""
+    db_path = db_path or DB_PATH
+    novos = {}
+    for origem in caminhos:
+        with open(origem, 'rb') as f:
+            novos[origem] = guardar(f.read(), os.path.splitext(origem)[1], db_path)
+    with database.transaction(db_path) as conn:
+        conn.executemany(
+            'UPDATE PROPOSTAS SET caminho_arquivo = ? WHERE caminho_arquivo = ?',
+            [(destino, origem) for origem, destino in novos.items()],
+        )
+    if mover:
+        for origem in novos:
+            os.remove(origem)
+    return novos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Store de artefatos gerados')
+    parser.add_argument('--db', default=DB_PATH)
+    sub = parser.add_subparsers(dest='comando', required=True)
+    gc = sub.add_parser('gc', help='remove artefatos sem referência')
+    gc.add_argument('--idade-minima', type=int, default=GC_IDADE_MINIMA)
+    imp = sub.add_parser('importar', help='importa arquivos existentes para o store')
+    imp.add_argument('arquivos', nargs='+')
+    imp.add_argument('--mover', action='store_true', help='apaga os originais após importar')
+    args = parser.parse_args(argv)
+    if args.comando == 'gc':
+        print(coletar_lixo(args.db, args.idade_minima))
+    else:
+        for origem, destino in importar(args.arquivos, args.db, args.mover).items():
+            print(f'{origem} -> {destino}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Varredura de atividades atrasadas (PENDENTE -> VENCIDA).
+
+O status de ATIVIDADES é gravado na inclusão e nada o movia depois do
+vencimento. `varrer` passa para VENCIDA, em lotes, as PENDENTE com
+`data_vencimento` anterior a hoje, usando o índice
+(status, data_vencimento). Os triggers de ATIVIDADES (migração 10) mantêm
+FUNCIONARIOS.atividades_vencidas, que a pontuação lê sem contar linhas.
+
+A varredura roda periodicamente no processo principal de `job_queue.py`
+(a cada `VARREDURA_SEGUNDOS`) ou avulsa:
+    python atividades.py varrer [--loop 300]
+"""
+
+import argparse
+from datetime import date
+import os
+import time
+
+import database
+import migrations
+
+DB_PATH = 'ai_sales_copilot.db'
+
+VARREDURA_SEGUNDOS = float(os.environ.get('VARREDURA_ATIVIDADES_SEGUNDOS', 300))
+# Linhas por transação: mantém curto o lock de escrita entre os lotes.
+LOTE = 5000
+
+
+def varrer(db_path=None, hoje=None, lote=LOTE):
+    """Marca como VENCIDA as atividades pendentes vencidas; retorna quantas mudaram.
+
+    `hoje` (date ou 'YYYY-MM-DD') é o primeiro dia ainda no prazo; padrão: hoje.
+    """
+    db_path = db_path or DB_PATH
+    migrations.migrar(db_path)
+    if not isinstance(hoje, str):
+        hoje = (hoje or date.today()).isoformat()
+    total = 0
+    while True:
+        with database.transaction(db_path) as conn:
+            alteradas = conn.execute(
+                "UPDATE ATIVIDADES SET status = 'VENCIDA' WHERE id_atividade IN ("
+                "  SELECT id_atividade FROM ATIVIDADES"
+                "  WHERE status = 'PENDENTE' AND data_vencimento < ? LIMIT ?"
+                ')',
+                (hoje, lote),
+            ).rowcount
+        total += alteradas
+        if alteradas < lote:
+            return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Atividades atrasadas')
+    parser.add_argument('--db', default=DB_PATH)
+    sub = parser.add_subparsers(dest='comando', required=True)
+    varredura = sub.add_parser('varrer', help='marca como VENCIDA as pendentes fora do prazo')
+    varredura.add_argument('--loop', type=float, metavar='SEGUNDOS', help='repete a varredura a cada SEGUNDOS')
+    args = parser.parse_args(argv)
+    while True:
+        print(f'{varrer(args.db)} atividade(s) marcada(s) como VENCIDA')
+        if not args.loop:
+            break
+        time.sleep(args.loop)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+"""Caminho rápido do login: cache de usuários e bcrypt em pool dedicado.
+
+- `buscar_usuario` lê FUNCIONARIOS pelo índice IDX_FUNCIONARIOS_NOME e
+  guarda o resultado em um cache LRU com TTL curto (`LOGIN_CACHE_TTL`),
+  então rajadas de login do mesmo usuário não voltam ao banco.
+- `verificar` roda o bcrypt em um pool de threads limitado
+  (`LOGIN_BCRYPT_WORKERS`; o bcrypt libera o GIL). No máximo
+  `LOGIN_BCRYPT_FILA` verificações ficam na fila; além disso o login falha
+  rápido com `ServidorOcupado` em vez de prender as threads do worker e
+  deixar as demais rotas sem CPU.
+- Após um login bem-sucedido, hashes sha256 legados ou bcrypt com outro
+  custo são regravados com `setup_project.BCRYPT_ROUNDS` (na mesma tarefa
+  do pool, pois o hashpw custa o mesmo que o checkpw).
+
+Tokens JWT já verificados ficam em um cache LRU (`JWT_CACHE_MAX`) pelo
+digest do token até o `exp`; requisições repetidas com o mesmo token não
+refazem o HMAC nem o parsing das claims. O logout grava o digest em
+TOKENS_REVOGADOS: o processo que revogou descarta a entrada na hora e os
+demais workers leem as revogações novas a cada `JWT_REVOGACAO_SYNC`
+segundos (uma consulta pelo `id`). Os contadores de `metricas()` são por
+processo.
+"""
+
+from collections import OrderedDict
+from concurrent import futures
+import hashlib
+import os
+import threading
+import time
+
+import database
+from metricas import cronometro
+from setup_project import hash_password, needs_rehash, verify_password
+
+try:
+    import jwt
+except Exception:
+    jwt = None
+
+DB_PATH = 'ai_sales_copilot.db'
+
+CACHE_TTL = float(os.environ.get('LOGIN_CACHE_TTL', 30))
+CACHE_MAX = int(os.environ.get('LOGIN_CACHE_MAX', 10000))
+BCRYPT_WORKERS = int(os.environ.get('LOGIN_BCRYPT_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+BCRYPT_FILA = int(os.environ.get('LOGIN_BCRYPT_FILA', 32))
+BCRYPT_TIMEOUT = float(os.environ.get('LOGIN_BCRYPT_TIMEOUT', 10))
+JWT_CACHE_MAX = int(os.environ.get('JWT_CACHE_MAX', 10000))
+JWT_REVOGACAO_SYNC = float(os.environ.get('JWT_REVOGACAO_SYNC', 1))
+
+
+class ServidorOcupado(Exception):
+    """Fila de verificação de senha cheia (ou verificação demorou demais)."""
+
+
+class TokenRevogado(Exception):
+    """Token invalidado por logout."""
+
+
+_lock = threading.Lock()
+_cache = OrderedDict()
+_pool = None
+_vagas = threading.BoundedSemaphore(BCRYPT_WORKERS + BCRYPT_FILA)
+_pid = os.getpid()
+
+_tokens = OrderedDict()
+# {db_path: [ultimo_id lido, instante da última leitura, {digest: expira_em}]}
+_revogados = {}
+_contadores = {
+    'jwt_cache_hits': 0,
+    'jwt_cache_misses': 0,
+    'jwt_revogados_rejeitados': 0,
+    'logins_ocupado': 0,
+}
+
+
+def _contar(nome):
+    with _lock:
+        _contadores[nome] += 1
+
+
+def _executor():
+    global _pool, _pid
+    # Pools não sobrevivem a fork (workers do gunicorn com preload).
+    if _pool is None or os.getpid() != _pid:
+        with _lock:
+            if _pool is None or os.getpid() != _pid:
+                _pool = futures.ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix='bcrypt')
+                _pid = os.getpid()
+    return _pool
+
+
+def buscar_usuario(nome, db_path=None):
+    """(id_funcionario, nome, cargo, senha_hash) ou None; usa o cache por até CACHE_TTL segundos."""
+    db_path = db_path or DB_PATH
+    chave = (db_path, nome)
+    agora = time.monotonic()
+    with _lock:
+        item = _cache.get(chave)
+        if item is not None and item[0] > agora:
+            _cache.move_to_end(chave)
+            return item[1]
+    with database.connection(db_path) as conn:
+        row = conn.execute(
+            'SELECT id_funcionario, nome, cargo, senha_hash FROM FUNCIONARIOS WHERE nome = ?', (nome,)
+        ).fetchone()
+    # Usuários inexistentes não entram no cache (podem ser cadastrados a qualquer momento).
+    if row is not None:
+        with _lock:
+            _cache[chave] = (agora + CACHE_TTL, tuple(row))
+            _cache.move_to_end(chave)
+            while len(_cache) > CACHE_MAX:
+                _cache.popitem(last=False)
+    return row and tuple(row)
+
+
+def invalidar(nome=None):
+    """Remove `nome` do cache (ou tudo); chamar ao alterar senha ou cargo."""
+    with _lock:
+        if nome is None:
+            _cache.clear()
+        else:
+            for chave in [c for c in _cache if c[1] == nome]:
+                del _cache[chave]
+
+
+def _verificar_e_rehash(senha, senha_hash):
+    with cronometro('bcrypt_verificacao_segundos'):
+        ok = verify_password(senha, senha_hash)
+    if not ok:
+        return False, None
+    return True, hash_password(senha) if needs_rehash(senha_hash) else None
+
+
+def verificar(usuario, senha, db_path=None):
+    """Confere a senha de `usuario` (tupla de `buscar_usuario`) no pool de bcrypt.
+
+    Levanta `ServidorOcupado` se a fila estiver cheia. Em caso de sucesso
+    com hash legado, grava o novo hash (só se o hash do banco ainda for o
+    mesmo que foi verificado).
+    """
+    uid, nome, _, senha_hash = usuario
+    if not senha_hash:
+        return False
+    if not _vagas.acquire(blocking=False):
+        _contar('logins_ocupado')
+        raise ServidorOcupado('Muitos logins simultâneos, tente novamente')
+    try:
+        futuro = _executor().submit(_verificar_e_rehash, senha, senha_hash)
+    except BaseException:
+        _vagas.release()
+        raise
+    # A vaga só é devolvida quando a tarefa termina, mesmo após timeout.
+    futuro.add_done_callback(lambda _: _vagas.release())
+    try:
+        ok, novo_hash = futuro.result(timeout=BCRYPT_TIMEOUT)
+    except futures.TimeoutError:
+        futuro.cancel()
+        raise ServidorOcupado('Verificação de senha demorou demais, tente novamente')
+    if ok and novo_hash:
+        with database.transaction(db_path or DB_PATH) as conn:
+            conn.execute(
+                'UPDATE FUNCIONARIOS SET senha_hash = ? WHERE id_funcionario = ? AND senha_hash = ?',
+                (novo_hash, uid, senha_hash),
+            )
+        invalidar(nome)
+    return ok
+
+
+def _digest(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def _sincronizar_revogados(db_path):
+    agora = time.monotonic()
+    with _lock:
+        estado = _revogados.setdefault(db_path, [0, float('-inf'), {}])
+        if agora - estado[1] < JWT_REVOGACAO_SYNC:
+            return estado[2]
+        estado[1] = agora
+        ultimo = estado[0]
+    with database.connection(db_path) as conn:
+        novos = conn.execute(
+            'SELECT id, digest, expira_em FROM TOKENS_REVOGADOS WHERE id > ? ORDER BY id', (ultimo,)
+        ).fetchall()
+    limite = time.time()
+    with _lock:
+        for id_, digest, expira_em in novos:
+            estado[2][digest] = expira_em
+            _tokens.pop(digest, None)
+            estado[0] = max(estado[0], id_)
+        # Tokens já expirados são recusados pelo próprio JWT.
+        for digest in [d for d, expira_em in estado[2].items() if expira_em < limite]:
+            del estado[2][digest]
+        return estado[2]
+
+
+def decodificar_token(token, segredo, algoritmo, db_path=None):
+    """Payload do JWT `token`, do cache quando já verificado e ainda válido.
+
+    Levanta `TokenRevogado` para tokens de logout e as exceções do PyJWT
+    (ex.: `jwt.ExpiredSignatureError`) para tokens inválidos.
+    """
+    db_path = db_path or DB_PATH
+    digest = _digest(token)
+    if digest in _sincronizar_revogados(db_path):
+        _contar('jwt_revogados_rejeitados')
+        raise TokenRevogado('Token revogado')
+    agora = time.time()
+    with _lock:
+        item = _tokens.get(digest)
+        if item is not None and item[0] > agora:
+            _tokens.move_to_end(digest)
+            _contadores['jwt_cache_hits'] += 1
+            return dict(item[1])
+        _contadores['jwt_cache_misses'] += 1
+    payload = jwt.decode(token, segredo, algorithms=[algoritmo])
+    # Sem `exp` o token não expira sozinho; não entra no cache.
+    if 'exp' in payload:
+        with _lock:
+            _tokens[digest] = (float(payload['exp']), payload)
+            _tokens.move_to_end(digest)
+            while len(_tokens) > JWT_CACHE_MAX:
+                _tokens.popitem(last=False)
+    return dict(payload)
+
+
+def revogar(token, expira_em, db_path=None):
+    """Invalida `token` (logout) até `expira_em` (epoch); vale para todos os workers."""
+    db_path = db_path or DB_PATH
+    digest = _digest(token)
+    with database.transaction(db_path) as conn:
+        conn.execute('DELETE FROM TOKENS_REVOGADOS WHERE expira_em < ?', (time.time(),))
+        conn.execute(
+            'INSERT OR IGNORE INTO TOKENS_REVOGADOS (digest, expira_em) VALUES (?, ?)', (digest, float(expira_em))
+        )
+    with _lock:
+        _tokens.pop(digest, None)
+        _revogados.setdefault(db_path, [0, float('-inf'), {}])[2][digest] = float(expira_em)
+
+
+def metricas():
+    """Contadores do processo atual e tamanho dos caches."""
+    with _lock:
+        return {**_contadores, 'jwt_cache_tamanho': len(_tokens), 'usuarios_cache_tamanho': len(_cache)}
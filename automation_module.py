@@ -1,84 +1,223 @@
-import sqlite3
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, date
-from pathlib import Path
-from fpdf import FPDF
+import json
+import os
 
-DB_PATH = 'ai_sales_copilot.db'
+import artifact_store
+import database
+import metricas
+from proposal_template import obter_template
 
+DB_PATH = 'ai_sales_copilot.db'
 
-def _ensure_outputs_dir():
-    out = Path('outputs')
-    out.mkdir(exist_ok=True)
-    return out
+# Processos que renderizam PDFs nos lotes; abaixo de MINIMO_PARA_POOL
+# propostas a subida do pool custa mais do que economiza.
+PROCESSOS = int(os.environ.get('PROPOSTAS_PROCESSOS', os.cpu_count() or 1))
+MINIMO_PARA_POOL = 32
 
 
-def _get_employee_name(id_funcionario):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('SELECT nome FROM FUNCIONARIOS WHERE id_funcionario = ?', (id_funcionario,))
-    r = c.fetchone()
-    conn.close()
+def _get_employee_name(id_funcionario, conn=None):
+    if conn is None:
+        with database.connection(DB_PATH) as conn:
+            return _get_employee_name(id_funcionario, conn)
+    r = conn.execute('SELECT nome FROM FUNCIONARIOS WHERE id_funcionario = ?', (id_funcionario,)).fetchone()
 
     return r[0] if r else 'Responsavel Desconhecido'
 
 
 def gerar_proposta_comercial(id_cliente, valor, id_responsavel):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('SELECT nome_empresa, decisor_nome, decisor_email FROM CLIENTES WHERE id_cliente = ?', (id_cliente,))
-    row = c.fetchone()
-    if not row:
-        conn.close()
+    filename = renderizar_proposta_comercial(id_cliente, valor, id_responsavel)
+    if filename is None:
         return None
-    nome_empresa, decisor_nome, decisor_email = row
-    nome_responsavel = _get_employee_name(id_responsavel)
-    out = _ensure_outputs_dir()
-    ts = datetime.now().strftime('%Y%m%d%H%M%S')
-    filename = out / f'Proposta_{id_cliente}_{ts}.pdf'
-    pdf = FPDF()
-    pdf.set_auto_page_break(True, 15)
-    pdf.add_page()
-    pdf.set_font('Arial', 'B', 16)
-    pdf.cell(0, 10, 'Proposta Comercial - AI Sales Copilot', 0, 1, 'C')
-    pdf.ln(6)
-    pdf.set_font('Arial', '', 12)
-    pdf.cell(0, 8, f'Cliente: {nome_empresa}', 0, 1)
-    decisor_info = f'{decisor_nome} - {decisor_email}'
-    pdf.cell(0, 8, f'Decisor: {decisor_info}', 0, 1)
-    pdf.cell(0, 8, f'Data: {date.today().strftime("%d/%m/%Y")}', 0, 1)
-    pdf.ln(6)
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 8, 'Resumo da Proposta', 0, 1)
-    pdf.set_font('Arial', '', 12)
-    project_text = f'Projeto com valor total de R$ {valor:,.2f}. Entrega conforme escopo acordado.'
-    pdf.multi_cell(0, 8, project_text)
-    pdf.ln(6)
-    pdf.cell(0, 8, f'Elaborado por: {nome_responsavel}', 0, 1)
-    pdf.output(str(filename))
-    insert_params = (id_cliente, 'Comercial', valor, str(filename))
+    with database.transaction(DB_PATH) as conn:
+        registrar_proposta(conn, id_cliente, 'Comercial', valor, filename)
+
+    return filename
+
+
+def renderizar_proposta_comercial(id_cliente, valor, id_responsavel, db_path=None):
+    """Gera o PDF da proposta sem gravar em PROPOSTAS (ver `registrar_proposta`).
+
+    O arquivo fica no store de artefatos; a mesma proposta (cliente,
+    valor, responsavel e data) devolve o PDF ja gerado.
+    """
+    # Mesma normalizacao do lote: 1000 e 1000.0 sao a mesma proposta (mesma chave no store).
+    valor = float(valor)
+    db_path = db_path or DB_PATH
+    with database.connection(db_path) as conn:
+        row = conn.execute(
+            'SELECT nome_empresa, decisor_nome, decisor_email FROM CLIENTES WHERE id_cliente = ?', (id_cliente,)
+        ).fetchone()
+        if not row:
+            return None
+        nome_responsavel = _get_employee_name(id_responsavel, conn)
+    return _salvar_pdf_proposta(valor, row, nome_responsavel, db_path)
+
+
+def _entradas_proposta(valor, cliente, nome_responsavel, hoje):
+    return {
+        'cliente': list(cliente),
+        'valor': valor,
+        'responsavel': nome_responsavel,
+        'data': hoje.isoformat(),
+    }
+
+
+def _salvar_pdf_proposta(valor, cliente, nome_responsavel, db_path=None):
+    nome_empresa, decisor_nome, decisor_email = cliente
+    hoje = date.today()
+
+    def renderizar():
+        with metricas.cronometro('pdf_render_segundos'):
+            return obter_template().renderizar(nome_empresa, decisor_nome, decisor_email, valor, nome_responsavel, hoje)
+
+    entradas = _entradas_proposta(valor, cliente, nome_responsavel, hoje)
+    return artifact_store.obter_ou_criar('proposta_comercial', entradas, renderizar, '.pdf', db_path or DB_PATH)
+
+
+def _renderizar_pdf(item):
+    """Worker do pool: (cliente, valor, responsavel, data ISO) -> (bytes, None) ou (None, erro)."""
+    cliente, valor, nome_responsavel, data = item
+    try:
+        with metricas.cronometro('pdf_render_segundos'):
+            pdf = obter_template().renderizar(*cliente, valor, nome_responsavel, date.fromisoformat(data))
+        return pdf, None
+    except Exception as e:
+        return None, f'{type(e).__name__}: {e}'
+
+
+def _renderizar_todos(itens, processos):
+    if processos > 1 and len(itens) >= MINIMO_PARA_POOL:
+        processos = min(processos, len(itens))
+        with ProcessPoolExecutor(max_workers=processos) as pool:
+            # Blocos grandes: menos idas e voltas entre processos por PDF.
+            return list(pool.map(_renderizar_pdf, itens, chunksize=max(1, len(itens) // (processos * 4))))
+    return [_renderizar_pdf(item) for item in itens]
+
+
+def renderizar_propostas_em_lote(lista, processos=None, db_path=None):
+    """Gera os PDFs de varias propostas comerciais sem gravar em PROPOSTAS.
+
+    `lista` e uma sequencia de (id_cliente, valor, id_responsavel). Clientes
+    e responsaveis sao carregados com uma consulta cada e os PDFs ja
+    existentes vem do store com mais uma; os demais sao renderizados em ate
+    `processos` processos e registrados no store em uma unica transacao.
+    Retorna um dict com `caminhos` (alinhado com a entrada, None em falha),
+    `falhas` ([{indice, id_cliente, erro}]), `renderizadas` e `do_cache`.
+    """
+    lista = [(int(c), float(v), int(r)) for c, v, r in lista]
+    processos = processos or PROCESSOS
+    db_path = db_path or DB_PATH
+    resultado = {'caminhos': [None] * len(lista), 'falhas': [], 'renderizadas': 0, 'do_cache': 0}
+    if not lista:
+        return resultado
+    with database.connection(db_path) as conn:
+        clientes = {
+            row[0]: row[1:]
+            for row in conn.execute(
+                'SELECT id_cliente, nome_empresa, decisor_nome, decisor_email FROM CLIENTES '
+                'WHERE id_cliente IN (SELECT value FROM json_each(?))',
+                (json.dumps(sorted({item[0] for item in lista})),),
+            )
+        }
+        responsaveis = dict(
+            conn.execute(
+                'SELECT id_funcionario, nome FROM FUNCIONARIOS '
+                'WHERE id_funcionario IN (SELECT value FROM json_each(?))',
+                (json.dumps(sorted({item[2] for item in lista})),),
+            )
+        )
+    hoje = date.today()
+    # {chave no store: [entradas, item do worker, indices na lista]}; propostas
+    # repetidas no lote sao renderizadas uma vez.
+    pedidos = {}
+    for i, (id_cliente, valor, id_responsavel) in enumerate(lista):
+        cliente = clientes.get(id_cliente)
+        if cliente is None:
+            resultado['falhas'].append({'indice': i, 'id_cliente': id_cliente, 'erro': 'Cliente nao encontrado'})
+            continue
+        nome_responsavel = responsaveis.get(id_responsavel, 'Responsavel Desconhecido')
+        entradas = _entradas_proposta(valor, cliente, nome_responsavel, hoje)
+        chave = artifact_store.chave_entradas('proposta_comercial', entradas)
+        if chave not in pedidos:
+            pedidos[chave] = [entradas, (tuple(cliente), valor, nome_responsavel, hoje.isoformat()), []]
+        pedidos[chave][2].append(i)
+
+    pedidos = list(pedidos.values())
+    existentes = artifact_store.buscar_em_lote('proposta_comercial', [p[0] for p in pedidos], db_path)
+    pendentes = [p for p, caminho in zip(pedidos, existentes) if caminho is None]
+    for (_, _, indices), caminho in zip(pedidos, existentes):
+        if caminho is not None:
+            resultado['do_cache'] += len(indices)
+            for i in indices:
+                resultado['caminhos'][i] = caminho
+
+    gerados = []
+    for pedido, (pdf, erro) in zip(pendentes, _renderizar_todos([p[1] for p in pendentes], processos)):
+        if erro is None:
+            gerados.append((pedido, pdf))
+            continue
+        for i in pedido[2]:
+            resultado['falhas'].append({'indice': i, 'id_cliente': lista[i][0], 'erro': erro})
+    caminhos = artifact_store.registrar_em_lote(
+        'proposta_comercial', [(pedido[0], pdf) for pedido, pdf in gerados], '.pdf', db_path
+    )
+    for (pedido, _), caminho in zip(gerados, caminhos):
+        resultado['renderizadas'] += len(pedido[2])
+        for i in pedido[2]:
+            resultado['caminhos'][i] = caminho
+    resultado['falhas'].sort(key=lambda f: f['indice'])
+    return resultado
+
+
+def registrar_propostas_em_lote(conn, lista, caminhos):
+    """Grava em PROPOSTAS os itens de `lista` com caminho (um `executemany`); retorna quantos."""
+    registros = [
+        (int(c), 'Comercial', float(v), caminho) for (c, v, _), caminho in zip(lista, caminhos) if caminho is not None
+    ]
+    conn.executemany(
+        'INSERT INTO PROPOSTAS (id_cliente, tipo, valor_total, caminho_arquivo) VALUES (?, ?, ?, ?)',
+        registros,
+    )
+    return len(registros)
+
+
+def gerar_propostas_em_lote(lista, processos=None):
+    """Gera varias propostas comerciais e grava PROPOSTAS em uma unica transacao.
+
+    Ver `renderizar_propostas_em_lote`. Retorna os caminhos na ordem da
+    entrada (None para cliente inexistente ou falha de renderizacao).
+    """
+    lista = list(lista)
+    caminhos = renderizar_propostas_em_lote(lista, processos)['caminhos']
+    with database.transaction(DB_PATH) as conn:
+        registrar_propostas_em_lote(conn, lista, caminhos)
+    return caminhos
+
+
+def registrar_proposta(conn, id_cliente, tipo, valor, caminho_arquivo):
     insert_sql = (
         'INSERT INTO PROPOSTAS (id_cliente, tipo, valor_total, caminho_arquivo) '
         'VALUES (?, ?, ?, ?)'
     )
-    c.execute(insert_sql, insert_params)
-    conn.commit()
-    conn.close()
+    return conn.execute(insert_sql, (id_cliente, tipo, valor, caminho_arquivo)).lastrowid
+
 
-    return str(filename)
+def _salvar_texto(tipo, entradas, linhas):
+    def renderizar():
+        return '\n'.join(linhas).encode('utf-8')
+
+    return artifact_store.obter_ou_criar(tipo, entradas, renderizar, '.txt', DB_PATH)
 
 
 def gerar_proposta_customizacao(requisitos, horas_estimadas, id_cliente=None):
-    out = _ensure_outputs_dir()
-    ts = datetime.now().strftime('%Y%m%d%H%M%S')
-    filename = out / f'Proposta_Customizacao_{ts}.txt'
     content = []
     content.append('PROPOSTA DE CUSTOMIZACAO')
     if id_cliente:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute('SELECT nome_empresa, decisor_nome FROM CLIENTES WHERE id_cliente = ?', (id_cliente,))
-        row = c.fetchone()
-        conn.close()
+        with database.connection(DB_PATH) as conn:
+            row = conn.execute(
+                'SELECT nome_empresa, decisor_nome FROM CLIENTES WHERE id_cliente = ?', (id_cliente,)
+            ).fetchone()
         if row:
             content.append(f'Cliente: {row[0]}')
             content.append(f'Decisor: {row[1]}')
@@ -87,21 +226,11 @@ def gerar_proposta_customizacao(requisitos, horas_estimadas, id_cliente=None):
     content.append(requisitos)
     content.append('\nESTIMATIVA DE ESFORCO:')
     content.append(f'{horas_estimadas} horas')
-    out_text = '\n\n'.join(content)
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(out_text)
+    filename = artifact_store.guardar('\n\n'.join(content).encode('utf-8'), '.txt', DB_PATH)
     if id_cliente:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        insert_params = (id_cliente, 'Customizacao', None, str(filename))
-        insert_sql = (
-            'INSERT INTO PROPOSTAS (id_cliente, tipo, valor_total, caminho_arquivo) '
-            'VALUES (?, ?, ?, ?)'
-        )
-        c.execute(insert_sql, insert_params)
-        conn.commit()
-        conn.close()
-    return str(filename)
+        with database.transaction(DB_PATH) as conn:
+            registrar_proposta(conn, id_cliente, 'Customizacao', None, filename)
+    return filename
 
 
 def generate_bpmn_diagram(titulo, descricao):
@@ -126,11 +255,7 @@ def generate_bpmn_diagram(titulo, descricao):
         lines.append('Gateway: Requer analise tecnica? -> NAO')
         lines.append('Task: Closer finaliza contrato padrao')
     lines.append('END')
-    out = _ensure_outputs_dir()
-    filename = out / f'BPMN_{titulo.replace(" ", "_")}.txt'
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(lines))
-    return str(filename)
+    return _salvar_texto('bpmn', {'titulo': titulo, 'complexo': is_complex}, lines)
 
 
 def gerar_cronograma_implementacao(id_cliente, data_inicio):
@@ -141,8 +266,6 @@ def gerar_cronograma_implementacao(id_cliente, data_inicio):
         ('Ajustes', 'Correcao e melhoria conforme piloto'),
         ('Treinamento', 'Treinamento final e documentacao'),
     ]
-    out = _ensure_outputs_dir()
-    filename = out / f'Cronograma_{id_cliente}_{data_inicio}.txt'
     lines = [f'Cronograma de Implementacao - Cliente {id_cliente}', f'Inicio: {start.isoformat()}', '']
     current = start
     for i, (fase, desc) in enumerate(etapas, start=1):
@@ -152,6 +275,4 @@ def gerar_cronograma_implementacao(id_cliente, data_inicio):
         lines.append(f'  Atividades: {desc}')
         lines.append('')
         current = end + timedelta(days=1)
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(lines))
-    return str(filename)
+    return _salvar_texto('cronograma', {'id_cliente': id_cliente, 'inicio': start.isoformat()}, lines)
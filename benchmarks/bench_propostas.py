@@ -0,0 +1,56 @@
+"""Propostas/segundo antes e depois do template em cache.
+
+Roda sobre um banco novo em um diretório temporário. Cada fase usa
+valores distintos, então nenhuma proposta vem do store de artefatos.
+
+Uso (na raiz do projeto):
+    python benchmarks/bench_propostas.py [--n 500]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import automation_module  # noqa: E402
+import proposal_template  # noqa: E402
+import setup_project  # noqa: E402
+
+
+def _taxa(func, n):
+    inicio = time.perf_counter()
+    func()
+    return n / (time.perf_counter() - inicio)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--n', type=int, default=500, help='propostas por medição')
+    args = parser.parse_args(argv)
+    n = args.n
+
+    args_pdf = ('ACME Ltda', 'Alice Decisora', 'alice@acme.com', 19990.0, 'Maria SDR')
+    template = proposal_template.obter_template()
+    sem_cache = _taxa(lambda: [proposal_template.renderizar_sem_cache(*args_pdf) for _ in range(n)], n)
+    com_cache = _taxa(lambda: [template.renderizar(*args_pdf) for _ in range(n)], n)
+    print(f'render (memória)      sem cache: {sem_cache:9.1f}/s   template: {com_cache:9.1f}/s')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        setup_project.setup_database()
+        uid = setup_project.add_employee_securely('Maria SDR', 'SDR', 'senha')
+        cid = setup_project.insert_client('ACME Ltda', '00.000.000/0001-00', 'Alice Decisora', 'alice@acme.com', uid)
+        # Valores diferentes por fase: o lote não pode reaproveitar os PDFs do unitário.
+        unitario_itens = [(cid, 1000.0 + i, uid) for i in range(n)]
+        lote_itens = [(cid, 1000.0 + n + i, uid) for i in range(n)]
+        unitario = _taxa(lambda: [automation_module.gerar_proposta_comercial(*item) for item in unitario_itens], n)
+        lote = _taxa(lambda: automation_module.gerar_propostas_em_lote(lote_itens), n)
+        print(f'gerar + gravar + banco  unitário: {unitario:9.1f}/s   lote: {lote:9.1f}/s')
+
+
+if __name__ == '__main__':
+    main()
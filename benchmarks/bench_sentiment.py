@@ -0,0 +1,56 @@
+"""Compara a latência por mensagem do léxico e do modelo treinado.
+
+Uso (na raiz do projeto):
+    python benchmarks/bench_sentiment.py [--n 20000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import stress_model  # noqa: E402
+import wellbeing_module  # noqa: E402
+
+TEXTOS = [
+    'Estou muito frustrado com metas e pressão',
+    'Tive um ótimo dia, fechei 2 contratos',
+    'Perdendo tempo com atividades manuais',
+    'Uso automação e me sinto mais produtivo',
+    'Sobrecarga e prazos impossíveis',
+    'Dia normal, sem novidades',
+    'Não consigo agendar nada esta semana, o decisor nunca retorna',
+]
+
+
+def _medir(func, textos):
+    inicio = time.perf_counter()
+    func(textos)
+    return (time.perf_counter() - inicio) / len(textos) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--n', type=int, default=20000, help='mensagens por medição')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(stress_model.MODEL_PATH):
+        stress_model.treinar()
+    stress_model.carregar_modelo()
+
+    rnd = random.Random(42)
+    # sufixo numérico evita que a deduplicação de textos distorça a medição
+    textos = [f'{rnd.choice(TEXTOS)} {i}' for i in range(args.n)]
+
+    print(f'{args.n} mensagens; latência média por mensagem (µs)')
+    for modelo in wellbeing_module.MODELOS:
+        unitario = _medir(lambda ts: [wellbeing_module.analyze_sentiment(t, modelo) for t in ts], textos)
+        lote = _medir(lambda ts: wellbeing_module.analyze_sentiment_many(ts, modelo), textos)
+        print(f'  {modelo:<9} unitário: {unitario:8.2f}   lote: {lote:8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+"""Teste de carga: gunicorn `sync` (modo antigo) x `threads` com N clientes simultâneos.
+
+Cria um banco sintético em um diretório temporário, sobe o servidor com
+`gunicorn.conf.py` em cada modo e dispara `--clientes` clientes (threads
+com conexão HTTP keep-alive) durante `--duracao` segundos. Cada cliente
+sorteia uma requisição por vez: listagem de deliverables, registro de
+wellbeing ou login (bcrypt, a rota lenta que prendia os workers `sync`).
+
+Mede vazão (req/s), latência p50/p95/máx por rota e códigos HTTP; grava o
+resultado em JSON em `outputs/benchmarks/`. O banco do projeto não é
+alterado. Com uma CPU o próprio cliente disputa CPU com o servidor;
+compare execuções na mesma máquina.
+
+Uso (na raiz do projeto):
+    python benchmarks/load_test.py [--clientes 200] [--duracao 15] [--modos sync,threads]
+"""
+
+import argparse
+from datetime import datetime
+import http.client
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import seed_fixtures  # noqa: E402
+
+SAIDA_DIR = os.path.join(RAIZ, 'outputs', 'benchmarks')
+FUNCIONARIOS = 200
+SENHAS_DISTINTAS = 10
+# (peso, rota) das requisições sorteadas por cada cliente.
+MIX = ((60, 'deliverables'), (30, 'wellbeing'), (10, 'login'))
+
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _preparar(tmp):
+    db = os.path.join(tmp, 'ai_sales_copilot.db')
+    with open(os.devnull, 'w') as nulo:
+        sys.stdout, antigo = nulo, sys.stdout
+        try:
+            seed_fixtures.gerar(funcionarios=FUNCIONARIOS, clientes=20, logs=20000, semente=7,
+                                senhas_distintas=SENHAS_DISTINTAS, db_path=db)
+        finally:
+            sys.stdout = antigo
+    deliverables = os.path.join(tmp, 'deliverables')
+    os.makedirs(deliverables)
+    for i in range(50):
+        with open(os.path.join(deliverables, f'entrega_{i:03d}.txt'), 'w') as f:
+            f.write('x' * 4096)
+    return db, deliverables
+
+
+class _Servidor:
+    def __init__(self, modo, tmp, db, deliverables, workers):
+        self.porta = _porta_livre()
+        env = {
+            **os.environ,
+            'GUNICORN_MODO': modo,
+            'GUNICORN_BIND': f'127.0.0.1:{self.porta}',
+            'GUNICORN_WORKERS': str(workers),
+            'COPILOT_DB': db,
+            'COPILOT_DELIVERABLES': deliverables,
+            'JWT_SECRET': 'teste-de-carga-' + 'x' * 32,
+        }
+        self.processo = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', os.path.join(RAIZ, 'gunicorn.conf.py'),
+             '--chdir', tmp, '--pythonpath', RAIZ, 'server:app'],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+    def aguardar(self, limite=60):
+        fim = time.monotonic() + limite
+        while time.monotonic() < fim:
+            if self.processo.poll() is not None:
+                raise RuntimeError('gunicorn terminou antes de aceitar conexões')
+            try:
+                conn = http.client.HTTPConnection('127.0.0.1', self.porta, timeout=2)
+                conn.request('GET', '/')
+                conn.getresponse().read()
+                conn.close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError('gunicorn não respondeu a tempo')
+
+    def parar(self):
+        self.processo.terminate()
+        try:
+            self.processo.wait(10)
+        except subprocess.TimeoutExpired:
+            self.processo.kill()
+
+
+def _requisitar(conn, metodo, caminho, corpo=None, token=None):
+    cabecalhos = {'Content-Type': 'application/json'}
+    if token:
+        cabecalhos['Authorization'] = f'Bearer {token}'
+    conn.request(metodo, caminho, body=json.dumps(corpo) if corpo is not None else None, headers=cabecalhos)
+    resp = conn.getresponse()
+    return resp.status, resp.read()
+
+
+def _login(conn, i):
+    senha = f'pwd{(i - 1) % SENHAS_DISTINTAS + 1}2025'
+    return _requisitar(conn, 'POST', '/api/login', {'nome': f'User{i} Test', 'senha': senha})
+
+
+def _cliente(porta, token, fim, semente, amostras):
+    rng = random.Random(semente)
+    rotas = [rota for peso, rota in MIX for _ in range(peso)]
+    conn = http.client.HTTPConnection('127.0.0.1', porta, timeout=60)
+    while time.monotonic() < fim:
+        rota = rng.choice(rotas)
+        inicio = time.perf_counter()
+        try:
+            if rota == 'deliverables':
+                status, _ = _requisitar(conn, 'GET', '/api/deliverables', token=token)
+            elif rota == 'wellbeing':
+                corpo = {'id_funcionario': rng.randint(1, FUNCIONARIOS), 'problema': 'Sobrecarga e prazos'}
+                status, _ = _requisitar(conn, 'POST', '/api/register_wellbeing', corpo, token)
+            else:
+                status, _ = _login(conn, rng.randint(1, FUNCIONARIOS))
+        except (OSError, http.client.HTTPException):
+            status = 'erro_conexao'
+            conn.close()
+        amostras.append((rota, status, time.perf_counter() - inicio))
+    conn.close()
+
+
+def _resumo(amostras, segundos):
+    por_rota = {}
+    for rota, status, duracao in amostras:
+        por_rota.setdefault(rota, []).append((status, duracao))
+    resumo = {'requisicoes': len(amostras), 'por_segundo': len(amostras) / segundos, 'rotas': {}}
+    for rota, itens in sorted(por_rota.items()):
+        ms = sorted(d * 1000 for _, d in itens)
+        codigos = {}
+        for status, _ in itens:
+            codigos[str(status)] = codigos.get(str(status), 0) + 1
+        resumo['rotas'][rota] = {
+            'n': len(ms),
+            'mediana_ms': statistics.median(ms),
+            'p95_ms': ms[min(len(ms) - 1, int(len(ms) * 0.95))],
+            'max_ms': ms[-1],
+            'codigos': codigos,
+        }
+    return resumo
+
+
+def executar_modo(modo, tmp, db, deliverables, clientes, duracao, workers):
+    servidor = _Servidor(modo, tmp, db, deliverables, workers)
+    try:
+        servidor.aguardar()
+        conn = http.client.HTTPConnection('127.0.0.1', servidor.porta, timeout=60)
+        status, corpo = _login(conn, 1)
+        conn.close()
+        if status != 200:
+            raise RuntimeError(f'login inicial falhou ({status}): {corpo[:200]!r}')
+        token = json.loads(corpo)['token']
+        amostras = []
+        fim = time.monotonic() + duracao
+        threads = [
+            threading.Thread(target=_cliente, args=(servidor.porta, token, fim, i, amostras), daemon=True)
+            for i in range(clientes)
+        ]
+        inicio = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return _resumo(amostras, time.perf_counter() - inicio)
+    finally:
+        servidor.parar()
+
+
+def imprimir(resultados):
+    print(f'{"modo":<8} {"rota":<13} {"n":>7} {"p50 ms":>9} {"p95 ms":>9} {"máx ms":>9}  códigos')
+    for modo, r in resultados.items():
+        for rota, dados in r['rotas'].items():
+            print(
+                f'{modo:<8} {rota:<13} {dados["n"]:>7} {dados["mediana_ms"]:9.1f} {dados["p95_ms"]:9.1f} '
+                f'{dados["max_ms"]:9.1f}  {dados["codigos"]}'
+            )
+        print(f'{modo:<8} {"total":<13} {r["requisicoes"]:>7}  {r["por_segundo"]:.1f} req/s')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clientes', type=int, default=200)
+    parser.add_argument('--duracao', type=float, default=15, help='segundos de carga por modo')
+    parser.add_argument('--modos', default='sync,threads')
+    parser.add_argument('--workers', type=int, default=4, help='workers do gunicorn')
+    parser.add_argument('--saida', help='arquivo JSON (padrão: outputs/benchmarks/carga-<data>.json)')
+    args = parser.parse_args(argv)
+
+    resultados = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db, deliverables = _preparar(tmp)
+        for modo in args.modos.split(','):
+            print(f'Modo {modo}: {args.clientes} clientes por {args.duracao:.0f}s...')
+            resultados[modo] = executar_modo(modo, tmp, db, deliverables, args.clientes, args.duracao, args.workers)
+    imprimir(resultados)
+    saida = args.saida or os.path.join(SAIDA_DIR, f'carga-{datetime.now():%Y%m%d-%H%M%S}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump({
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'parametros': {'clientes': args.clientes, 'duracao': args.duracao, 'workers': args.workers,
+                           'cpus': os.cpu_count(), 'mix': dict((r, p) for p, r in MIX)},
+            'resultados': resultados,
+        }, f, indent=2)
+    print(f'Resultados em {saida}')
+
+
+if __name__ == '__main__':
+    main()
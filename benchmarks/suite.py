@@ -0,0 +1,283 @@
+"""Suíte de benchmarks dos caminhos críticos do copilot, com saída em JSON.
+
+Para cada tamanho de banco (número de logs de estresse) cria um banco
+sintético em um diretório temporário (`seed_fixtures.gerar`, semente
+fixa) e mede:
+
+- `analyze_sentiment`: mensagens/segundo;
+- `registrar_log_estresse_e_pontuar`: latência por chamada;
+- `gerar_proposta_comercial`: propostas/segundo (valores distintos, sem cache);
+- `/api/login` e `/api/deliverables`: latência via test client do Flask;
+- `report_py.generate_reports` (agregados e `--since` desde o início):
+  tempo e pico de memória (tracemalloc, em uma execução separada).
+
+O banco do projeto não é alterado. O resultado vai para um JSON em
+`outputs/benchmarks/`; com `--comparar` as métricas são comparadas com uma
+execução anterior e o processo sai com código 1 se alguma piorar mais que
+`--tolerancia`.
+
+Uso (na raiz do projeto):
+    python benchmarks/suite.py [--tamanhos 1000,100000] [--comparar outputs/benchmarks/anterior.json]
+"""
+
+import argparse
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import automation_module  # noqa: E402
+import database  # noqa: E402
+import report_py  # noqa: E402
+import seed_fixtures  # noqa: E402
+import server  # noqa: E402
+import wellbeing_module  # noqa: E402
+
+SAIDA_DIR = os.path.join(RAIZ, 'outputs', 'benchmarks')
+TAMANHOS = (1000, 100000)
+SEMENTE = 7
+USUARIO = ('User1 Test', 'pwd12025')
+ARQUIVOS_DELIVERABLES = 200
+
+# Métricas em que maior é melhor; nas demais (tempos, memória) menor é melhor.
+MAIOR_MELHOR = ('por_segundo',)
+
+
+def _estatisticas(amostras):
+    """Resumo em ms de uma lista de durações em segundos."""
+    ms = sorted(a * 1000 for a in amostras)
+    return {
+        'n': len(ms),
+        'min_ms': ms[0],
+        'mediana_ms': statistics.median(ms),
+        'p95_ms': ms[min(len(ms) - 1, int(len(ms) * 0.95))],
+        'media_ms': statistics.fmean(ms),
+    }
+
+
+def _latencias(func, repeticoes, aquecimento=1):
+    for _ in range(aquecimento):
+        func()
+    amostras = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func()
+        amostras.append(time.perf_counter() - inicio)
+    return _estatisticas(amostras)
+
+
+def _silencioso(func, *args, **kwargs):
+    with redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+@contextmanager
+def _banco_sintetico(logs):
+    """Diretório temporário com um banco de `logs` logs; aponta os módulos para ele."""
+    anterior = os.getcwd()
+    server_db, server_deliverables = server.DB, server.DELIVERABLES_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            # Os módulos usam o nome relativo do banco; o servidor usa caminho absoluto.
+            server.DB = os.path.join(tmp, automation_module.DB_PATH)
+            server.DELIVERABLES_DIR = os.path.join(tmp, 'deliverables')
+            inicio = time.perf_counter()
+            contagens = seed_fixtures.gerar(
+                funcionarios=max(10, logs // 1000), clientes=max(8, logs // 2000), logs=logs,
+                semente=SEMENTE, db_path=automation_module.DB_PATH,
+            )
+            contagens['geracao_s'] = time.perf_counter() - inicio
+            os.makedirs(server.DELIVERABLES_DIR)
+            for i in range(ARQUIVOS_DELIVERABLES):
+                with open(os.path.join(server.DELIVERABLES_DIR, f'entrega_{i:04d}.txt'), 'w') as f:
+                    f.write('x' * 1024)
+            yield contagens
+        finally:
+            server.DB, server.DELIVERABLES_DIR = server_db, server_deliverables
+            database.close_all()
+            os.chdir(anterior)
+
+
+def bench_sentimento(mensagens):
+    textos = [f'{seed_fixtures.TEXTOS_EXEMPLO[i % len(seed_fixtures.TEXTOS_EXEMPLO)]} {i}' for i in range(mensagens)]
+    wellbeing_module.analyze_sentiment(textos[0])
+    inicio = time.perf_counter()
+    for texto in textos:
+        wellbeing_module.analyze_sentiment(texto)
+    segundos = time.perf_counter() - inicio
+    return {'n': mensagens, 'por_segundo': mensagens / segundos}
+
+
+def bench_wellbeing(repeticoes):
+    contador = iter(range(10 ** 9))
+    return _latencias(
+        lambda: wellbeing_module.registrar_log_estresse_e_pontuar(1, f'Sobrecarga e prazos {next(contador)}'),
+        repeticoes,
+    )
+
+
+def bench_propostas(n):
+    # Valores distintos: cada chamada renderiza um PDF novo em vez de vir do store.
+    valores = iter(range(10 ** 9))
+    automation_module.gerar_proposta_comercial(1, 1.0, 1)
+    inicio = time.perf_counter()
+    for _ in range(n):
+        automation_module.gerar_proposta_comercial(1, 1000.0 + next(valores), 1)
+    return {'n': n, 'por_segundo': n / (time.perf_counter() - inicio)}
+
+
+def bench_api(repeticoes_login, repeticoes):
+    server.app.config['TESTING'] = True
+    with server.app.test_client() as client:
+        nome, senha = USUARIO
+
+        def login():
+            resp = client.post('/api/login', json={'nome': nome, 'senha': senha})
+            assert resp.status_code == 200, resp.get_json()
+            return resp.get_json()['token']
+
+        token = login()
+        cabecalho = {'Authorization': f'Bearer {token}'}
+
+        def deliverables():
+            resp = client.get('/api/deliverables', headers=cabecalho)
+            assert resp.status_code == 200, resp.get_json()
+
+        return {
+            'login': _latencias(login, repeticoes_login),
+            'deliverables': _latencias(deliverables, repeticoes),
+        }
+
+
+def _zerar_marca_dagua():
+    with database.transaction(report_py.DB) as conn:
+        conn.execute('DELETE FROM RELATORIO_WATERMARK WHERE relatorio = ?', (report_py.RELATORIO,))
+
+
+def bench_relatorio(since):
+    """Tempo de uma execução e pico de memória Python de outra (tracemalloc distorce o tempo)."""
+    _zerar_marca_dagua()
+    inicio = time.perf_counter()
+    _silencioso(report_py.generate_reports, since=since)
+    segundos = time.perf_counter() - inicio
+    _zerar_marca_dagua()
+    tracemalloc.start()
+    try:
+        _silencioso(report_py.generate_reports, since=since)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'segundos': segundos, 'pico_memoria_mb': pico / 2 ** 20}
+
+
+def executar(tamanhos=TAMANHOS, repeticoes=50, repeticoes_login=10, mensagens=20000, propostas=100):
+    """Roda a suíte; retorna o dict gravado em JSON."""
+    resultados = {}
+    for logs in tamanhos:
+        print(f'Banco com {logs} logs...')
+        with _banco_sintetico(logs) as contagens:
+            resultados[str(logs)] = {
+                'banco': contagens,
+                'sentimento': bench_sentimento(mensagens),
+                'wellbeing': bench_wellbeing(repeticoes),
+                'propostas': bench_propostas(propostas),
+                'api': bench_api(repeticoes_login, repeticoes),
+                'relatorio': bench_relatorio(since=False),
+                'relatorio_since': bench_relatorio(since=True),
+            }
+    return {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'parametros': {
+            'repeticoes': repeticoes, 'repeticoes_login': repeticoes_login,
+            'mensagens': mensagens, 'propostas': propostas, 'semente': SEMENTE,
+        },
+        'resultados': resultados,
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _metricas(dados, prefixo=''):
+    """Achata o JSON em {'1000.api.login.mediana_ms': valor} (só métricas comparáveis)."""
+    planas = {}
+    for chave, valor in dados.items():
+        nome = f'{prefixo}{chave}'
+        if isinstance(valor, dict):
+            if chave != 'banco':
+                planas.update(_metricas(valor, f'{nome}.'))
+        elif chave.endswith(('_ms', '_s', 'segundos', '_mb')) or chave in MAIOR_MELHOR:
+            planas[nome] = valor
+    return planas
+
+
+def comparar(anterior, atual, tolerancia):
+    """Imprime a variação por métrica; retorna as métricas que pioraram além de `tolerancia`."""
+    antes, depois = _metricas(anterior['resultados']), _metricas(atual['resultados'])
+    regressoes = []
+    for nome in sorted(antes.keys() & depois.keys()):
+        if not antes[nome]:
+            continue
+        variacao = (depois[nome] - antes[nome]) / antes[nome]
+        piora = -variacao if nome.rsplit('.', 1)[-1] in MAIOR_MELHOR else variacao
+        marca = ' <-- regressão' if piora > tolerancia else ''
+        print(f'{nome:<48} {antes[nome]:12.3f} -> {depois[nome]:12.3f} ({variacao:+7.1%}){marca}')
+        if marca:
+            regressoes.append(nome)
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tamanhos', default=','.join(map(str, TAMANHOS)),
+                        help='logs por banco, separados por vírgula')
+    parser.add_argument('--repeticoes', type=int, default=50)
+    parser.add_argument('--repeticoes-login', type=int, default=10, help='login é dominado pelo bcrypt')
+    parser.add_argument('--mensagens', type=int, default=20000)
+    parser.add_argument('--propostas', type=int, default=100)
+    parser.add_argument('--saida', help='arquivo JSON (padrão: outputs/benchmarks/bench-<data>.json)')
+    parser.add_argument('--comparar', metavar='JSON', help='execução anterior para comparação')
+    parser.add_argument('--tolerancia', type=float, default=0.10, help='piora relativa aceita (0.10 = 10%%)')
+    args = parser.parse_args(argv)
+
+    resultado = executar(
+        [int(t) for t in args.tamanhos.split(',')], args.repeticoes, args.repeticoes_login,
+        args.mensagens, args.propostas,
+    )
+    saida = args.saida or os.path.join(SAIDA_DIR, f'bench-{datetime.now():%Y%m%d-%H%M%S}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2)
+    print(f'Resultados em {saida}')
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            regressoes = comparar(json.load(f), resultado, args.tolerancia)
+        if regressoes:
+            print(f'{len(regressoes)} métrica(s) pioraram mais que {args.tolerancia:.0%}')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
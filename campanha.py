@@ -0,0 +1,199 @@
+"""Campanhas de propostas comerciais em lote (ex.: fechamento de trimestre).
+
+A lista de propostas vem de um CSV (`id_cliente,valor,id_responsavel`),
+de um JSON (lista de objetos com essas chaves) ou de um filtro sobre
+CLIENTES. No filtro o valor é único e o responsável é o
+`responsavel_vendas` de cada cliente, salvo `id_responsavel`. Clientes e
+funcionários são carregados com uma consulta cada e os PDFs são
+renderizados em um pool de processos
+(`automation_module.renderizar_propostas_em_lote`). As linhas de
+PROPOSTAS entram em uma única transação. O relatório traz vazão e falhas.
+
+Uso:
+    python campanha.py --csv campanha.csv
+    python campanha.py --json campanha.json --processos 4
+    python campanha.py --todos --valor 19990
+    python campanha.py --where "data_cadastro >= '2025-10-01'" --valor 19990
+
+Via HTTP: `POST /api/proposals/batch` enfileira o job `campanha_propostas`
+(o `--where` livre fica restrito à CLI; a API aceita só o filtro estruturado).
+"""
+
+import argparse
+import csv
+import json
+import time
+
+import automation_module
+import database
+import migrations
+
+CAMPOS = ('id_cliente', 'valor', 'id_responsavel')
+# Filtro estruturado -> condição SQL sobre CLIENTES.
+FILTROS = {
+    'ids': 'id_cliente IN (SELECT value FROM json_each(?))',
+    'responsavel': 'responsavel_vendas = ?',
+    'cadastro_desde': 'data_cadastro >= ?',
+    'cadastro_ate': 'data_cadastro <= ?',
+}
+FALHAS_NO_RELATORIO = 100
+
+
+def _item(obj):
+    if isinstance(obj, dict):
+        obj = [obj.get(campo) for campo in CAMPOS]
+    # Strings e outros iteráveis seriam desempacotados caractere a caractere.
+    if not isinstance(obj, (list, tuple)):
+        raise TypeError(f'esperado objeto ou lista, recebido {type(obj).__name__}')
+    id_cliente, valor, id_responsavel = obj
+    return int(id_cliente), float(valor), int(id_responsavel)
+
+
+def ler_itens(registros):
+    """(itens, linhas, falhas) de uma sequência de dicts ou listas [id_cliente, valor, id_responsavel].
+
+    `linhas` traz a posição (1-based) de cada item válido na entrada, a
+    mesma usada em `falhas`, para o relatório apontar o registro original.
+    """
+    itens, linhas, falhas = [], [], []
+    for n, registro in enumerate(registros, start=1):
+        try:
+            itens.append(_item(registro))
+            linhas.append(n)
+        except (TypeError, ValueError):
+            falhas.append({'linha': n, 'erro': f'Registro inválido: {registro!r}'[:200]})
+    return itens, linhas, falhas
+
+
+def ler_csv(caminho):
+    with open(caminho, newline='', encoding='utf-8') as f:
+        return ler_itens(csv.DictReader(f))
+
+
+def ler_json(caminho):
+    with open(caminho, encoding='utf-8') as f:
+        return ler_itens(json.load(f))
+
+
+def validar_filtro(filtro):
+    desconhecidos = set(filtro) - set(FILTROS)
+    if desconhecidos:
+        raise ValueError(f'Filtro desconhecido: {sorted(desconhecidos)} (use {sorted(FILTROS)})')
+
+
+def por_filtro(valor, filtro=None, where=None, id_responsavel=None, db_path=None):
+    """Uma proposta de `valor` por cliente que atende ao filtro (vazio = todos).
+
+    `where` é uma cláusula SQL livre sobre CLIENTES, só para uso local (CLI).
+    """
+    filtro = filtro or {}
+    validar_filtro(filtro)
+    db_path = db_path or automation_module.DB_PATH
+    migrations.migrar(db_path)
+    condicoes, parametros = [], []
+    for chave, condicao in FILTROS.items():
+        if chave in filtro:
+            condicoes.append(condicao)
+            parametros.append(json.dumps(filtro[chave]) if chave == 'ids' else filtro[chave])
+    if where:
+        condicoes.append(f'({where})')
+    sql = 'SELECT id_cliente, responsavel_vendas FROM CLIENTES'
+    if condicoes:
+        sql += ' WHERE ' + ' AND '.join(condicoes)
+    with database.connection(db_path) as conn:
+        rows = conn.execute(sql + ' ORDER BY id_cliente', parametros).fetchall()
+    return [(cid, float(valor), int(id_responsavel or responsavel or 0)) for cid, responsavel in rows]
+
+
+def itens_do_payload(payload, db_path=None):
+    """(itens, linhas, falhas) do payload da API/job: {'propostas': [...]} ou {'filtro': {...}, 'valor': ...}."""
+    if 'propostas' in payload:
+        if not isinstance(payload['propostas'], list):
+            raise ValueError('"propostas" deve ser uma lista')
+        return ler_itens(payload['propostas'])
+    if 'valor' not in payload:
+        raise ValueError('Informe "propostas" ou "filtro" com "valor"')
+    filtro = payload.get('filtro') or {}
+    if not isinstance(filtro, dict):
+        raise ValueError('"filtro" deve ser um objeto')
+    return por_filtro(
+        float(payload['valor']), filtro, id_responsavel=payload.get('id_responsavel'), db_path=db_path
+    ), None, []
+
+
+def renderizar(itens, linhas=None, falhas_entrada=(), processos=None, db_path=None):
+    """Renderiza a campanha sem gravar PROPOSTAS; retorna (relatório, caminhos).
+
+    Falhas de renderização são reportadas pela linha de entrada do item
+    (`linhas`, alinhada com `itens`; padrão: a posição em `itens`).
+    """
+    linhas = linhas or range(1, len(itens) + 1)
+    inicio = time.perf_counter()
+    resultado = automation_module.renderizar_propostas_em_lote(itens, processos, db_path)
+    segundos = time.perf_counter() - inicio
+    falhas = list(falhas_entrada) + [
+        {'linha': linhas[f['indice']], 'id_cliente': f['id_cliente'], 'erro': f['erro']} for f in resultado['falhas']
+    ]
+    falhas.sort(key=lambda f: f['linha'])
+    geradas = sum(1 for c in resultado['caminhos'] if c is not None)
+    relatorio = {
+        'total': len(itens) + len(falhas_entrada),
+        'geradas': geradas,
+        'renderizadas': resultado['renderizadas'],
+        'do_cache': resultado['do_cache'],
+        'n_falhas': len(falhas),
+        'falhas': falhas[:FALHAS_NO_RELATORIO],
+        'segundos': round(segundos, 3),
+        'por_segundo': round(geradas / segundos, 1) if segundos > 0 else None,
+        'processos': processos or automation_module.PROCESSOS,
+    }
+    return relatorio, resultado['caminhos']
+
+
+def executar(itens, linhas=None, falhas_entrada=(), processos=None, db_path=None):
+    """Renderiza e grava as propostas (uma transação); retorna o relatório."""
+    db_path = db_path or automation_module.DB_PATH
+    relatorio, caminhos = renderizar(itens, linhas, falhas_entrada, processos, db_path)
+    with database.transaction(db_path) as conn:
+        automation_module.registrar_propostas_em_lote(conn, itens, caminhos)
+    return relatorio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gera propostas comerciais em lote')
+    parser.add_argument('--db', default=automation_module.DB_PATH)
+    fonte = parser.add_mutually_exclusive_group(required=True)
+    fonte.add_argument('--csv', help='arquivo com colunas id_cliente,valor,id_responsavel')
+    fonte.add_argument('--json', help='arquivo com lista de {id_cliente, valor, id_responsavel}')
+    fonte.add_argument('--todos', action='store_true', help='uma proposta para cada cliente')
+    fonte.add_argument('--where', help='cláusula SQL sobre CLIENTES (ex.: "data_cadastro >= \'2025-10-01\'")')
+    parser.add_argument('--valor', type=float, help='valor das propostas (com --todos/--where)')
+    parser.add_argument('--responsavel', type=int, help='id do responsável (padrão: responsavel_vendas do cliente)')
+    parser.add_argument(
+        '--processos', type=int, help=f'processos de renderização (padrão {automation_module.PROCESSOS})'
+    )
+    args = parser.parse_args(argv)
+    if args.csv:
+        itens, linhas, falhas = ler_csv(args.csv)
+    elif args.json:
+        itens, linhas, falhas = ler_json(args.json)
+    else:
+        if args.valor is None:
+            parser.error('--valor é obrigatório com --todos/--where')
+        itens, linhas, falhas = por_filtro(
+            args.valor, where=args.where, id_responsavel=args.responsavel, db_path=args.db
+        ), None, []
+    relatorio = executar(itens, linhas, falhas, args.processos, args.db)
+    print(
+        f"{relatorio['geradas']}/{relatorio['total']} propostas em {relatorio['segundos']}s "
+        f"({relatorio['por_segundo']}/s; {relatorio['renderizadas']} renderizadas, "
+        f"{relatorio['do_cache']} do cache, {relatorio['processos']} processos)"
+    )
+    for falha in relatorio['falhas']:
+        print(f'  falha: {falha}')
+    if relatorio['n_falhas'] > len(relatorio['falhas']):
+        print(f"  ... e mais {relatorio['n_falhas'] - len(relatorio['falhas'])} falha(s)")
+
+
+if __name__ == '__main__':
+    main()
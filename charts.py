@@ -0,0 +1,137 @@
+"""Renderização de gráficos dos relatórios em paralelo e com cache.
+
+Cada gráfico é descrito por um dict (`grafico_barras` / `grafico_linhas`)
+com os dados já agregados. `renderizar` calcula a chave de cada gráfico a
+partir desse dict; os que já existem no store de artefatos
+(`artifact_store.py`) são servidos do cache e só os demais são desenhados,
+em um pool de processos. Os workers usam o backend Agg com figuras
+orientadas a objeto (sem o estado global do pyplot), então N gráficos
+custam ~N / processos em vez de N renders em série.
+
+O PNG final é copiado para `arquivo` apenas quando o conteúdo mudou.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import io
+import os
+import shutil
+
+import artifact_store
+
+DB_PATH = 'ai_sales_copilot.db'
+
+# Incrementar quando o layout dos gráficos mudar (invalida o cache).
+FORMATO_GRAFICO = 1
+PROCESSOS = int(os.environ.get('CHARTS_PROCESSOS', os.cpu_count() or 1))
+
+
+def grafico_barras(arquivo, x, y, titulo, xlabel, ylabel, cor='tab:blue',
+                   horizontal=False, linha_zero=False, rotulos=False):
+    """Especificação de um gráfico de barras (x categórico, y numérico).
+
+    `cor` é uma cor única ou uma lista com uma cor por barra.
+    """
+    return {
+        'tipo': 'barras',
+        'arquivo': arquivo,
+        'x': [str(v) for v in x],
+        'y': [float(v) for v in y],
+        'titulo': titulo,
+        'xlabel': xlabel,
+        'ylabel': ylabel,
+        'cor': cor if isinstance(cor, str) else list(cor),
+        'horizontal': horizontal,
+        'linha_zero': linha_zero,
+        'rotulos': rotulos,
+    }
+
+
+def grafico_linhas(arquivo, x, series, titulo, xlabel, ylabel):
+    """Especificação de um gráfico de linhas; `series` é {rótulo: [y, ...]}."""
+    return {
+        'tipo': 'linhas',
+        'arquivo': arquivo,
+        'x': [str(v) for v in x],
+        'series': {str(k): [float(v) for v in ys] for k, ys in series.items()},
+        'titulo': titulo,
+        'xlabel': xlabel,
+        'ylabel': ylabel,
+    }
+
+
+def _entradas(spec):
+    # O nome do arquivo de destino não faz parte do conteúdo do gráfico.
+    return {'formato': FORMATO_GRAFICO, **{k: v for k, v in spec.items() if k != 'arquivo'}}
+
+
+def desenhar(spec):
+    """Desenha o gráfico e retorna os bytes do PNG (roda nos workers)."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(8, 5))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    if spec['tipo'] == 'linhas':
+        for rotulo, ys in spec['series'].items():
+            ax.plot(spec['x'], ys, marker='o', label=rotulo)
+        ax.legend()
+        ax.tick_params(axis='x', labelrotation=45)
+    else:
+        barras = ax.barh if spec['horizontal'] else ax.bar
+        container = barras(spec['x'], spec['y'], color=spec['cor'])
+        if spec['linha_zero']:
+            (ax.axvline if spec['horizontal'] else ax.axhline)(0, linestyle='--', color='red')
+        if spec['rotulos']:
+            ax.bar_label(container, labels=[f'{v:.1f}%' for v in spec['y']])
+    ax.set_title(spec['titulo'])
+    ax.set_xlabel(spec['ylabel'] if spec.get('horizontal') else spec['xlabel'])
+    ax.set_ylabel(spec['xlabel'] if spec.get('horizontal') else spec['ylabel'])
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', metadata={'Software': None})
+    return buffer.getvalue()
+
+
+def _publicar(origem, destino):
+    """Copia o PNG do store para `destino` se o conteúdo for diferente."""
+    hash_origem = os.path.splitext(os.path.basename(origem))[0]
+    if os.path.exists(destino):
+        with open(destino, 'rb') as f:
+            if hashlib.sha256(f.read()).hexdigest() == hash_origem:
+                return False
+    os.makedirs(os.path.dirname(destino) or '.', exist_ok=True)
+    tmp = f'{destino}.{os.getpid()}.tmp'
+    shutil.copyfile(origem, tmp)
+    os.replace(tmp, destino)
+    return True
+
+
+def renderizar(specs, db_path=None, processos=None):
+    """Gera os gráficos de `specs`; retorna {arquivo: 'cache' | 'renderizado'}.
+
+    Gráficos cujos dados não mudaram vêm do store de artefatos; os demais
+    são desenhados em paralelo em até `processos` processos.
+    """
+    db_path = db_path or DB_PATH
+    processos = processos or PROCESSOS
+    origens = {}
+    pendentes = []
+    for spec in specs:
+        caminho = artifact_store.buscar('grafico', _entradas(spec), db_path)
+        if caminho is None:
+            pendentes.append(spec)
+        else:
+            origens[spec['arquivo']] = ('cache', caminho)
+    if len(pendentes) > 1 and processos > 1:
+        with ProcessPoolExecutor(max_workers=min(processos, len(pendentes))) as pool:
+            imagens = list(pool.map(desenhar, pendentes))
+    else:
+        imagens = [desenhar(spec) for spec in pendentes]
+    for spec, dados in zip(pendentes, imagens):
+        caminho = artifact_store.registrar('grafico', _entradas(spec), dados, '.png', db_path)
+        origens[spec['arquivo']] = ('renderizado', caminho)
+    for arquivo, (_, caminho) in origens.items():
+        _publicar(caminho, arquivo)
+    return {arquivo: origem for arquivo, (origem, _) in origens.items()}
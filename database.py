@@ -0,0 +1,174 @@
+"""Camada de acesso a dados (SQLite) compartilhada pelos módulos do projeto.
+
+Mantém um pool de conexões por processo e por arquivo de banco, com
+`journal_mode=WAL`, `busy_timeout` e cache de statements preparados. Todos os
+módulos devem usar `connection()` para leituras e `transaction()` para
+escritas em vez de abrir `sqlite3.connect` diretamente.
+
+    with database.transaction(DB_PATH) as conn:
+        conn.execute('UPDATE ...', params)
+"""
+
+from contextlib import contextmanager, nullcontext
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_DB = 'ai_sales_copilot.db'
+
+BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+POOL_SIZE = int(os.environ.get('SQLITE_POOL_SIZE', 8))
+# Statements preparados mantidos por conexão (reaproveitados enquanto a
+# conexão vive no pool).
+CACHED_STATEMENTS = 256
+
+_lock = threading.Lock()
+_pools = {}
+_pid = os.getpid()
+
+
+# Chamado com a duração (s) de cada execute/executemany; ver `observar_consultas`.
+_observador = None
+
+
+def observar_consultas(funcao):
+    """Registra `funcao(segundos)` para ser chamada a cada statement (None desliga).
+
+    Mede a chamada de execute/executemany; linhas lidas depois com fetch*
+    não entram na conta.
+    """
+    global _observador
+    _observador = funcao
+
+
+class _Conexao(sqlite3.Connection):
+    def execute(self, sql, parametros=()):
+        if _observador is None:
+            return super().execute(sql, parametros)
+        inicio = time.perf_counter()
+        try:
+            return super().execute(sql, parametros)
+        finally:
+            _observador(time.perf_counter() - inicio)
+
+    def executemany(self, sql, parametros):
+        if _observador is None:
+            return super().executemany(sql, parametros)
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(sql, parametros)
+        finally:
+            _observador(time.perf_counter() - inicio)
+
+
+class ConnectionPool:
+    """Pool simples de conexões para um único arquivo de banco."""
+
+    def __init__(self, db_path, size=POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self._idle = []
+        self._lock = threading.Lock()
+        # Serializa as transações de escrita das threads deste processo
+        # (reentrante: uma transação aninhada falha pelo busy_timeout, sem deadlock).
+        self.escrita = threading.RLock()
+
+    def _new_connection(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT_MS / 1000.0,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=CACHED_STATEMENTS,
+            factory=_Conexao,
+        )
+        conn.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        return conn
+
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._new_connection()
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+def _resolve(db_path):
+    return os.path.abspath(db_path or DEFAULT_DB)
+
+
+def get_pool(db_path=None):
+    """Retorna o pool do processo atual para `db_path`.
+
+    Após um `fork` (ex.: workers do gunicorn) os pools herdados são
+    descartados sem fechar as conexões do processo pai.
+    """
+    global _pid
+    key = _resolve(db_path)
+    with _lock:
+        if os.getpid() != _pid:
+            _pools.clear()
+            _pid = os.getpid()
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(key)
+        return pool
+
+
+@contextmanager
+def connection(db_path=None):
+    """Empresta uma conexão do pool (modo autocommit) para leituras."""
+    pool = get_pool(db_path)
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+@contextmanager
+def transaction(db_path=None, immediate=True):
+    """Executa o bloco em uma única transação, com commit ou rollback.
+
+    Por padrão usa `BEGIN IMMEDIATE`, reservando o lock de escrita no início
+    para evitar `database is locked` na promoção de leitura para escrita.
+    """
+    # SQLite aceita um escritor por vez; esperar num lock do processo acorda
+    # a próxima thread assim que o commit acontece, em vez do backoff do
+    # busy_timeout (que dorme até 100 ms entre tentativas). Entre processos
+    # o busy_timeout continua valendo.
+    trava = get_pool(db_path).escrita if immediate else nullcontext()
+    with trava, connection(db_path) as conn:
+        conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+
+def close_all():
+    """Fecha todas as conexões ociosas de todos os pools do processo."""
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,167 @@
+"""Índice em cache e metadados dos arquivos em `deliverables/`.
+
+O índice (nome, tamanho, mtime e sha256 de cada arquivo) é montado com um
+único `os.scandir` e reaproveitado enquanto o mtime do diretório não mudar
+(arquivo criado, removido ou renomeado). Como editar um arquivo no lugar
+não altera o mtime do diretório, o índice também é revalidado a cada
+`INDICE_TTL` segundos; o sha256 só é recalculado para arquivos cujo
+tamanho ou mtime mudou.
+
+O sha256 serve de ETag forte nos downloads. Variantes pré-comprimidas
+(`arquivo.br` / `arquivo.gz` ao lado do original, geradas com
+`python deliverables.py comprimir`) são servidas quando o cliente aceita a
+codificação e ficam fora da listagem.
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import shutil
+import threading
+import time
+
+DELIVERABLES_DIR = 'deliverables'
+INDICE_TTL = float(os.environ.get('DELIVERABLES_INDICE_TTL', 5))
+
+# Extensão da variante -> valor de Content-Encoding, em ordem de preferência.
+CODIFICACOES = (('.br', 'br'), ('.gz', 'gzip'))
+# PDF e PNG já são comprimidos; só vale pré-comprimir formatos de texto.
+EXTENSOES_COMPRIMIVEIS = ('.txt', '.csv', '.json', '.svg', '.bpmn', '.xml', '.html', '.md')
+TAMANHO_MINIMO_COMPRESSAO = 1024
+
+_lock = threading.Lock()
+# {diretorio: (mtime_ns do diretório, instante da leitura, {nome: entrada})}
+_indices = {}
+# {caminho: (tamanho, mtime_ns, sha256)}
+_hashes = {}
+
+
+def _sha256(caminho):
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _hash_em_cache(caminho, st):
+    item = _hashes.get(caminho)
+    if item is None or item[:2] != (st.st_size, st.st_mtime_ns):
+        item = _hashes[caminho] = (st.st_size, st.st_mtime_ns, _sha256(caminho))
+    return item[2]
+
+
+def _variante(nome, nomes):
+    return any(nome.endswith(ext) and nome[:-len(ext)] in nomes for ext, _ in CODIFICACOES)
+
+
+def _montar(diretorio):
+    with os.scandir(diretorio) as it:
+        arquivos = [(e.name, e.path, e.stat()) for e in it if e.is_file()]
+    nomes = {nome for nome, _, _ in arquivos}
+    # Esquece hashes de arquivos que saíram do diretório.
+    caminhos = {caminho for _, caminho, _ in arquivos}
+    prefixo = os.path.join(diretorio, '')
+    for caminho in [c for c in _hashes if c.startswith(prefixo) and c not in caminhos]:
+        del _hashes[caminho]
+    entradas = {}
+    for nome, caminho, st in sorted(arquivos):
+        entrada = {
+            'nome': nome,
+            'tamanho': st.st_size,
+            'mtime': st.st_mtime,
+            'hash': _hash_em_cache(caminho, st),
+        }
+        if _variante(nome, nomes):
+            entrada['variante'] = True
+        entradas[nome] = entrada
+    return entradas
+
+
+def indice(diretorio=None):
+    """Dict {nome: entrada} de todos os arquivos (inclui variantes comprimidas)."""
+    diretorio = diretorio or DELIVERABLES_DIR
+    try:
+        mtime = os.stat(diretorio).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    agora = time.monotonic()
+    with _lock:
+        atual = _indices.get(diretorio)
+        if atual is not None and atual[0] == mtime and agora - atual[1] < INDICE_TTL:
+            return atual[2]
+        entradas = _montar(diretorio)
+        _indices[diretorio] = (mtime, agora, entradas)
+        return entradas
+
+
+def invalidar(diretorio=None):
+    """Descarta o índice em cache (ex.: após gravar um arquivo no diretório)."""
+    with _lock:
+        _indices.pop(diretorio or DELIVERABLES_DIR, None)
+
+
+def listar(diretorio=None, pagina=1, por_pagina=100):
+    """(entradas da página, total) sem as variantes comprimidas, em ordem de nome."""
+    visiveis = [e for e in indice(diretorio).values() if not e.get('variante')]
+    inicio = (pagina - 1) * por_pagina
+    return visiveis[inicio:inicio + por_pagina], len(visiveis)
+
+
+def escolher_variante(nome, accept_encoding, diretorio=None):
+    """(nome do arquivo a enviar, Content-Encoding ou None, entrada do índice).
+
+    A entrada é None quando `nome` não existe no índice.
+    """
+    arquivos = indice(diretorio)
+    original = arquivos.get(nome)
+    # Variantes só são servidas no lugar do original, nunca pelo próprio nome.
+    if original is None or original.get('variante'):
+        return nome, None, None
+    aceitas = {p.split(';')[0].strip() for p in (accept_encoding or '').lower().split(',')}
+    for ext, codificacao in CODIFICACOES:
+        entrada = arquivos.get(nome + ext)
+        # Variante mais antiga que o original está desatualizada.
+        if codificacao in aceitas and entrada is not None and entrada['mtime'] >= original['mtime']:
+            return nome + ext, codificacao, entrada
+    return nome, None, original
+
+
+def comprimir(diretorio=None):
+    """Gera `.gz` dos arquivos de texto sem variante atualizada; retorna os nomes gerados."""
+    diretorio = diretorio or DELIVERABLES_DIR
+    gerados = []
+    for entrada in list(indice(diretorio).values()):
+        nome = entrada['nome']
+        origem = os.path.join(diretorio, nome)
+        destino = origem + '.gz'
+        if entrada.get('variante') or not nome.lower().endswith(EXTENSOES_COMPRIMIVEIS):
+            continue
+        if entrada['tamanho'] < TAMANHO_MINIMO_COMPRESSAO:
+            continue
+        if os.path.exists(destino) and os.stat(destino).st_mtime >= entrada['mtime']:
+            continue
+        tmp = f'{destino}.{os.getpid()}.tmp'
+        # mtime=0 deixa o .gz determinístico (mesmo conteúdo -> mesmo ETag).
+        with open(origem, 'rb') as f, open(tmp, 'wb') as bruto, \
+                gzip.GzipFile(filename='', mode='wb', fileobj=bruto, mtime=0) as gz:
+            shutil.copyfileobj(f, gz)
+        os.replace(tmp, destino)
+        gerados.append(nome + '.gz')
+    invalidar(diretorio)
+    return gerados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Arquivos de deliverables/')
+    parser.add_argument('--dir', default=DELIVERABLES_DIR)
+    sub = parser.add_subparsers(dest='comando', required=True)
+    sub.add_parser('comprimir', help='gera variantes .gz dos arquivos de texto')
+    args = parser.parse_args(argv)
+    gerados = comprimir(args.dir)
+    print(f'{len(gerados)} variante(s) gerada(s)')
+
+
+if __name__ == '__main__':
+    main()
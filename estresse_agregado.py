@@ -0,0 +1,173 @@
+"""Agregados materializados de estresse por funcionário e por cargo/dia.
+
+AGREGADO_ESTRESSE_FUNCIONARIO guarda contagem, soma, soma dos quadrados,
+EWMA e os últimos `JANELA_ESTRESSE` scores de cada funcionário;
+AGREGADO_ESTRESSE_CARGO_DIA guarda contagem, soma e soma dos quadrados por
+cargo e dia. Ambas são atualizadas pelo trigger de INSERT em LOG_ESTRESSE
+(ver `migrations.py`), que também grava o EWMA em
+FUNCIONARIOS.nivel_estresse_agregado. Dashboards e relatórios leem
+O(funcionários) linhas em vez de varrer o log.
+
+Os agregados só acompanham INSERTs; após cargas em massa, DELETE/UPDATE
+em LOG_ESTRESSE ou mudança de cargo, reconstrua:
+    python estresse_agregado.py reconstruir
+"""
+
+import argparse
+from contextlib import contextmanager
+import json
+import math
+
+import database
+import migrations
+from migrations import EWMA_ALFA, JANELA_ESTRESSE
+
+DB_PATH = 'ai_sales_copilot.db'
+TRIGGER = 'TRG_LOG_ESTRESSE_AGREGADOS'
+
+
+def _estatisticas(n, soma, soma_quadrados):
+    media = soma / n
+    return media, math.sqrt(max(soma_quadrados / n - media * media, 0.0))
+
+
+def reconstruir_em(conn):
+    """Recalcula os agregados a partir de LOG_ESTRESSE dentro da transação `conn`."""
+    conn.execute('DELETE FROM AGREGADO_ESTRESSE_FUNCIONARIO')
+    conn.execute('DELETE FROM AGREGADO_ESTRESSE_CARGO_DIA')
+    conn.execute(
+        'INSERT INTO AGREGADO_ESTRESSE_CARGO_DIA (cargo, dia, n, soma, soma_quadrados) '
+        'SELECT f.cargo, date(l.data_registro), COUNT(*), SUM(l.score_sentimento), '
+        'SUM(l.score_sentimento * l.score_sentimento) '
+        'FROM LOG_ESTRESSE l JOIN FUNCIONARIOS f ON f.id_funcionario = l.id_funcionario '
+        'WHERE l.score_sentimento IS NOT NULL GROUP BY f.cargo, date(l.data_registro)'
+    )
+    # EWMA e janela dependem da ordem de inserção: percorre o log em stream,
+    # mantendo só o estado do funcionário corrente.
+    linhas = []
+    atual = None
+    cursor = conn.execute(
+        'SELECT id_funcionario, score_sentimento, data_registro FROM LOG_ESTRESSE '
+        'WHERE score_sentimento IS NOT NULL ORDER BY id_funcionario, id_log'
+    )
+    for uid, score, registro in cursor:
+        if atual is None or atual[0] != uid:
+            if atual is not None:
+                linhas.append(atual)
+            atual = [uid, 0, 0.0, 0.0, score, [], None]
+        atual[1] += 1
+        atual[2] += score
+        atual[3] += score * score
+        if atual[1] > 1:
+            atual[4] = EWMA_ALFA * score + (1 - EWMA_ALFA) * atual[4]
+        atual[5] = (atual[5] + [score])[-JANELA_ESTRESSE:]
+        atual[6] = registro
+    if atual is not None:
+        linhas.append(atual)
+    conn.executemany(
+        'INSERT INTO AGREGADO_ESTRESSE_FUNCIONARIO '
+        '(id_funcionario, n, soma, soma_quadrados, ewma, janela, ultimo_registro) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        [(uid, n, s, sq, ewma, json.dumps(janela), reg) for uid, n, s, sq, ewma, janela, reg in linhas],
+    )
+    conn.execute(
+        'UPDATE FUNCIONARIOS SET nivel_estresse_agregado = a.ewma '
+        'FROM AGREGADO_ESTRESSE_FUNCIONARIO a WHERE a.id_funcionario = FUNCIONARIOS.id_funcionario'
+    )
+    return len(linhas)
+
+
+@contextmanager
+def carga_em_massa(conn):
+    """Suspende o trigger de agregados durante uma carga na transação `conn`.
+
+    O trigger é recriado com o mesmo SQL ao final e os agregados são
+    reconstruídos uma vez, o que sai bem mais barato que a atualização
+    linha a linha em cargas grandes.
+    """
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (TRIGGER,)).fetchone()
+    if row:
+        conn.execute(f'DROP TRIGGER {TRIGGER}')
+    yield
+    if row:
+        conn.execute(row[0])
+    reconstruir_em(conn)
+
+
+def reconstruir(db_path=None):
+    """Reconstrói todos os agregados; retorna o número de funcionários com log."""
+    db_path = db_path or DB_PATH
+    migrations.migrar(db_path)
+    with database.transaction(db_path) as conn:
+        return reconstruir_em(conn)
+
+
+def por_funcionario(db_path=None):
+    """Estatísticas por funcionário (lista de dicts), sem ler LOG_ESTRESSE."""
+    db_path = db_path or DB_PATH
+    migrations.migrar(db_path)
+    with database.connection(db_path) as conn:
+        rows = conn.execute(
+            'SELECT f.id_funcionario, f.nome, f.cargo, a.n, a.soma, a.soma_quadrados, a.ewma, a.janela '
+            'FROM AGREGADO_ESTRESSE_FUNCIONARIO a JOIN FUNCIONARIOS f ON f.id_funcionario = a.id_funcionario '
+            'ORDER BY f.id_funcionario'
+        ).fetchall()
+    resultado = []
+    for uid, nome, cargo, n, soma, soma_quadrados, ewma, janela in rows:
+        media, desvio = _estatisticas(n, soma, soma_quadrados)
+        janela = json.loads(janela)
+        resultado.append({
+            'id_funcionario': uid,
+            'nome': nome,
+            'cargo': cargo,
+            'n': n,
+            'media': media,
+            'desvio': desvio,
+            'ewma': ewma,
+            'media_janela': sum(janela) / len(janela),
+        })
+    return resultado
+
+
+def por_cargo(db_path=None, desde=None):
+    """Estatísticas por cargo somando os dias a partir de `desde` (YYYY-MM-DD)."""
+    db_path = db_path or DB_PATH
+    migrations.migrar(db_path)
+    with database.connection(db_path) as conn:
+        rows = conn.execute(
+            'SELECT cargo, SUM(n), SUM(soma), SUM(soma_quadrados) FROM AGREGADO_ESTRESSE_CARGO_DIA '
+            'WHERE dia >= ? GROUP BY cargo ORDER BY cargo',
+            (desde or '',),
+        ).fetchall()
+    resultado = []
+    for cargo, n, soma, soma_quadrados in rows:
+        media, desvio = _estatisticas(n, soma, soma_quadrados)
+        resultado.append({'cargo': cargo, 'n': n, 'media': media, 'desvio': desvio})
+    return resultado
+
+
+def por_cargo_dia(db_path=None, desde=None):
+    """Média diária por cargo: {cargo: [(dia, n, media), ...]} em ordem de dia."""
+    db_path = db_path or DB_PATH
+    migrations.migrar(db_path)
+    with database.connection(db_path) as conn:
+        rows = conn.execute(
+            'SELECT cargo, dia, n, soma FROM AGREGADO_ESTRESSE_CARGO_DIA WHERE dia >= ? ORDER BY cargo, dia',
+            (desde or '',),
+        ).fetchall()
+    resultado = {}
+    for cargo, dia, n, soma in rows:
+        resultado.setdefault(cargo, []).append((dia, n, soma / n))
+    return resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Agregados materializados de estresse')
+    parser.add_argument('--db', default=DB_PATH)
+    sub = parser.add_subparsers(dest='comando', required=True)
+    sub.add_parser('reconstruir', help='recalcula os agregados a partir de LOG_ESTRESSE')
+    args = parser.parse_args(argv)
+    print(f'Agregados reconstruídos para {reconstruir(args.db)} funcionários')
+
+
+if __name__ == '__main__':
+    main()
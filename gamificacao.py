@@ -0,0 +1,194 @@
+"""Motor de gamificação: regras declarativas, ledger de pontos e recálculo.
+
+As regras ficam na tabela REGRAS_PONTUACAO (`codigo`, `condicao`, `pontos`,
+`ativa`). A `condicao` é uma das chaves de `CONDICOES`, avaliadas sobre os
+fatos gravados em cada LOG_ESTRESSE (`pontualidade_ok`,
+`vencidas_no_registro`). Cada regra que dispara gera um lançamento em
+LEDGER_PONTOS, que é somente inserção; o trigger do ledger soma o
+lançamento em FUNCIONARIOS.pontos_gamificacao com um UPDATE atômico, de
+modo que workers concorrentes não perdem incrementos.
+
+Para mudar uma regra, altere REGRAS_PONTUACAO e recalcule:
+    python gamificacao.py regra sem_vencidas --pontos 15
+    python gamificacao.py recalcular
+
+O recálculo reavalia todos os logs com as regras atuais em passagens
+set-based (sem laço em Python), lança um `recalculo` no ledger para cada
+funcionário cujo total mudou e atualiza FUNCIONARIOS.posicao_ranking.
+"""
+
+import argparse
+
+import database
+import migrations
+
+DB_PATH = 'ai_sales_copilot.db'
+
+# condicao -> expressão SQL sobre o log `l`. Só estas expressões entram no
+# SQL; a tabela de regras escolhe entre elas e define os pontos.
+CONDICOES = {
+    'pontual': 'l.pontualidade_ok = 1',
+    'sem_vencidas': 'l.vencidas_no_registro = 0',
+    'sempre': '1',
+}
+# Lançamentos que não vêm de um log e entram no total recalculado.
+LANCAMENTOS_AVULSOS = ('saldo_inicial', 'ajuste_manual')
+
+
+def regras_ativas(conn):
+    """Lista de (codigo, condicao SQL, pontos) das regras ativas."""
+    regras = []
+    for codigo, condicao, pontos in conn.execute(
+        'SELECT codigo, condicao, pontos FROM REGRAS_PONTUACAO WHERE ativa = 1 ORDER BY codigo'
+    ):
+        if condicao not in CONDICOES:
+            raise ValueError(f'Condição desconhecida na regra {codigo!r}: {condicao!r} (use uma de {list(CONDICOES)})')
+        regras.append((codigo, CONDICOES[condicao], pontos))
+    return regras
+
+
+def ultimo_id_log(conn):
+    """Maior id já usado em LOG_ESTRESSE (inserções seguintes recebem ids maiores)."""
+    return conn.execute(
+        "SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'LOG_ESTRESSE'), 0), "
+        'COALESCE((SELECT MAX(id_log) FROM LOG_ESTRESSE), 0))'
+    ).fetchone()[0]
+
+
+def pontuar_logs_em(conn, desde_id_log):
+    """Aplica as regras aos logs com id > `desde_id_log`; retorna {id_log: pontos}.
+
+    Um INSERT ... SELECT por regra no ledger e um UPDATE dos pontos dos logs.
+    """
+    for codigo, condicao, pontos in regras_ativas(conn):
+        conn.execute(
+            'INSERT INTO LEDGER_PONTOS (id_funcionario, id_log, regra, pontos) '
+            f'SELECT l.id_funcionario, l.id_log, ?, ? FROM LOG_ESTRESSE l WHERE l.id_log > ? AND {condicao}',
+            (codigo, pontos, desde_id_log),
+        )
+    pontos = dict(conn.execute(
+        'SELECT id_log, SUM(pontos) FROM LEDGER_PONTOS WHERE id_log > ? GROUP BY id_log', (desde_id_log,)
+    ))
+    conn.executemany('UPDATE LOG_ESTRESSE SET pontos = ? WHERE id_log = ?', [(p, i) for i, p in pontos.items()])
+    return pontos
+
+
+def _expressao_pontos(regras):
+    """(SQL, parâmetros) dos pontos de um log `l` pelas regras dadas."""
+    if not regras:
+        return '0', []
+    partes = ' + '.join(f'CASE WHEN {condicao} THEN ? ELSE 0 END' for _, condicao, _ in regras)
+    return partes, [pontos for _, _, pontos in regras]
+
+
+def atualizar_ranking_em(conn):
+    """Grava a posição (RANK por pontos) de cada funcionário; retorna quantas mudaram."""
+    return conn.execute(
+        'UPDATE FUNCIONARIOS SET posicao_ranking = r.posicao FROM ('
+        '  SELECT id_funcionario, RANK() OVER (ORDER BY COALESCE(pontos_gamificacao, 0) DESC) AS posicao'
+        '  FROM FUNCIONARIOS'
+        ') r WHERE r.id_funcionario = FUNCIONARIOS.id_funcionario '
+        'AND FUNCIONARIOS.posicao_ranking IS NOT r.posicao'
+    ).rowcount
+
+
+def recalcular_em(conn):
+    """Recalcula pontos de logs, totais e ranking dentro da transação `conn`.
+
+    Logs sem fatos gravados (inseridos por fora de `wellbeing_module`)
+    mantêm os pontos que têm. Retorna um resumo com as contagens.
+    """
+    expressao, parametros = _expressao_pontos(regras_ativas(conn))
+    novo = f'CASE WHEN l.pontualidade_ok IS NULL THEN l.pontos ELSE {expressao} END'
+    logs = conn.execute(
+        f'UPDATE LOG_ESTRESSE AS l SET pontos = {novo} WHERE l.pontos IS NOT {novo}', parametros * 2
+    ).rowcount
+    # Total derivado = pontos dos logs + lançamentos avulsos; a diferença
+    # para o saldo atual vira um lançamento `recalculo`.
+    avulsos = ', '.join('?' * len(LANCAMENTOS_AVULSOS))
+    ajustes = conn.execute(
+        'INSERT INTO LEDGER_PONTOS (id_funcionario, regra, pontos) '
+        "SELECT f.id_funcionario, 'recalculo', "
+        '       COALESCE(l.total, 0) + COALESCE(a.total, 0) - COALESCE(f.pontos_gamificacao, 0) '
+        'FROM FUNCIONARIOS f '
+        'LEFT JOIN (SELECT id_funcionario, SUM(pontos) AS total FROM LOG_ESTRESSE GROUP BY id_funcionario) l '
+        '    ON l.id_funcionario = f.id_funcionario '
+        'LEFT JOIN (SELECT id_funcionario, SUM(pontos) AS total FROM LEDGER_PONTOS '
+        f'           WHERE regra IN ({avulsos}) GROUP BY id_funcionario) a '
+        '    ON a.id_funcionario = f.id_funcionario '
+        'WHERE COALESCE(l.total, 0) + COALESCE(a.total, 0) != COALESCE(f.pontos_gamificacao, 0)',
+        LANCAMENTOS_AVULSOS,
+    ).rowcount
+    return {'logs_alterados': logs, 'funcionarios_ajustados': ajustes, 'posicoes_alteradas': atualizar_ranking_em(conn)}
+
+
+def recalcular(db_path=None):
+    """Recalcula tudo com as regras atuais em uma transação."""
+    db_path = db_path or DB_PATH
+    migrations.migrar(db_path)
+    with database.transaction(db_path) as conn:
+        return recalcular_em(conn)
+
+
+def regras(db_path=None):
+    """Todas as regras (ativas ou não), como dicts."""
+    db_path = db_path or DB_PATH
+    migrations.migrar(db_path)
+    with database.connection(db_path) as conn:
+        rows = conn.execute(
+            'SELECT codigo, descricao, condicao, pontos, ativa FROM REGRAS_PONTUACAO ORDER BY codigo'
+        ).fetchall()
+    return [
+        {'codigo': c, 'descricao': d, 'condicao': cond, 'pontos': p, 'ativa': bool(a)}
+        for c, d, cond, p, a in rows
+    ]
+
+
+def definir_regra(codigo, pontos=None, ativa=None, condicao=None, descricao=None, db_path=None):
+    """Cria ou altera uma regra. Não recalcula: chame `recalcular` depois."""
+    if condicao is not None and condicao not in CONDICOES:
+        raise ValueError(f'Condição desconhecida: {condicao!r} (use uma de {list(CONDICOES)})')
+    db_path = db_path or DB_PATH
+    migrations.migrar(db_path)
+    with database.transaction(db_path) as conn:
+        existe = conn.execute('SELECT 1 FROM REGRAS_PONTUACAO WHERE codigo = ?', (codigo,)).fetchone()
+        if existe is None:
+            if condicao is None or pontos is None:
+                raise ValueError(f'Regra nova {codigo!r} exige condicao e pontos')
+            conn.execute(
+                'INSERT INTO REGRAS_PONTUACAO (codigo, descricao, condicao, pontos, ativa) VALUES (?, ?, ?, ?, ?)',
+                (codigo, descricao or codigo, condicao, pontos, 1 if ativa is None else int(ativa)),
+            )
+            return
+        conn.execute(
+            'UPDATE REGRAS_PONTUACAO SET pontos = COALESCE(?, pontos), ativa = COALESCE(?, ativa), '
+            'condicao = COALESCE(?, condicao), descricao = COALESCE(?, descricao) WHERE codigo = ?',
+            (pontos, None if ativa is None else int(ativa), condicao, descricao, codigo),
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Regras e recálculo da gamificação')
+    parser.add_argument('--db', default=DB_PATH)
+    sub = parser.add_subparsers(dest='comando', required=True)
+    sub.add_parser('recalcular', help='reaplica as regras a todos os logs e refaz totais e ranking')
+    sub.add_parser('regras', help='lista as regras')
+    regra = sub.add_parser('regra', help='cria ou altera uma regra')
+    regra.add_argument('codigo')
+    regra.add_argument('--pontos', type=int)
+    regra.add_argument('--condicao', choices=sorted(CONDICOES))
+    regra.add_argument('--descricao')
+    regra.add_argument('--ativa', type=int, choices=(0, 1))
+    args = parser.parse_args(argv)
+    if args.comando == 'recalcular':
+        print(recalcular(args.db))
+    elif args.comando == 'regras':
+        for r in regras(args.db):
+            print(f"{r['codigo']:<16} {r['condicao']:<14} {r['pontos']:>5}  {'ativa' if r['ativa'] else 'inativa'}")
+    else:
+        definir_regra(args.codigo, args.pontos, args.ativa, args.condicao, args.descricao, args.db)
+        print(f'Regra {args.codigo} gravada; rode `recalcular` para aplicá-la aos logs existentes.')
+
+
+if __name__ == '__main__':
+    main()
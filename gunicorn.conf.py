@@ -0,0 +1,56 @@
+"""Configuração do gunicorn (`gunicorn -c gunicorn.conf.py server:app`).
+
+GUNICORN_MODO escolhe como cada worker atende conexões:
+
+- `threads` (padrão): worker `gthread`. Cada worker mantém as conexões
+  ociosas/keep-alive em um event loop (selector) e roda as requisições em
+  um pool de `GUNICORN_THREADS` threads; acesso ao banco acontece nessas
+  threads (SQLite libera o GIL) e o trabalho pesado de CPU sai do worker
+  (bcrypt no pool de `auth.py`, PDFs e relatório na fila de jobs).
+  Com os padrões são 4 x 50 = 200 requisições em andamento.
+- `sync`: modo antigo, uma requisição por worker e sem keep-alive.
+
+Comparação dos dois modos com 200 clientes simultâneos:
+    python benchmarks/load_test.py
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+modo = os.environ.get('GUNICORN_MODO', 'threads')
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+
+if modo == 'sync':
+    worker_class = 'sync'
+elif modo == 'threads':
+    worker_class = 'gthread'
+    threads = int(os.environ.get('GUNICORN_THREADS', 50))
+    worker_connections = int(os.environ.get('GUNICORN_CONEXOES', 1000))
+    keepalive = 5
+    # Uma conexão SQLite ociosa por thread evita abrir/fechar conexões sob carga.
+    os.environ.setdefault('SQLITE_POOL_SIZE', str(threads))
+else:
+    raise ValueError(f"GUNICORN_MODO inválido: {modo!r} (use 'threads' ou 'sync')")
+
+# Workers gravam retratos das métricas aqui e `/metrics` soma todos (ver `metricas.py`).
+os.environ.setdefault('METRICAS_DIR', os.path.join(tempfile.gettempdir(), 'copilot-metricas'))
+
+
+def on_starting(server):
+    # Retratos de uma execução anterior não devem somar nos contadores novos.
+    shutil.rmtree(os.environ['METRICAS_DIR'], ignore_errors=True)
+    # Migração explícita, uma vez no master antes de subir os workers
+    # (importar server.py não escreve no banco). Mesmo caminho de server.DB.
+    sys.path.insert(0, RAIZ)
+    import migrations
+
+    db = os.environ.get('COPILOT_DB') or os.path.join(RAIZ, 'ai_sales_copilot.db')
+    aplicadas = migrations.migrar(db)
+    server.log.info('Schema de %s na versão %s (aplicadas agora: %s)',
+                    db, migrations.VERSAO_ATUAL, aplicadas or 'nenhuma')
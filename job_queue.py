@@ -0,0 +1,272 @@
+"""Fila de jobs persistente (tabela JOBS no SQLite) com pool de workers.
+
+O servidor enfileira um job e devolve o id imediatamente; processos worker
+reivindicam jobs de forma atômica (`UPDATE ... RETURNING` dentro de
+`BEGIN IMMEDIATE`), executam o handler e gravam o resultado. Estados:
+queued -> running -> done | failed.
+
+A fila sobrevive a reinícios: um job `running` cujo lease expirou (worker
+morto) volta para `queued`. A conclusão só é gravada se o worker ainda é o
+dono do job, na mesma transação dos efeitos no banco (ex.: INSERT em
+PROPOSTAS), então um job nunca é registrado duas vezes.
+
+Uso:
+    python job_queue.py --workers 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import traceback
+
+import atividades
+import database
+import migrations
+
+DB_PATH = 'ai_sales_copilot.db'
+
+LEASE_SEGUNDOS = int(os.environ.get('JOB_LEASE_SEGUNDOS', 600))
+POLL_SEGUNDOS = float(os.environ.get('JOB_POLL_SEGUNDOS', 0.5))
+
+STATUS = ('queued', 'running', 'done', 'failed')
+
+HANDLERS = {}
+
+
+def handler(tipo):
+    """Registra a função que executa jobs de `tipo`.
+
+    O handler recebe o payload (dict), o id do job e o banco da fila (`db_path`,
+    de onde também lê os dados) e retorna `(resultado, escrita)`:
+    `resultado` é serializável em JSON e `escrita(conn)`, opcional, grava os
+    efeitos no banco na mesma transação que marca o job como `done`.
+    """
+    def registrar(func):
+        HANDLERS[tipo] = func
+        return func
+
+    return registrar
+
+
+def _worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def enfileirar(tipo, payload, db_path=None):
+    """Cria um job `queued` e retorna seu id."""
+    db_path = db_path or DB_PATH
+    if tipo not in HANDLERS:
+        raise ValueError(f'Tipo de job desconhecido: {tipo}')
+    migrations.migrar(db_path)
+    with database.transaction(db_path) as conn:
+        cur = conn.execute('INSERT INTO JOBS (tipo, payload) VALUES (?, ?)', (tipo, json.dumps(payload)))
+    return cur.lastrowid
+
+
+def status(id_job, db_path=None):
+    """Estado do job como dict, ou None se não existe."""
+    db_path = db_path or DB_PATH
+    migrations.migrar(db_path)
+    with database.connection(db_path) as conn:
+        row = conn.execute(
+            'SELECT id_job, tipo, status, resultado, erro, tentativas, criado_em, iniciado_em, finalizado_em '
+            'FROM JOBS WHERE id_job = ?',
+            (id_job,),
+        ).fetchone()
+    if row is None:
+        return None
+    chaves = ('id', 'tipo', 'status', 'resultado', 'erro', 'tentativas', 'criado_em', 'iniciado_em', 'finalizado_em')
+    job = dict(zip(chaves, row))
+    job['resultado'] = json.loads(job['resultado']) if job['resultado'] else None
+    return job
+
+
+def recuperar_expirados(db_path=None):
+    """Devolve para a fila jobs `running` com lease vencido (worker morto)."""
+    db_path = db_path or DB_PATH
+    migrations.migrar(db_path)
+    with database.transaction(db_path) as conn:
+        cur = conn.execute(
+            "UPDATE JOBS SET status = 'queued', worker = NULL, lease_ate = NULL "
+            "WHERE status = 'running' AND lease_ate < ?",
+            (time.time(),),
+        )
+    return cur.rowcount
+
+
+def _reivindicar(db_path, worker):
+    with database.transaction(db_path) as conn:
+        return conn.execute(
+            "UPDATE JOBS SET status = 'running', worker = ?, lease_ate = ?, tentativas = tentativas + 1, "
+            'iniciado_em = CURRENT_TIMESTAMP '
+            "WHERE id_job = (SELECT id_job FROM JOBS WHERE status = 'queued' ORDER BY id_job LIMIT 1) "
+            'RETURNING id_job, tipo, payload',
+            (worker, time.time() + LEASE_SEGUNDOS),
+        ).fetchone()
+
+
+def _renovar_lease(db_path, id_job, worker, parar):
+    """Heartbeat: estende o lease enquanto o handler roda neste worker."""
+    while not parar.wait(LEASE_SEGUNDOS / 3):
+        try:
+            with database.transaction(db_path) as conn:
+                conn.execute(
+                    "UPDATE JOBS SET lease_ate = ? WHERE id_job = ? AND worker = ? AND status = 'running'",
+                    (time.time() + LEASE_SEGUNDOS, id_job, worker),
+                )
+        except Exception:
+            traceback.print_exc()
+
+
+def processar_proximo(db_path=None):
+    """Executa um job da fila neste processo. Retorna o id ou None se vazia."""
+    db_path = db_path or DB_PATH
+    migrations.migrar(db_path)
+    worker = _worker_id()
+    job = _reivindicar(db_path, worker)
+    if job is None:
+        return None
+    id_job, tipo, payload = job
+    dono = "WHERE id_job = ? AND worker = ? AND status = 'running'"
+    # Jobs longos (campanhas, relatório) passam de LEASE_SEGUNDOS: sem renovar,
+    # `recuperar_expirados` os devolveria à fila e outro worker os refaria.
+    parar = threading.Event()
+    batimento = threading.Thread(
+        target=_renovar_lease, args=(db_path, id_job, worker, parar), name=f'lease-job-{id_job}', daemon=True
+    )
+    batimento.start()
+    try:
+        resultado, escrita = HANDLERS[tipo](json.loads(payload), id_job, db_path)
+        with database.transaction(db_path) as conn:
+            cur = conn.execute(
+                "UPDATE JOBS SET status = 'done', resultado = ?, finalizado_em = CURRENT_TIMESTAMP " + dono,
+                (json.dumps(resultado), id_job, worker),
+            )
+            # Lease perdido: outro worker assumiu o job; não grava os efeitos.
+            if cur.rowcount == 1 and escrita is not None:
+                escrita(conn)
+    except Exception:
+        with database.transaction(db_path) as conn:
+            conn.execute(
+                "UPDATE JOBS SET status = 'failed', erro = ?, finalizado_em = CURRENT_TIMESTAMP " + dono,
+                (traceback.format_exc(), id_job, worker),
+            )
+    finally:
+        parar.set()
+        batimento.join()
+    return id_job
+
+
+def _loop_worker(db_path):
+    while True:
+        try:
+            if processar_proximo(db_path) is None:
+                time.sleep(POLL_SEGUNDOS)
+        except Exception:
+            traceback.print_exc()
+            time.sleep(POLL_SEGUNDOS)
+
+
+def iniciar_workers(n, db_path=None):
+    """Sobe `n` processos worker e retorna a lista de `multiprocessing.Process`.
+
+    Os workers não são daemon: `relatorio_gerencial` (gráficos em
+    `charts.renderizar`) e `campanha_propostas` abrem um pool de processos
+    próprio, e processos daemon não podem ter filhos. Quem chama deve
+    encerrá-los com `terminate()`.
+    """
+    db_path = db_path or DB_PATH
+    recuperar_expirados(db_path)
+    processos = []
+    for i in range(n):
+        p = multiprocessing.Process(target=_loop_worker, args=(db_path,), name=f'job-worker-{i}')
+        p.start()
+        processos.append(p)
+    return processos
+
+
+@handler('proposta_comercial')
+def _job_proposta_comercial(payload, id_job, db_path):
+    import automation_module
+
+    id_cliente = payload['id_cliente']
+    valor = payload['valor']
+    caminho = automation_module.renderizar_proposta_comercial(id_cliente, valor, payload['id_responsavel'], db_path)
+    if caminho is None:
+        raise ValueError(f'Cliente {id_cliente} não encontrado')
+
+    def escrita(conn):
+        automation_module.registrar_proposta(conn, id_cliente, 'Comercial', valor, caminho)
+
+    return {'caminho_arquivo': caminho}, escrita
+
+
+@handler('relatorio_gerencial')
+def _job_relatorio_gerencial(payload, id_job, db_path):
+    import report_py
+
+    gerados = report_py.gerar_relatorio_gerencial(payload.get('destino'), db_path)
+    return {'arquivos': {os.path.basename(arquivo): origem for arquivo, origem in gerados.items()}}, None
+
+
+@handler('recalcular_gamificacao')
+def _job_recalcular_gamificacao(payload, id_job, db_path):
+    import gamificacao
+
+    # Idempotente: se o lease expirar e outro worker repetir, o resultado é o mesmo.
+    return gamificacao.recalcular(db_path), None
+
+
+@handler('campanha_propostas')
+def _job_campanha_propostas(payload, id_job, db_path):
+    import automation_module
+    import campanha
+
+    itens, linhas, falhas = campanha.itens_do_payload(payload, db_path)
+    relatorio, caminhos = campanha.renderizar(itens, linhas, falhas, payload.get('processos'), db_path)
+
+    def escrita(conn):
+        # Todas as linhas de PROPOSTAS da campanha entram junto com o `done`.
+        automation_module.registrar_propostas_em_lote(conn, itens, caminhos)
+
+    return relatorio, escrita
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Workers da fila de jobs')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('JOB_WORKERS', 2)))
+    parser.add_argument('--db', default=DB_PATH)
+    args = parser.parse_args(argv)
+    processos = iniciar_workers(args.workers, args.db)
+    print(f'{len(processos)} workers ativos (db={args.db})')
+    # Tarefas periódicas do processo principal: (intervalo, função, próxima execução).
+    periodicas = [
+        [LEASE_SEGUNDOS / 2, recuperar_expirados, time.monotonic() + LEASE_SEGUNDOS / 2],
+        [atividades.VARREDURA_SEGUNDOS, atividades.varrer, time.monotonic()],
+    ]
+    try:
+        while True:
+            time.sleep(max(0.0, min(p[2] for p in periodicas) - time.monotonic()))
+            for periodica in periodicas:
+                intervalo, funcao, proxima = periodica
+                if time.monotonic() >= proxima:
+                    try:
+                        funcao(args.db)
+                    except Exception:
+                        traceback.print_exc()
+                    periodica[2] = time.monotonic() + intervalo
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for p in processos:
+            p.terminate()
+        for p in processos:
+            p.join()
+
+
+if __name__ == '__main__':
+    main()
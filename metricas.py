@@ -0,0 +1,282 @@
+"""Instrumentação: contadores, gauges e histogramas no formato Prometheus.
+
+Cada métrica é identificada pelo nome e por rótulos (`rota`, `metodo`...):
+
+    metricas.incrementar('http_erros_total', rota='/api/login')
+    metricas.observar('pdf_render_segundos', 0.012)
+    with metricas.cronometro('bcrypt_verificacao_segundos'):
+        ...
+
+Os valores são por processo. Com vários processos (workers do gunicorn e
+da fila de jobs), defina `METRICAS_DIR`: uma thread de fundo em cada
+processo grava um retrato das suas métricas em `METRICAS_DIR/<pid>.json`
+a cada `METRICAS_INTERVALO` segundos (se algo mudou) e `prometheus()`
+soma os retratos de todos.
+Gauges de processos que já terminaram são descartados; contadores e
+histogramas continuam somados, como o Prometheus espera.
+"""
+
+from contextlib import contextmanager
+import glob
+import json
+import os
+import threading
+import time
+
+# Limites (em segundos) dos buckets dos histogramas de latência.
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICAS_DIR = os.environ.get('METRICAS_DIR')
+METRICAS_INTERVALO = float(os.environ.get('METRICAS_INTERVALO', 1))
+
+AJUDA = {
+    'http_requisicoes_segundos': 'Latência das requisições HTTP por rota',
+    'http_requisicoes_em_andamento': 'Requisições HTTP em andamento',
+    'http_erros_total': 'Respostas HTTP 5xx por rota',
+    'sqlite_consultas_total': 'Statements SQLite executados',
+    'sqlite_consulta_segundos': 'Tempo de execução de cada statement SQLite',
+    'sqlite_consultas_por_rota_total': 'Statements SQLite executados pelas requisições de cada rota',
+    'sqlite_segundos_por_rota_total': 'Tempo em SQLite das requisições de cada rota',
+    'pdf_render_segundos': 'Tempo de renderização de PDFs de proposta',
+    'bcrypt_verificacao_segundos': 'Tempo de verificação de senha (bcrypt)',
+}
+
+_lock = threading.Lock()
+# {(nome, rotulos): valor}; rotulos é uma tupla ordenada de pares.
+_contadores = {}
+_gauges = {}
+# {(nome, rotulos): [contagens por bucket..., +Inf, soma, maximo]}
+_histogramas = {}
+_lock_gravacao = threading.Lock()
+_sujo = False
+_pid_gravador = None
+
+
+def _chave(nome, rotulos):
+    return nome, tuple(sorted((k, str(v)) for k, v in rotulos.items()))
+
+
+def incrementar(nome, valor=1, **rotulos):
+    with _lock:
+        chave = _chave(nome, rotulos)
+        _contadores[chave] = _contadores.get(chave, 0) + valor
+    _marcar_alteracao()
+
+
+def ajustar(nome, delta, **rotulos):
+    """Soma `delta` a um gauge (ex.: +1 ao iniciar e -1 ao terminar)."""
+    with _lock:
+        chave = _chave(nome, rotulos)
+        _gauges[chave] = _gauges.get(chave, 0) + delta
+    _marcar_alteracao()
+
+
+def observar(nome, segundos, **rotulos):
+    """Registra uma duração no histograma `nome`."""
+    with _lock:
+        chave = _chave(nome, rotulos)
+        item = _histogramas.get(chave)
+        if item is None:
+            item = _histogramas[chave] = [0] * (len(BUCKETS) + 1) + [0.0, 0.0]
+        for i, limite in enumerate(BUCKETS):
+            if segundos <= limite:
+                item[i] += 1
+                break
+        else:
+            item[len(BUCKETS)] += 1
+        item[-2] += segundos
+        item[-1] = max(item[-1], segundos)
+    _marcar_alteracao()
+
+
+@contextmanager
+def cronometro(nome, **rotulos):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        observar(nome, time.perf_counter() - inicio, **rotulos)
+
+
+def _retrato():
+    with _lock:
+        return {
+            'contadores': [[n, list(r), v] for (n, r), v in _contadores.items()],
+            'gauges': [[n, list(r), v] for (n, r), v in _gauges.items()],
+            'histogramas': [[n, list(r), list(v)] for (n, r), v in _histogramas.items()],
+        }
+
+
+def _gravar():
+    os.makedirs(METRICAS_DIR, exist_ok=True)
+    destino = os.path.join(METRICAS_DIR, f'{os.getpid()}.json')
+    tmp = f'{destino}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(_retrato(), f)
+    os.replace(tmp, destino)
+
+
+def _loop_gravacao():
+    global _sujo
+    while True:
+        time.sleep(METRICAS_INTERVALO)
+        if _sujo and METRICAS_DIR:
+            _sujo = False
+            try:
+                _gravar()
+            except OSError:
+                _sujo = True
+
+
+def _marcar_alteracao():
+    """Agenda a gravação do retrato por uma thread de fundo (uma por processo)."""
+    global _sujo, _pid_gravador
+    if not METRICAS_DIR:
+        return
+    _sujo = True
+    if _pid_gravador != os.getpid():
+        with _lock_gravacao:
+            # Threads não sobrevivem a fork: cada worker inicia a sua.
+            if _pid_gravador != os.getpid():
+                threading.Thread(target=_loop_gravacao, name='metricas', daemon=True).start()
+                _pid_gravador = os.getpid()
+
+
+def _vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _retratos():
+    """Retrato deste processo (ao vivo) somado aos dos demais em METRICAS_DIR."""
+    retratos = [_retrato()]
+    if METRICAS_DIR:
+        for caminho in glob.glob(os.path.join(METRICAS_DIR, '*.json')):
+            pid = int(os.path.basename(caminho).split('.')[0])
+            if pid == os.getpid():
+                continue
+            try:
+                with open(caminho, encoding='utf-8') as f:
+                    retrato = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if not _vivo(pid):
+                retrato['gauges'] = []
+            retratos.append(retrato)
+    return retratos
+
+
+def _somar(retratos):
+    contadores, gauges, histogramas = {}, {}, {}
+    for retrato in retratos:
+        for destino, tipo in ((contadores, 'contadores'), (gauges, 'gauges')):
+            for nome, rotulos, valor in retrato[tipo]:
+                chave = (nome, tuple(map(tuple, rotulos)))
+                destino[chave] = destino.get(chave, 0) + valor
+        for nome, rotulos, valores in retrato['histogramas']:
+            chave = (nome, tuple(map(tuple, rotulos)))
+            atual = histogramas.get(chave)
+            if atual is None:
+                histogramas[chave] = list(valores)
+            else:
+                atual[:-1] = [a + b for a, b in zip(atual[:-1], valores[:-1])]
+                atual[-1] = max(atual[-1], valores[-1])
+    return contadores, gauges, histogramas
+
+
+def _rotulos(rotulos, extra=()):
+    pares = list(rotulos) + list(extra)
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in pares) + '}'
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus():
+    """Texto no formato de exposição do Prometheus (versão 0.0.4)."""
+    contadores, gauges, histogramas = _somar(_retratos())
+    linhas = []
+    vistos = set()
+
+    def cabecalho(nome, tipo):
+        if nome not in vistos:
+            vistos.add(nome)
+            if nome in AJUDA:
+                linhas.append(f'# HELP {nome} {AJUDA[nome]}')
+            linhas.append(f'# TYPE {nome} {tipo}')
+
+    for (nome, rotulos), valor in sorted(contadores.items()):
+        cabecalho(nome, 'counter')
+        linhas.append(f'{nome}{_rotulos(rotulos)} {valor}')
+    for (nome, rotulos), valor in sorted(gauges.items()):
+        cabecalho(nome, 'gauge')
+        linhas.append(f'{nome}{_rotulos(rotulos)} {valor}')
+    for (nome, rotulos), valores in sorted(histogramas.items()):
+        cabecalho(nome, 'histogram')
+        acumulado = 0
+        for limite, contagem in zip(list(BUCKETS) + ['+Inf'], valores[:len(BUCKETS) + 1]):
+            acumulado += contagem
+            linhas.append(f'{nome}_bucket{_rotulos(rotulos, [("le", limite)])} {acumulado}')
+        linhas.append(f'{nome}_sum{_rotulos(rotulos)} {valores[-2]}')
+        linhas.append(f'{nome}_count{_rotulos(rotulos)} {acumulado}')
+    return '\n'.join(linhas) + '\n'
+
+
+_requisicao = threading.local()
+
+
+def iniciar_requisicao():
+    """Zera o acumulador de consultas SQLite da thread atual."""
+    _requisicao.consultas = 0
+    _requisicao.segundos = 0.0
+
+
+def finalizar_requisicao():
+    """(consultas, segundos em SQLite) desde `iniciar_requisicao` nesta thread."""
+    consultas = getattr(_requisicao, 'consultas', 0)
+    segundos = getattr(_requisicao, 'segundos', 0.0)
+    _requisicao.consultas, _requisicao.segundos = 0, 0.0
+    return consultas, segundos
+
+
+def consulta_sqlite(segundos):
+    """Callback de `database.observar_consultas`: uma execução de statement."""
+    incrementar('sqlite_consultas_total')
+    observar('sqlite_consulta_segundos', segundos)
+    if hasattr(_requisicao, 'consultas'):
+        _requisicao.consultas += 1
+        _requisicao.segundos += segundos
+
+
+def tempos():
+    """{'METODO rota': {'n', 'media_ms', 'max_ms'}} das requisições deste processo."""
+    with _lock:
+        resumo = {}
+        for (nome, rotulos), valores in _histogramas.items():
+            if nome != 'http_requisicoes_segundos':
+                continue
+            r = dict(rotulos)
+            chave = f"{r['metodo']} {r['rota']}"
+            n = sum(valores[:len(BUCKETS) + 1])
+            atual = resumo.setdefault(chave, {'n': 0, 'soma': 0.0, 'max_ms': 0.0})
+            atual['n'] += n
+            atual['soma'] += valores[-2]
+            atual['max_ms'] = max(atual['max_ms'], valores[-1] * 1000)
+    return {
+        chave: {'n': r['n'], 'media_ms': r['soma'] / r['n'] * 1000, 'max_ms': r['max_ms']}
+        for chave, r in resumo.items() if r['n']
+    }
+
+
+def limpar():
+    with _lock:
+        _contadores.clear()
+        _gauges.clear()
+        _histogramas.clear()
@@ -0,0 +1,469 @@
+"""Migrações versionadas do schema do banco (dono único do DDL).
+
+Cada migração é `(versao, nome, passos)`, onde um passo é uma string SQL ou
+uma função `passo(conn)`. A versão aplicada fica em `PRAGMA user_version`
+(checagem barata na inicialização) e o histórico em SCHEMA_MIGRACOES.
+As migrações pendentes rodam em uma única transação `BEGIN IMMEDIATE`, então
+processos concorrentes não aplicam a mesma versão duas vezes. Depois da
+primeira verificação, `migrar` não toca mais no banco naquele processo.
+
+Para alterar o schema, acrescente uma nova entrada em `MIGRACOES`; nunca
+edite uma migração já publicada.
+
+Uso:
+    python migrations.py [--db ai_sales_copilot.db]
+"""
+
+import argparse
+import os
+import threading
+
+import database
+
+DB_PATH = 'ai_sales_copilot.db'
+
+
+# Parâmetros dos agregados de estresse (migração 5). Mudá-los exige uma nova
+# migração que recrie o trigger e chame estresse_agregado.reconstruir_em.
+EWMA_ALFA = 0.3
+JANELA_ESTRESSE = 10
+
+
+def _colunas(conn, tabela):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({tabela})')}
+
+
+def _colunas_legadas(conn):
+    # Bancos criados por wellbeing_copilot.setup_database não tinham estas colunas.
+    faltantes = [
+        ('FUNCIONARIOS', 'tempo_operacional_manual', 'REAL DEFAULT 180'),
+        ('FUNCIONARIOS', 'tempo_reduzido_copilot', 'REAL DEFAULT 0'),
+        ('LOG_ESTRESSE', 'pontos', 'INTEGER DEFAULT 0'),
+    ]
+    for tabela, coluna, definicao in faltantes:
+        if coluna not in _colunas(conn, tabela):
+            conn.execute(f'ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}')
+
+
+def _backfill_ranking(conn):
+    import gamificacao
+
+    gamificacao.atualizar_ranking_em(conn)
+
+
+def _backfill_agregados(conn):
+    import estresse_agregado
+
+    estresse_agregado.reconstruir_em(conn)
+
+
+MIGRACOES = [
+    (1, 'schema_base', [
+        """
+        CREATE TABLE IF NOT EXISTS FUNCIONARIOS (
+            id_funcionario INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            cargo TEXT NOT NULL,
+            senha_hash TEXT,
+            pontos_gamificacao INTEGER DEFAULT 0,
+            tempo_operacional_manual REAL DEFAULT 180,
+            tempo_reduzido_copilot REAL DEFAULT 0,
+            nivel_estresse_agregado REAL DEFAULT 0.0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS CLIENTES (
+            id_cliente INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome_empresa TEXT NOT NULL,
+            cnpj TEXT UNIQUE,
+            decisor_nome TEXT,
+            decisor_email TEXT,
+            data_cadastro DATE,
+            responsavel_vendas INTEGER
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS PROPOSTAS (
+            id_proposta INTEGER PRIMARY KEY AUTOINCREMENT,
+            id_cliente INTEGER,
+            tipo TEXT,
+            valor_total REAL,
+            data_criacao DATETIME DEFAULT CURRENT_TIMESTAMP,
+            caminho_arquivo TEXT,
+            FOREIGN KEY(id_cliente) REFERENCES CLIENTES(id_cliente)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS ATIVIDADES (
+            id_atividade INTEGER PRIMARY KEY AUTOINCREMENT,
+            id_funcionario INTEGER,
+            descricao TEXT,
+            data_vencimento DATE,
+            status TEXT DEFAULT 'PENDENTE',
+            FOREIGN KEY(id_funcionario) REFERENCES FUNCIONARIOS(id_funcionario)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS LOG_ESTRESSE (
+            id_log INTEGER PRIMARY KEY AUTOINCREMENT,
+            id_funcionario INTEGER,
+            data_registro DATETIME DEFAULT CURRENT_TIMESTAMP,
+            descricao_problema TEXT,
+            score_sentimento REAL,
+            sugestao_ia TEXT,
+            pontos INTEGER DEFAULT 0,
+            FOREIGN KEY(id_funcionario) REFERENCES FUNCIONARIOS(id_funcionario)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS DATASET_TREINAMENTO (
+            id_dado INTEGER PRIMARY KEY AUTOINCREMENT,
+            texto_problema TEXT NOT NULL,
+            label_estresse INTEGER NOT NULL
+        )
+        """,
+        _colunas_legadas,
+    ]),
+    (2, 'indices_consultas_frequentes', [
+        # Login: busca por nome já devolvendo cargo e hash sem ir à tabela.
+        'CREATE INDEX IF NOT EXISTS IDX_FUNCIONARIOS_NOME ON FUNCIONARIOS (nome, cargo, senha_hash)',
+        # Contagem de atividades VENCIDA por funcionário (gamificação).
+        'CREATE INDEX IF NOT EXISTS IDX_ATIVIDADES_FUNC_STATUS ON ATIVIDADES (id_funcionario, status)',
+        'CREATE INDEX IF NOT EXISTS IDX_LOG_ESTRESSE_FUNC_DATA ON LOG_ESTRESSE (id_funcionario, data_registro)',
+        'CREATE INDEX IF NOT EXISTS IDX_PROPOSTAS_CLIENTE ON PROPOSTAS (id_cliente)',
+    ]),
+    (3, 'fila_de_jobs', [
+        """
+        CREATE TABLE IF NOT EXISTS JOBS (
+            id_job INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            resultado TEXT,
+            erro TEXT,
+            tentativas INTEGER NOT NULL DEFAULT 0,
+            worker TEXT,
+            lease_ate REAL,
+            criado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+            iniciado_em DATETIME,
+            finalizado_em DATETIME
+        )
+        """,
+        'CREATE INDEX IF NOT EXISTS IDX_JOBS_STATUS ON JOBS (status, id_job)',
+    ]),
+    (4, 'store_de_artefatos', [
+        """
+        CREATE TABLE IF NOT EXISTS ARTEFATOS (
+            hash TEXT PRIMARY KEY,
+            caminho TEXT NOT NULL UNIQUE,
+            tamanho INTEGER NOT NULL,
+            refcount INTEGER NOT NULL DEFAULT 0,
+            criado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+            ultimo_acesso DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS ARTEFATOS_ENTRADAS (
+            chave TEXT PRIMARY KEY,
+            hash TEXT NOT NULL REFERENCES ARTEFATOS(hash),
+            tipo TEXT NOT NULL
+        )
+        """,
+        'CREATE INDEX IF NOT EXISTS IDX_ARTEFATOS_ENTRADAS_HASH ON ARTEFATOS_ENTRADAS (hash)',
+        'CREATE INDEX IF NOT EXISTS IDX_PROPOSTAS_CAMINHO ON PROPOSTAS (caminho_arquivo)',
+        """
+        CREATE TRIGGER IF NOT EXISTS TRG_PROPOSTAS_ARTEFATO_INS AFTER INSERT ON PROPOSTAS
+        BEGIN
+            UPDATE ARTEFATOS SET refcount = refcount + 1 WHERE caminho = NEW.caminho_arquivo;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS TRG_PROPOSTAS_ARTEFATO_DEL AFTER DELETE ON PROPOSTAS
+        BEGIN
+            UPDATE ARTEFATOS SET refcount = refcount - 1 WHERE caminho = OLD.caminho_arquivo;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS TRG_PROPOSTAS_ARTEFATO_UPD AFTER UPDATE OF caminho_arquivo ON PROPOSTAS
+        BEGIN
+            UPDATE ARTEFATOS SET refcount = refcount - 1 WHERE caminho = OLD.caminho_arquivo;
+            UPDATE ARTEFATOS SET refcount = refcount + 1 WHERE caminho = NEW.caminho_arquivo;
+        END
+        """,
+    ]),
+    (5, 'agregados_estresse', [
+        """
+        CREATE TABLE IF NOT EXISTS AGREGADO_ESTRESSE_FUNCIONARIO (
+            id_funcionario INTEGER PRIMARY KEY,
+            n INTEGER NOT NULL,
+            soma REAL NOT NULL,
+            soma_quadrados REAL NOT NULL,
+            ewma REAL NOT NULL,
+            janela TEXT NOT NULL,
+            ultimo_registro DATETIME
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS AGREGADO_ESTRESSE_CARGO_DIA (
+            cargo TEXT NOT NULL,
+            dia DATE NOT NULL,
+            n INTEGER NOT NULL,
+            soma REAL NOT NULL,
+            soma_quadrados REAL NOT NULL,
+            PRIMARY KEY (cargo, dia)
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS TRG_LOG_ESTRESSE_AGREGADOS AFTER INSERT ON LOG_ESTRESSE
+        WHEN NEW.score_sentimento IS NOT NULL
+        BEGIN
+            INSERT INTO AGREGADO_ESTRESSE_FUNCIONARIO
+                (id_funcionario, n, soma, soma_quadrados, ewma, janela, ultimo_registro)
+            VALUES (
+                NEW.id_funcionario, 1, NEW.score_sentimento, NEW.score_sentimento * NEW.score_sentimento,
+                NEW.score_sentimento, json_array(NEW.score_sentimento), NEW.data_registro
+            )
+            ON CONFLICT(id_funcionario) DO UPDATE SET
+                n = n + 1,
+                soma = soma + excluded.soma,
+                soma_quadrados = soma_quadrados + excluded.soma_quadrados,
+                ewma = {EWMA_ALFA} * excluded.ewma + (1 - {EWMA_ALFA}) * ewma,
+                janela = json_insert(
+                    CASE WHEN json_array_length(janela) >= {JANELA_ESTRESSE}
+                         THEN json_remove(janela, '$[0]') ELSE janela END,
+                    '$[#]', excluded.ewma
+                ),
+                ultimo_registro = excluded.ultimo_registro;
+            INSERT INTO AGREGADO_ESTRESSE_CARGO_DIA (cargo, dia, n, soma, soma_quadrados)
+            SELECT cargo, date(NEW.data_registro), 1, NEW.score_sentimento,
+                   NEW.score_sentimento * NEW.score_sentimento
+            FROM FUNCIONARIOS WHERE id_funcionario = NEW.id_funcionario
+            ON CONFLICT(cargo, dia) DO UPDATE SET
+                n = n + 1,
+                soma = soma + excluded.soma,
+                soma_quadrados = soma_quadrados + excluded.soma_quadrados;
+            UPDATE FUNCIONARIOS SET nivel_estresse_agregado = (
+                SELECT ewma FROM AGREGADO_ESTRESSE_FUNCIONARIO WHERE id_funcionario = NEW.id_funcionario
+            ) WHERE id_funcionario = NEW.id_funcionario;
+        END
+        """,
+        _backfill_agregados,
+    ]),
+    (6, 'marca_dagua_relatorios', [
+        """
+        CREATE TABLE IF NOT EXISTS RELATORIO_WATERMARK (
+            relatorio TEXT PRIMARY KEY,
+            ultimo_id_log INTEGER NOT NULL,
+            atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    (7, 'tokens_revogados', [
+        # `id` crescente permite que cada processo busque só as revogações novas.
+        """
+        CREATE TABLE IF NOT EXISTS TOKENS_REVOGADOS (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            digest TEXT NOT NULL UNIQUE,
+            expira_em REAL NOT NULL
+        )
+        """,
+    ]),
+    (8, 'gamificacao', [
+        # Fatos do registro que as regras avaliam; o recálculo usa estes
+        # valores, e não o estado atual de ATIVIDADES.
+        'ALTER TABLE LOG_ESTRESSE ADD COLUMN pontualidade_ok INTEGER',
+        'ALTER TABLE LOG_ESTRESSE ADD COLUMN vencidas_no_registro INTEGER',
+        # Logs antigos só guardam os pontos (0, 5, 10 ou 15 pelas regras
+        # fixas); os fatos são deduzidos deles (1 = "havia vencidas").
+        'UPDATE LOG_ESTRESSE SET pontualidade_ok = pontos IN (5, 15), '
+        'vencidas_no_registro = CASE WHEN pontos >= 10 THEN 0 ELSE 1 END '
+        'WHERE pontos IN (0, 5, 10, 15)',
+        'ALTER TABLE FUNCIONARIOS ADD COLUMN posicao_ranking INTEGER',
+        """
+        CREATE TABLE IF NOT EXISTS REGRAS_PONTUACAO (
+            codigo TEXT PRIMARY KEY,
+            descricao TEXT NOT NULL,
+            condicao TEXT NOT NULL,
+            pontos INTEGER NOT NULL,
+            ativa INTEGER NOT NULL DEFAULT 1
+        )
+        """,
+        """
+        INSERT OR IGNORE INTO REGRAS_PONTUACAO (codigo, descricao, condicao, pontos) VALUES
+            ('pontualidade', 'Registro de bem-estar feito no prazo', 'pontual', 5),
+            ('sem_vencidas', 'Nenhuma atividade VENCIDA no momento do registro', 'sem_vencidas', 10)
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS LEDGER_PONTOS (
+            id_lancamento INTEGER PRIMARY KEY AUTOINCREMENT,
+            id_funcionario INTEGER NOT NULL REFERENCES FUNCIONARIOS(id_funcionario),
+            id_log INTEGER REFERENCES LOG_ESTRESSE(id_log),
+            regra TEXT NOT NULL,
+            pontos INTEGER NOT NULL,
+            criado_em DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        'CREATE INDEX IF NOT EXISTS IDX_LEDGER_PONTOS_LOG ON LEDGER_PONTOS (id_log)',
+        'CREATE INDEX IF NOT EXISTS IDX_LEDGER_PONTOS_FUNC ON LEDGER_PONTOS (id_funcionario, regra)',
+        # Saldo de abertura: pontos vindos dos logs e o restante (ajustes
+        # manuais, dados de demonstração), para que SUM(LEDGER) = saldo.
+        """
+        INSERT INTO LEDGER_PONTOS (id_funcionario, regra, pontos)
+        SELECT id_funcionario, 'historico_logs', total FROM (
+            SELECT id_funcionario, SUM(pontos) AS total FROM LOG_ESTRESSE GROUP BY id_funcionario
+        ) WHERE total != 0 AND id_funcionario IN (SELECT id_funcionario FROM FUNCIONARIOS)
+        """,
+        """
+        INSERT INTO LEDGER_PONTOS (id_funcionario, regra, pontos)
+        SELECT f.id_funcionario, 'saldo_inicial',
+               COALESCE(f.pontos_gamificacao, 0) - COALESCE(SUM(l.pontos), 0)
+        FROM FUNCIONARIOS f LEFT JOIN LOG_ESTRESSE l ON l.id_funcionario = f.id_funcionario
+        GROUP BY f.id_funcionario
+        HAVING COALESCE(f.pontos_gamificacao, 0) - COALESCE(SUM(l.pontos), 0) != 0
+        """,
+        # Criados depois do saldo de abertura, que já está em pontos_gamificacao.
+        """
+        CREATE TRIGGER IF NOT EXISTS TRG_LEDGER_PONTOS_SALDO AFTER INSERT ON LEDGER_PONTOS
+        BEGIN
+            UPDATE FUNCIONARIOS SET pontos_gamificacao = COALESCE(pontos_gamificacao, 0) + NEW.pontos
+            WHERE id_funcionario = NEW.id_funcionario;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS TRG_LEDGER_PONTOS_SOMENTE_INSERCAO BEFORE UPDATE ON LEDGER_PONTOS
+        BEGIN
+            SELECT RAISE(ABORT, 'LEDGER_PONTOS aceita apenas inserções');
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS TRG_LEDGER_PONTOS_SEM_EXCLUSAO BEFORE DELETE ON LEDGER_PONTOS
+        BEGIN
+            SELECT RAISE(ABORT, 'LEDGER_PONTOS aceita apenas inserções');
+        END
+        """,
+        'CREATE INDEX IF NOT EXISTS IDX_FUNCIONARIOS_PONTOS ON FUNCIONARIOS (pontos_gamificacao DESC)',
+        _backfill_ranking,
+    ]),
+    (9, 'versao_funcionarios', [
+        # Contador de mudanças no cadastro, lido pelo cache de `painel.py`.
+        # Pontos ficam de fora: mudam a cada log e são acompanhados por
+        # MAX(id_lancamento) de LEDGER_PONTOS.
+        """
+        CREATE TABLE IF NOT EXISTS VERSOES_DADOS (
+            nome TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "INSERT OR IGNORE INTO VERSOES_DADOS (nome, versao) VALUES ('funcionarios', 0)",
+        """
+        CREATE TRIGGER IF NOT EXISTS TRG_FUNCIONARIOS_VERSAO_INS AFTER INSERT ON FUNCIONARIOS
+        BEGIN
+            UPDATE VERSOES_DADOS SET versao = versao + 1 WHERE nome = 'funcionarios';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS TRG_FUNCIONARIOS_VERSAO_DEL AFTER DELETE ON FUNCIONARIOS
+        BEGIN
+            UPDATE VERSOES_DADOS SET versao = versao + 1 WHERE nome = 'funcionarios';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS TRG_FUNCIONARIOS_VERSAO_UPD
+        AFTER UPDATE OF nome, cargo, tempo_operacional_manual, tempo_reduzido_copilot ON FUNCIONARIOS
+        BEGIN
+            UPDATE VERSOES_DADOS SET versao = versao + 1 WHERE nome = 'funcionarios';
+        END
+        """,
+    ]),
+    (10, 'contador_atividades_vencidas', [
+        # Varredura de atrasadas (atividades.py): faixa de data_vencimento
+        # dentro de status = 'PENDENTE'.
+        'CREATE INDEX IF NOT EXISTS IDX_ATIVIDADES_STATUS_VENCIMENTO ON ATIVIDADES (status, data_vencimento)',
+        # Lido pela pontuação em O(1); mantido pelos triggers abaixo.
+        'ALTER TABLE FUNCIONARIOS ADD COLUMN atividades_vencidas INTEGER NOT NULL DEFAULT 0',
+        """
+        UPDATE FUNCIONARIOS SET atividades_vencidas = v.n FROM (
+            SELECT id_funcionario, COUNT(*) AS n FROM ATIVIDADES WHERE status = 'VENCIDA' GROUP BY id_funcionario
+        ) v WHERE v.id_funcionario = FUNCIONARIOS.id_funcionario
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS TRG_ATIVIDADES_VENCIDAS_INS AFTER INSERT ON ATIVIDADES
+        WHEN NEW.status = 'VENCIDA'
+        BEGIN
+            UPDATE FUNCIONARIOS SET atividades_vencidas = atividades_vencidas + 1
+            WHERE id_funcionario = NEW.id_funcionario;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS TRG_ATIVIDADES_VENCIDAS_DEL AFTER DELETE ON ATIVIDADES
+        WHEN OLD.status = 'VENCIDA'
+        BEGIN
+            UPDATE FUNCIONARIOS SET atividades_vencidas = atividades_vencidas - 1
+            WHERE id_funcionario = OLD.id_funcionario;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS TRG_ATIVIDADES_VENCIDAS_UPD AFTER UPDATE OF status, id_funcionario ON ATIVIDADES
+        WHEN OLD.status IS NOT NEW.status OR OLD.id_funcionario IS NOT NEW.id_funcionario
+        BEGIN
+            UPDATE FUNCIONARIOS SET atividades_vencidas = atividades_vencidas - 1
+            WHERE OLD.status = 'VENCIDA' AND id_funcionario = OLD.id_funcionario;
+            UPDATE FUNCIONARIOS SET atividades_vencidas = atividades_vencidas + 1
+            WHERE NEW.status = 'VENCIDA' AND id_funcionario = NEW.id_funcionario;
+        END
+        """,
+    ]),
+]
+
+VERSAO_ATUAL = MIGRACOES[-1][0]
+
+_lock = threading.Lock()
+_migrados = set()
+
+
+def versao(db_path=None):
+    """Versão do schema gravada no banco (0 para banco novo)."""
+    with database.connection(db_path or DB_PATH) as conn:
+        return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrar(db_path=None):
+    """Aplica as migrações pendentes; retorna a lista de versões aplicadas."""
+    db_path = db_path or DB_PATH
+    chave = os.path.abspath(db_path)
+    if chave in _migrados:
+        return []
+    with _lock:
+        if chave in _migrados:
+            return []
+        aplicadas = []
+        if versao(db_path) < VERSAO_ATUAL:
+            with database.transaction(db_path) as conn:
+                # Relido dentro do lock de escrita: outro processo pode ter migrado.
+                atual = conn.execute('PRAGMA user_version').fetchone()[0]
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS SCHEMA_MIGRACOES ('
+                    'versao INTEGER PRIMARY KEY, nome TEXT NOT NULL, '
+                    'aplicada_em DATETIME DEFAULT CURRENT_TIMESTAMP)'
+                )
+                for numero, nome, passos in MIGRACOES:
+                    if numero <= atual:
+                        continue
+                    for passo in passos:
+                        if callable(passo):
+                            passo(conn)
+                        else:
+                            conn.execute(passo)
+                    conn.execute('INSERT INTO SCHEMA_MIGRACOES (versao, nome) VALUES (?, ?)', (numero, nome))
+                    aplicadas.append(numero)
+                conn.execute(f'PRAGMA user_version = {VERSAO_ATUAL}')
+        _migrados.add(chave)
+    return aplicadas
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Aplica as migrações do schema')
+    parser.add_argument('--db', default=DB_PATH)
+    args = parser.parse_args()
+    aplicadas = migrar(args.db)
+    print(f'Schema na versão {versao(args.db)} (aplicadas agora: {aplicadas or "nenhuma"})')
@@ -0,0 +1,180 @@
+"""Cache em memória do ranking de gamificação e do dashboard da equipe.
+
+Painéis consultados a cada poucos segundos por muitos gestores não vão ao
+banco a cada requisição: cada processo guarda o último resultado e, no
+máximo a cada `PAINEL_TTL` segundos, confere três marcadores baratos:
+
+- MAX(id_log) de LOG_ESTRESSE: logs novos entram nas médias de estresse
+  por cargo de forma incremental (só as linhas novas são lidas);
+- MAX(id_lancamento) de LEDGER_PONTOS: pontos mudaram, os rankings são
+  refeitos (consulta pelo índice de pontos, só o top-N);
+- VERSOES_DADOS['funcionarios'] (mantida por trigger): cadastro mudou
+  (cargo, tempos do KPI, inclusão/remoção), tudo é recarregado.
+
+Os marcadores também formam a versão usada como ETag pelo servidor.
+"""
+
+import math
+import os
+import threading
+import time
+
+import database
+import migrations
+
+DB_PATH = 'ai_sales_copilot.db'
+
+PAINEL_TTL = float(os.environ.get('PAINEL_TTL', 2))
+# Maior top-N servido (e mantido em cache) por ranking.
+RANKING_MAX = 100
+
+_lock = threading.Lock()
+# {caminho absoluto do banco: _Cache}
+_caches = {}
+
+
+class _Cache:
+    def __init__(self):
+        self.checado = None
+        self.marcadores = None
+        self.ultimo_id_log = 0
+        # {cargo: [n, soma, soma_quadrados]}
+        self.estresse = {}
+        self.kpi = []
+        self.funcionarios = 0
+        # {cargo ou None: top RANKING_MAX}
+        self.rankings = {}
+
+    @property
+    def versao(self):
+        return '-'.join(str(m) for m in self.marcadores)
+
+
+def _marcadores(conn):
+    return conn.execute(
+        'SELECT (SELECT COALESCE(MAX(id_log), 0) FROM LOG_ESTRESSE), '
+        '(SELECT COALESCE(MAX(id_lancamento), 0) FROM LEDGER_PONTOS), '
+        "(SELECT versao FROM VERSOES_DADOS WHERE nome = 'funcionarios')"
+    ).fetchone()
+
+
+def _recarregar(cache, conn, marcadores):
+    cache.estresse = {
+        cargo: [n, soma, soma_quadrados]
+        for cargo, n, soma, soma_quadrados in conn.execute(
+            'SELECT cargo, SUM(n), SUM(soma), SUM(soma_quadrados) FROM AGREGADO_ESTRESSE_CARGO_DIA GROUP BY cargo'
+        )
+    }
+    cache.ultimo_id_log = marcadores[0]
+    cache.kpi = []
+    cache.funcionarios = 0
+    for cargo, n, manual, reduzido in conn.execute(
+        'SELECT cargo, COUNT(*), AVG(tempo_operacional_manual), AVG(tempo_reduzido_copilot) '
+        'FROM FUNCIONARIOS GROUP BY cargo ORDER BY cargo'
+    ):
+        manual, reduzido = manual or 0.0, reduzido or 0.0
+        cache.kpi.append({
+            'cargo': cargo,
+            'funcionarios': n,
+            'tempo_operacional_manual': manual,
+            'tempo_reduzido_copilot': reduzido,
+            'pct_reducao': (manual - reduzido) / manual * 100 if manual > 0 else 0.0,
+        })
+        cache.funcionarios += n
+    cache.rankings = {}
+
+
+def _somar_logs_novos(cache, conn, ate_id_log):
+    for cargo, n, soma, soma_quadrados in conn.execute(
+        'SELECT f.cargo, COUNT(*), SUM(l.score_sentimento), SUM(l.score_sentimento * l.score_sentimento) '
+        'FROM LOG_ESTRESSE l JOIN FUNCIONARIOS f ON f.id_funcionario = l.id_funcionario '
+        'WHERE l.id_log > ? AND l.id_log <= ? AND l.score_sentimento IS NOT NULL GROUP BY f.cargo',
+        (cache.ultimo_id_log, ate_id_log),
+    ):
+        atual = cache.estresse.setdefault(cargo, [0, 0.0, 0.0])
+        atual[0] += n
+        atual[1] += soma
+        atual[2] += soma_quadrados
+    cache.ultimo_id_log = ate_id_log
+
+
+def _cache(db_path):
+    """Cache do banco, conferindo os marcadores se o TTL venceu (chamar com `_lock`)."""
+    chave = os.path.abspath(db_path)
+    cache = _caches.get(chave)
+    if cache is None:
+        migrations.migrar(db_path)
+        cache = _caches[chave] = _Cache()
+    agora = time.monotonic()
+    if cache.checado is not None and agora - cache.checado < PAINEL_TTL:
+        return cache
+    # Transação de leitura: marcadores e dados do mesmo snapshot.
+    with database.transaction(db_path, immediate=False) as conn:
+        marcadores = _marcadores(conn)
+        anteriores = cache.marcadores
+        if anteriores is None or marcadores[2] != anteriores[2] or marcadores[0] < anteriores[0]:
+            _recarregar(cache, conn, marcadores)
+        else:
+            if marcadores[0] != anteriores[0]:
+                _somar_logs_novos(cache, conn, marcadores[0])
+            if marcadores[1] != anteriores[1]:
+                cache.rankings = {}
+    cache.marcadores = marcadores
+    cache.checado = agora
+    return cache
+
+
+def _ranking(conn, cargo):
+    filtro, parametros = ('WHERE cargo = ? ', (cargo,)) if cargo else ('', ())
+    ranking = []
+    anterior = None
+    for i, (uid, nome, cargo_func, pontos) in enumerate(conn.execute(
+        'SELECT id_funcionario, nome, cargo, COALESCE(pontos_gamificacao, 0) FROM FUNCIONARIOS '
+        f'{filtro}ORDER BY pontos_gamificacao DESC, id_funcionario LIMIT ?',
+        parametros + (RANKING_MAX,),
+    ), start=1):
+        # Empates dividem a posição (mesma regra do RANK() da gamificação).
+        posicao = ranking[-1]['posicao'] if pontos == anterior else i
+        ranking.append({'posicao': posicao, 'id_funcionario': uid, 'nome': nome, 'cargo': cargo_func,
+                        'pontos': pontos})
+        anterior = pontos
+    return ranking
+
+
+def leaderboard(limite=10, cargo=None, db_path=None):
+    """{'ranking': top `limite` (até RANKING_MAX), 'versao': ...}, geral ou de um cargo."""
+    db_path = db_path or DB_PATH
+    limite = max(1, min(int(limite), RANKING_MAX))
+    with _lock:
+        cache = _cache(db_path)
+        ranking = cache.rankings.get(cargo)
+        if ranking is None:
+            with database.connection(db_path) as conn:
+                ranking = cache.rankings[cargo] = _ranking(conn, cargo)
+        return {'ranking': ranking[:limite], 'versao': cache.versao}
+
+
+def dashboard(db_path=None):
+    """Médias de estresse por cargo, KPI de redução de tempo e totais, com a versão."""
+    db_path = db_path or DB_PATH
+    with _lock:
+        cache = _cache(db_path)
+        estresse = []
+        for cargo, (n, soma, soma_quadrados) in sorted(cache.estresse.items()):
+            if not n:
+                continue
+            media = soma / n
+            desvio = math.sqrt(max(soma_quadrados / n - media * media, 0.0))
+            estresse.append({'cargo': cargo, 'n': n, 'media': media, 'desvio': desvio})
+        return {
+            'estresse_por_cargo': estresse,
+            'kpi_reducao': list(cache.kpi),
+            'totais': {'funcionarios': cache.funcionarios, 'logs_estresse': sum(e['n'] for e in estresse)},
+            'versao': cache.versao,
+        }
+
+
+def limpar():
+    """Descarta os caches (ex.: testes que trocam o banco)."""
+    with _lock:
+        _caches.clear()
@@ -0,0 +1,157 @@
+"""Executor de pipeline em DAG com paralelismo e checkpoint.
+
+Cada `Etapa` declara as etapas de que depende. Etapas prontas (todas as
+dependências concluídas) rodam em paralelo em um pool de processos; cada
+etapa roda em um processo novo (`max_tasks_per_child=1`), então o pico de
+RSS medido é o da própria etapa. A função da etapa deve ser de nível de
+módulo (picklable) e retornar o número de linhas processadas (ou None).
+
+Etapas concluídas são gravadas em um arquivo de checkpoint (JSON) a cada
+conclusão; se alguma etapa falhar, a próxima execução retoma a partir
+dela. Quando todas terminam, o checkpoint é removido.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import json
+import os
+import resource
+import sys
+import time
+import traceback
+
+PROCESSOS = int(os.environ.get('PIPELINE_PROCESSOS', os.cpu_count() or 1))
+
+
+class Etapa:
+    def __init__(self, nome, funcao, depende=()):
+        self.nome = nome
+        self.funcao = funcao
+        self.depende = tuple(depende)
+
+
+def _pico_rss_kb():
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta em KiB; macOS em bytes.
+    return pico // 1024 if sys.platform == 'darwin' else pico
+
+
+def _executar(funcao):
+    inicio = time.perf_counter()
+    linhas = funcao()
+    return {
+        'segundos': time.perf_counter() - inicio,
+        'linhas': int(linhas or 0),
+        'pico_rss_kb': _pico_rss_kb(),
+    }
+
+
+def _validar(etapas):
+    nomes = {e.nome for e in etapas}
+    if len(nomes) != len(etapas):
+        raise ValueError('Nomes de etapa repetidos')
+    for e in etapas:
+        faltando = set(e.depende) - nomes
+        if faltando:
+            raise ValueError(f'Etapa {e.nome} depende de etapas inexistentes: {sorted(faltando)}')
+    # Detecta ciclos ordenando topologicamente.
+    pendentes = {e.nome: set(e.depende) for e in etapas}
+    while pendentes:
+        prontas = [n for n, deps in pendentes.items() if not deps]
+        if not prontas:
+            raise ValueError(f'Ciclo entre as etapas: {sorted(pendentes)}')
+        for n in prontas:
+            del pendentes[n]
+        for deps in pendentes.values():
+            deps.difference_update(prontas)
+
+
+def _ler_checkpoint(caminho):
+    if not caminho or not os.path.exists(caminho):
+        return {}
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f).get('etapas', {})
+
+
+def _gravar_checkpoint(caminho, concluidas):
+    if not caminho:
+        return
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    tmp = f'{caminho}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'etapas': concluidas}, f, indent=2)
+    os.replace(tmp, caminho)
+
+
+def executar(etapas, checkpoint=None, processos=None, retomar=True):
+    """Executa o DAG; retorna (ok, relatorio) com uma entrada por etapa.
+
+    `relatorio[nome]` tem `status` ('ok', 'retomada', 'falhou' ou
+    'bloqueada'), `segundos`, `linhas` e `pico_rss_kb`. Com `processos=1`
+    as etapas rodam em série no próprio processo (útil para depuração); aí o
+    pico de RSS é o acumulado do processo até a etapa.
+    """
+    _validar(etapas)
+    processos = processos or PROCESSOS
+    concluidas = _ler_checkpoint(checkpoint) if retomar else {}
+    relatorio = {nome: {**dados, 'status': 'retomada'} for nome, dados in concluidas.items()}
+    pendentes = {e.nome: e for e in etapas if e.nome not in concluidas}
+    falhou = False
+
+    def prontas():
+        return [e for e in pendentes.values() if all(d in concluidas for d in e.depende)]
+
+    def concluir(etapa, dados):
+        concluidas[etapa.nome] = dados
+        relatorio[etapa.nome] = {**dados, 'status': 'ok'}
+        _gravar_checkpoint(checkpoint, concluidas)
+
+    def falhar(etapa, erro):
+        print(f'Etapa {etapa.nome} falhou: {erro}')
+        relatorio[etapa.nome] = {'status': 'falhou', 'erro': erro}
+
+    if processos == 1:
+        while not falhou and prontas():
+            etapa = prontas()[0]
+            del pendentes[etapa.nome]
+            try:
+                concluir(etapa, _executar(etapa.funcao))
+            except Exception:
+                falhar(etapa, traceback.format_exc())
+                falhou = True
+    else:
+        with ProcessPoolExecutor(max_workers=processos, max_tasks_per_child=1) as pool:
+            rodando = {}
+            while True:
+                if not falhou:
+                    for etapa in prontas():
+                        del pendentes[etapa.nome]
+                        rodando[pool.submit(_executar, etapa.funcao)] = etapa
+                if not rodando:
+                    break
+                feitos, _ = wait(rodando, return_when=FIRST_COMPLETED)
+                for futuro in feitos:
+                    etapa = rodando.pop(futuro)
+                    try:
+                        concluir(etapa, futuro.result())
+                    except Exception:
+                        falhar(etapa, traceback.format_exc())
+                        falhou = True
+    for nome in pendentes:
+        relatorio[nome] = {'status': 'bloqueada'}
+    if not falhou and not pendentes and checkpoint and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    return not falhou and not pendentes, relatorio
+
+
+def imprimir_relatorio(etapas, relatorio, segundos_total):
+    print(f'{"etapa":<12} {"status":<10} {"tempo":>9} {"linhas":>9} {"pico RSS":>10}')
+    for etapa in etapas:
+        r = relatorio.get(etapa.nome, {})
+        if 'segundos' in r:
+            print(
+                f'{etapa.nome:<12} {r["status"]:<10} {r["segundos"]:8.3f}s {r["linhas"]:>9} '
+                f'{r["pico_rss_kb"] / 1024:8.1f}MB'
+            )
+        else:
+            print(f'{etapa.nome:<12} {r.get("status", "-"):<10}')
+    print(f'Tempo total (parede): {segundos_total:.3f}s')
@@ -0,0 +1,122 @@
+"""Template de PDF de proposta comercial com layout estático em cache.
+
+O documento FPDF com cabeçalho, fontes e configuração de página é montado
+uma vez por processo (`obter_template`). Por proposta, o template é clonado
+só para desenhar os campos variáveis (cliente, decisor, data, valor e
+responsável) e gerar o stream de conteúdo da página; os demais objetos do
+PDF (raiz de páginas, fontes, recursos, info e catálogo) são reaproveitados
+já serializados e apenas a tabela xref é recalculada.
+
+`renderizar_sem_cache` gera o mesmo documento do zero com FPDF e serve de
+referência (testes e benchmark).
+"""
+
+import copy
+from datetime import date
+import threading
+import zlib
+
+from fpdf import FPDF
+
+TITULO = 'Proposta Comercial - AI Sales Copilot'
+
+_lock = threading.Lock()
+_template = None
+
+
+def _novo_documento():
+    pdf = FPDF()
+    pdf.set_auto_page_break(True, 15)
+    pdf.add_page()
+    pdf.set_font('Arial', 'B', 16)
+    pdf.cell(0, 10, TITULO, 0, 1, 'C')
+    pdf.ln(6)
+    pdf.set_font('Arial', '', 12)
+    return pdf
+
+
+def _desenhar_campos(pdf, nome_empresa, decisor_nome, decisor_email, valor, nome_responsavel, data):
+    pdf.cell(0, 8, f'Cliente: {nome_empresa}', 0, 1)
+    decisor_info = f'{decisor_nome} - {decisor_email}'
+    pdf.cell(0, 8, f'Decisor: {decisor_info}', 0, 1)
+    pdf.cell(0, 8, f'Data: {data.strftime("%d/%m/%Y")}', 0, 1)
+    pdf.ln(6)
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(0, 8, 'Resumo da Proposta', 0, 1)
+    pdf.set_font('Arial', '', 12)
+    project_text = f'Projeto com valor total de R$ {valor:,.2f}. Entrega conforme escopo acordado.'
+    pdf.multi_cell(0, 8, project_text)
+    pdf.ln(6)
+    pdf.cell(0, 8, f'Elaborado por: {nome_responsavel}', 0, 1)
+
+
+def renderizar_sem_cache(nome_empresa, decisor_nome, decisor_email, valor, nome_responsavel, data=None):
+    """Gera o PDF do zero (sem template); retorna os bytes do documento."""
+    pdf = _novo_documento()
+    _desenhar_campos(pdf, nome_empresa, decisor_nome, decisor_email, valor, nome_responsavel, data or date.today())
+    return pdf.output(dest='S').encode('latin1')
+
+
+class PropostaTemplate:
+    def __init__(self):
+        self._base = _novo_documento()
+        amostra = self._clonar()
+        _desenhar_campos(amostra, '', '', '', 0.0, '', date.today())
+        doc = amostra.output(dest='S')
+        if amostra.page != 1 or not amostra.compress:
+            raise RuntimeError('Template de proposta deve ter uma página com compressão')
+        # Objeto 4 = stream de conteúdo da página 1; tudo antes e depois é estático.
+        inicio_conteudo = doc.index('4 0 obj\n')
+        fim_conteudo = doc.index('endobj\n', inicio_conteudo) + len('endobj\n')
+        inicio_xref = doc.rindex('\nxref\n') + 1
+        inicio_trailer = doc.index('trailer\n', inicio_xref)
+        self._cabeca = doc[:inicio_conteudo]
+        self._corpo = doc[fim_conteudo:inicio_xref]
+        self._trailer = doc[inicio_trailer:doc.index('startxref', inicio_trailer)]
+        self._n = amostra.n
+        self._offsets = {}
+        for obj, offset in amostra.offsets.items():
+            if offset < inicio_conteudo:
+                self._offsets[obj] = (False, offset)
+            elif obj != 4:
+                self._offsets[obj] = (True, offset - fim_conteudo)
+
+    def _clonar(self):
+        pdf = copy.copy(self._base)
+        for nome, valor in vars(pdf).items():
+            if isinstance(valor, (dict, list)):
+                setattr(pdf, nome, valor.copy())
+        return pdf
+
+    def renderizar(self, nome_empresa, decisor_nome, decisor_email, valor, nome_responsavel, data=None):
+        """Retorna os bytes do PDF da proposta."""
+        pdf = self._clonar()
+        _desenhar_campos(pdf, nome_empresa, decisor_nome, decisor_email, valor, nome_responsavel, data or date.today())
+        if pdf.page != 1:
+            # Conteúdo quebrou de página: layout diferente do template.
+            return pdf.output(dest='S').encode('latin1')
+        stream = zlib.compress(pdf.pages[1].encode('latin1')).decode('latin1')
+        conteudo = f'4 0 obj\n<</Filter /FlateDecode /Length {len(stream)}>>\nstream\n{stream}\nendstream\nendobj\n'
+        inicio_corpo = len(self._cabeca) + len(conteudo)
+        xref = [f'xref\n0 {self._n + 1}\n0000000000 65535 f \n']
+        for obj in range(1, self._n + 1):
+            if obj == 4:
+                offset = len(self._cabeca)
+            else:
+                no_corpo, offset = self._offsets[obj]
+                if no_corpo:
+                    offset += inicio_corpo
+            xref.append(f'{offset:010d} 00000 n \n')
+        inicio_xref = inicio_corpo + len(self._corpo)
+        partes = [self._cabeca, conteudo, self._corpo, *xref, self._trailer, f'startxref\n{inicio_xref}\n%%EOF\n']
+        return ''.join(partes).encode('latin1')
+
+
+def obter_template():
+    """Template compartilhado do processo, montado no primeiro uso."""
+    global _template
+    if _template is None:
+        with _lock:
+            if _template is None:
+                _template = PropostaTemplate()
+    return _template
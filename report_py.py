@@ -1,48 +1,195 @@
-import sqlite3
+"""Relatório gerencial em Python.
+
+`gerar_relatorio_gerencial` substitui `stress_analysis_report.R` com os
+mesmos PNGs (estresse por cargo, redução de tempo e dashboard de
+eficiência) e roda no próprio processo do pipeline.
+
+A agregação fica no SQL: as médias por cargo vêm dos agregados
+materializados (`estresse_agregado.py`) e o KPI de tempo é um GROUP BY em
+FUNCIONARIOS, então a memória não cresce com o tamanho do log.
+
+Com `--since`, só os registros de LOG_ESTRESSE posteriores à marca d'água
+do último relatório são lidos, em blocos de `--chunk` linhas com
+acumuladores por cargo (memória limitada pelo tamanho do bloco).
+
+Os gráficos são gerados por `charts.py` (pool de processos, cache por
+hash dos dados agregados). `--por-periodo N` acrescenta um gráfico de
+tendência diária por cargo dos últimos N dias no mesmo lote.
+
+Uso:
+    python report_py.py [--since] [--chunk 50000] [--por-periodo 30]
+    python report_py.py --gerencial
+"""
+
+import argparse
+from datetime import date, timedelta
+import os
+
 import pandas as pd
-import matplotlib.pyplot as plt
+
+import charts
+import database
+import estresse_agregado
+import migrations
 
 DB = 'ai_sales_copilot.db'
+RELATORIO = 'report_py'
+CHUNK_LINHAS = 50_000
 
 
-def generate_reports():
-    conn = sqlite3.connect(DB)
-    df_log = pd.read_sql_query('SELECT * FROM LOG_ESTRESSE', conn)
-    df_func = pd.read_sql_query('SELECT * FROM FUNCIONARIOS', conn)
-    conn.close()
-    if df_log.empty or df_func.empty:
-        print('Dados insuficientes para gerar relatório em Python.')
-        return
-    merged = df_log.merge(df_func, on='id_funcionario', suffixes=('_log', '_func'))
-    avg_by_cargo = merged.groupby('cargo')['score_sentimento'].mean().reset_index()
-    plt.figure(figsize=(8, 5))
-    plt.bar(avg_by_cargo['cargo'], avg_by_cargo['score_sentimento'], color='tab:blue')
-    plt.title('Média de Score de Sentimento por Cargo')
-    plt.ylabel('Score médio')
-    plt.xlabel('Cargo')
-    plt.tight_layout()
-    plt.savefig('report_py_stress_by_cargo.png')
-    print('Gerado report_py_stress_by_cargo.png')
-    # KPI
-    kpi = (
-        df_func
-        .groupby('cargo')
-        .agg({'tempo_operacional_manual': 'mean', 'tempo_reduzido_copilot': 'mean'})
-        .reset_index()
+def _marca_dagua(conn):
+    row = conn.execute('SELECT ultimo_id_log FROM RELATORIO_WATERMARK WHERE relatorio = ?', (RELATORIO,)).fetchone()
+    return row[0] if row else 0
+
+
+def _gravar_marca_dagua(ultimo_id_log):
+    with database.transaction(DB) as conn:
+        conn.execute(
+            'INSERT INTO RELATORIO_WATERMARK (relatorio, ultimo_id_log) VALUES (?, ?) '
+            'ON CONFLICT(relatorio) DO UPDATE SET ultimo_id_log = excluded.ultimo_id_log, '
+            'atualizado_em = CURRENT_TIMESTAMP',
+            (RELATORIO, ultimo_id_log),
+        )
+
+
+def medias_por_cargo_desde(desde_id_log, ate_id_log, chunksize=CHUNK_LINHAS):
+    """Média de score por cargo dos logs com id em (desde, ate], lidos em blocos."""
+    n = pd.Series(dtype='int64')
+    soma = pd.Series(dtype='float64')
+    with database.connection(DB) as conn:
+        blocos = pd.read_sql_query(
+            'SELECT f.cargo, l.score_sentimento FROM LOG_ESTRESSE l '
+            'JOIN FUNCIONARIOS f ON f.id_funcionario = l.id_funcionario '
+            'WHERE l.id_log > ? AND l.id_log <= ? AND l.score_sentimento IS NOT NULL',
+            conn,
+            params=(desde_id_log, ate_id_log),
+            chunksize=chunksize,
+            dtype={'cargo': 'string', 'score_sentimento': 'float64'},
+        )
+        for bloco in blocos:
+            grupos = bloco.groupby('cargo')['score_sentimento']
+            n = n.add(grupos.count(), fill_value=0)
+            soma = soma.add(grupos.sum(), fill_value=0)
+    return pd.DataFrame({'cargo': n.index.astype(str), 'n': n.astype('int64').values, 'media': (soma / n).values})
+
+
+def _kpi(conn):
+    """Tempo manual x reduzido médio por cargo e o percentual de redução."""
+    kpi = pd.read_sql_query(
+        'SELECT cargo, AVG(tempo_operacional_manual) AS tempo_operacional_manual, '
+        'AVG(tempo_reduzido_copilot) AS tempo_reduzido_copilot FROM FUNCIONARIOS GROUP BY cargo',
+        conn,
     )
-    kpi['pct_reducao'] = (
-        (kpi['tempo_operacional_manual'] - kpi['tempo_reduzido_copilot'])
-        / kpi['tempo_operacional_manual']
-    ) * 100
-    plt.figure(figsize=(8, 5))
-    plt.bar(kpi['cargo'], kpi['pct_reducao'], color='tab:green')
-    plt.title('Percentual de Redução de Tempo Operacional por Cargo')
-    plt.ylabel('% Redução')
-    plt.xlabel('Cargo')
-    plt.tight_layout()
-    plt.savefig('report_py_kpi_reducao.png')
-    print('Gerado report_py_kpi_reducao.png')
+    manual = kpi['tempo_operacional_manual']
+    kpi['pct_reducao'] = ((manual - kpi['tempo_reduzido_copilot']) / manual * 100).where(manual > 0, 0.0)
+    return kpi
+
+
+def _cores(n):
+    return [f'C{i}' for i in range(n)]
+
+
+def gerar_relatorio_gerencial(destino=None, db_path=None):
+    """Gera os PNGs de `stress_analysis_report.R`; retorna {arquivo: origem}.
+
+    `destino` é o diretório dos PNGs (padrão: diretório atual).
+    """
+    db_path = db_path or DB
+    migrations.migrar(db_path)
+    estresse = pd.DataFrame(estresse_agregado.por_cargo(db_path), columns=['cargo', 'n', 'media', 'desvio'])
+    with database.connection(db_path) as conn:
+        kpi = _kpi(conn)
+    specs = []
+    if not estresse.empty:
+        ordenado = estresse.sort_values('media')
+        specs.append(charts.grafico_barras(
+            'dashboard_estresse_por_cargo.png', ordenado['cargo'], ordenado['media'],
+            'Nível Agregado de Estresse por Cargo', 'Cargo', 'Score Médio',
+            cor=_cores(len(ordenado)), horizontal=True, linha_zero=True,
+        ))
+        specs.append(charts.grafico_barras(
+            'stress_by_cargo.png', estresse['cargo'], estresse['media'],
+            'Média de Score de Sentimento por Cargo', 'Cargo', 'Score médio', cor=_cores(len(estresse)),
+        ))
+    if not kpi.empty:
+        ordenado = kpi.sort_values('pct_reducao')
+        specs.append(charts.grafico_barras(
+            'kpi_reducao_tempo.png', ordenado['cargo'], ordenado['pct_reducao'],
+            'Percentual de Redução de Tempo Operacional por Cargo', 'Cargo', '% Redução',
+            cor=_cores(len(ordenado)),
+        ))
+        specs.append(charts.grafico_barras(
+            'dashboard_eficiencia_operacional.png', ordenado['cargo'], ordenado['pct_reducao'],
+            'Redução Percentual de Tempo Operacional por Cargo', 'Cargo', '% Redução',
+            cor=_cores(len(ordenado)), rotulos=True,
+        ))
+    if destino:
+        for spec in specs:
+            spec['arquivo'] = os.path.join(destino, spec['arquivo'])
+    resultado = charts.renderizar(specs, db_path)
+    for arquivo, origem in resultado.items():
+        print(f'Gerado {arquivo} ({origem})')
+    return resultado
+
+
+def _graficos_por_periodo(dias):
+    desde = (date.today() - timedelta(days=dias)).isoformat()
+    specs = []
+    for cargo, pontos in estresse_agregado.por_cargo_dia(DB, desde).items():
+        specs.append(charts.grafico_linhas(
+            f'report_py_tendencia_{cargo}.png',
+            [p[0] for p in pontos],
+            {cargo: [p[2] for p in pontos]},
+            f'Score médio diário - {cargo} (últimos {dias} dias)',
+            'Dia',
+            'Score médio',
+        ))
+    return specs
+
+
+def generate_reports(since=False, chunksize=CHUNK_LINHAS, por_periodo=None):
+    """Gera os gráficos do relatório; retorna o DataFrame de médias por cargo."""
+    migrations.migrar(DB)
+    with database.connection(DB) as conn:
+        desde = _marca_dagua(conn) if since else 0
+        # Fotografia do topo do log: registros inseridos durante o relatório ficam para o próximo.
+        ate = conn.execute('SELECT COALESCE(MAX(id_log), 0) FROM LOG_ESTRESSE').fetchone()[0]
+        kpi = _kpi(conn)
+    if since:
+        avg_by_cargo = medias_por_cargo_desde(desde, ate, chunksize)
+        titulo = f'Média de Score de Sentimento por Cargo (logs {desde + 1}-{ate})'
+        arquivo = 'report_py_stress_by_cargo_since.png'
+    else:
+        avg_by_cargo = pd.DataFrame(estresse_agregado.por_cargo(DB), columns=['cargo', 'n', 'media', 'desvio'])
+        titulo = 'Média de Score de Sentimento por Cargo'
+        arquivo = 'report_py_stress_by_cargo.png'
+    if avg_by_cargo.empty or kpi.empty:
+        print('Dados insuficientes para gerar relatório em Python.')
+        _gravar_marca_dagua(ate)
+        return avg_by_cargo
+    specs = [
+        charts.grafico_barras(arquivo, avg_by_cargo['cargo'], avg_by_cargo['media'], titulo, 'Cargo', 'Score médio'),
+        charts.grafico_barras(
+            'report_py_kpi_reducao.png', kpi['cargo'], kpi['pct_reducao'],
+            'Percentual de Redução de Tempo Operacional por Cargo', 'Cargo', '% Redução', cor='tab:green',
+        ),
+    ]
+    if por_periodo:
+        specs.extend(_graficos_por_periodo(por_periodo))
+    for arquivo, origem in charts.renderizar(specs, DB).items():
+        print(f'Gerado {arquivo} ({origem})')
+    _gravar_marca_dagua(ate)
+    return avg_by_cargo
 
 
 if __name__ == '__main__':
-    generate_reports()
+    parser = argparse.ArgumentParser(description='Relatório gerencial em Python')
+    parser.add_argument('--since', action='store_true', help="só logs após a marca d'água do último relatório")
+    parser.add_argument('--chunk', type=int, default=CHUNK_LINHAS, help='linhas por bloco no modo --since')
+    parser.add_argument('--por-periodo', type=int, metavar='DIAS', help='tendência diária por cargo')
+    parser.add_argument('--gerencial', action='store_true', help='PNGs do relatório gerencial (antigo relatório R)')
+    args = parser.parse_args()
+    if args.gerencial:
+        gerar_relatorio_gerencial()
+    else:
+        generate_reports(since=args.since, chunksize=args.chunk, por_periodo=args.por_periodo)
@@ -4,150 +4,122 @@
 
 Script simples para executar o pipeline de demonstração.
 
-Ele é intencionalmente resiliente: importa módulos do projeto com
+As etapas formam um DAG (`pipeline_dag.py`): banco -> seed -> {proposta,
+wellbeing, relatorio}; as três últimas rodam em paralelo em processos
+separados. Etapas concluídas ficam em checkpoint, então uma nova execução
+após falha retoma da etapa que falhou (`--reset` recomeça do zero). Ao
+final é exibido o tempo, as linhas processadas e o pico de RSS por etapa.
+
+Ele é intencionalmente resiliente: cada etapa importa seu módulo com
 try/except (para permitir análise estática em ambientes sem dependências)
-e tenta executar um relatório em R com fallback para `report_py.py`.
+e é pulada se o módulo não estiver disponível.
+
+Uso:
+    python run_pipeline.py [--reset] [--processos N]
 """
 
+import argparse
 import os
-import subprocess
-import sys
-import traceback
+import time
+
+import database
+import pipeline_dag
 
 ROOT = os.path.dirname(os.path.abspath(__file__))
 DB = os.path.join(ROOT, 'ai_sales_copilot.db')
+CHECKPOINT = os.path.join(ROOT, 'outputs', 'pipeline_checkpoint.json')
 
-
-def run_python_report():
-    """Executa report_py.py se presente (fallback quando Rscript não está disponível)."""
-    py = os.path.join(ROOT, 'report_py.py')
-    if os.path.exists(py):
-        print('Executando report_py.py...')
-        proc = subprocess.run([sys.executable, py], capture_output=True, text=True)
-        print('report_py.py exit:', proc.returncode)
-        if proc.stdout:
-            print(proc.stdout)
-        if proc.stderr:
-            print('report stderr:', proc.stderr)
-    else:
-        print('Nenhum script de relatório disponível (report_py.py não encontrado).')
+TABELAS_SEED = ('FUNCIONARIOS', 'CLIENTES', 'PROPOSTAS', 'ATIVIDADES', 'LOG_ESTRESSE')
 
 
-def main():
-    """Executa o pipeline de demonstração.
+def _contar_linhas():
+    with database.connection(DB) as conn:
+        return sum(conn.execute(f'SELECT COUNT(*) FROM {t}').fetchone()[0] for t in TABELAS_SEED)
 
-    Passos:
-    - importa módulos do projeto (com tolerância a falhas)
-    - cria/valida o banco via `setup_project.setup_database()` quando disponível
-    - popula fixtures via `seed_fixtures.seed()` quando disponível
-    - gera uma proposta com `automation_module.gerar_proposta_comercial()` quando disponível
-    - registra wellbeing via `wellbeing_module.registrar_log_estresse_e_pontuar()` quando disponível
-    - tenta rodar relatório em R (Rscript), caso contrário executa `report_py.py`
-    """
 
-    print('Iniciando pipeline...')
+def etapa_banco():
+    try:
+        import setup_project
+    except Exception:
+        print('Aviso: módulo setup_project não disponível — pulando criação do DB')
+        return 0
+    print('Criando/validando banco...')
+    setup_project.setup_database()
+    return 0
 
-    # Imports opcionais: falha ao importar não deve quebrar a análise estática
-    setup_project = None
-    seed_fixtures = None
-    automation_module = None
-    wellbeing_module = None
 
+def etapa_seed():
     try:
-        import setup_project as _sp
-        setup_project = _sp
+        import seed_fixtures
     except Exception:
-        print('Aviso: módulo setup_project não disponível (continuando)')
+        print('Aviso: módulo seed_fixtures não disponível — pulando seed')
+        return 0
+    print('Populando fixtures...')
+    antes = _contar_linhas()
+    seed_fixtures.seed()
+    return _contar_linhas() - antes
+
 
+def etapa_proposta():
     try:
-        import seed_fixtures as _sf
-        seed_fixtures = _sf
+        import automation_module
     except Exception:
-        print('Aviso: módulo seed_fixtures não disponível (continuando)')
+        print('Aviso: módulo automation_module não disponível — pulando geração de proposta')
+        return 0
+    print('Gerando proposta de demonstração...')
+    path = automation_module.gerar_proposta_comercial(1, 19990, 1)
+    print('Proposta gerada em:', path)
+    return 1 if path else 0
 
+
+def etapa_wellbeing():
     try:
-        import automation_module as _am
-        automation_module = _am
+        import wellbeing_module
     except Exception:
-        print('Aviso: módulo automation_module não disponível (continuando)')
+        print('Aviso: módulo wellbeing_module não disponível — pulando wellbeing')
+        return 0
+    print('Registrando wellbeing demo...')
+    res = wellbeing_module.registrar_log_estresse_e_pontuar(1, 'pipeline demo')
+    print('Resultado wellbeing:', res)
+    return 1 if res else 0
+
 
+def etapa_relatorio():
     try:
-        import wellbeing_module as _wm
-        wellbeing_module = _wm
+        import report_py
     except Exception:
-        print('Aviso: módulo wellbeing_module não disponível (continuando)')
+        print('Aviso: módulo report_py não disponível — pulando relatório')
+        return 0
+    print('Gerando relatório gerencial...')
+    return len(report_py.gerar_relatorio_gerencial())
 
-    # 1) Criar/validar DB
-    try:
-        if setup_project is not None and hasattr(setup_project, 'setup_database'):
-            print('Criando/validando banco...')
-            setup_project.setup_database()
-        else:
-            print('setup_project.setup_database() não disponível — pulando criação do DB')
-    except Exception as e:
-        print('Falha ao criar/validar DB:', e)
-        print(traceback.format_exc())
-
-    # 2) Popular fixtures
-    try:
-        if seed_fixtures is not None and hasattr(seed_fixtures, 'seed'):
-            print('Populando fixtures...')
-            seed_fixtures.seed()
-        else:
-            print('seed_fixtures.seed() não disponível — pulando seed')
-    except Exception as e:
-        print('Falha ao popular fixtures:', e)
-        print(traceback.format_exc())
-
-    # 3) Gerar proposta de demonstração
-    try:
-        if automation_module is not None and hasattr(automation_module, 'gerar_proposta_comercial'):
-            print('Gerando proposta de demonstração...')
-            path = automation_module.gerar_proposta_comercial(1, 19990, 1)
-            print('Proposta gerada em:', path)
-        else:
-            print('automation_module.gerar_proposta_comercial() não disponível — pulando geração de proposta')
-    except Exception as e:
-        print('Falha ao gerar proposta:', e)
-        print(traceback.format_exc())
-
-    # 4) Registrar wellbeing demo
-    try:
-        if wellbeing_module is not None and hasattr(wellbeing_module, 'registrar_log_estresse_e_pontuar'):
-            print('Registrando wellbeing demo...')
-            res = wellbeing_module.registrar_log_estresse_e_pontuar(1, 'pipeline demo')
-            print('Resultado wellbeing:', res)
-        else:
-            print('wellbeing_module.registrar_log_estresse_e_pontuar() não disponível — pulando wellbeing')
-    except Exception as e:
-        print('Falha ao registrar wellbeing:', e)
-        print(traceback.format_exc())
-
-    # 5) Relatório: tentar Rscript, fallback para Python
-    try:
-        rscript = os.path.join(ROOT, 'stress_analysis_report.R')
-        if os.path.exists(rscript):
-            print('Tentando rodar relatório em R (Rscript)...')
-            try:
-                proc = subprocess.run(['Rscript', rscript], capture_output=True, text=True)
-                print('Rscript exit:', proc.returncode)
-                if proc.stdout:
-                    print(proc.stdout)
-                if proc.returncode != 0:
-                    print('Rscript retornou código diferente de zero — executando fallback Python')
-                    run_python_report()
-            except FileNotFoundError:
-                print('Rscript não encontrado no PATH — usando fallback Python')
-                run_python_report()
-        else:
-            print('R script não existe — executando fallback Python')
-            run_python_report()
-    except Exception as e:
-        print('Erro ao tentar executar relatório:', e)
-        print(traceback.format_exc())
-
-    print('Pipeline finalizado.')
+
+ETAPAS = [
+    pipeline_dag.Etapa('banco', etapa_banco),
+    pipeline_dag.Etapa('seed', etapa_seed, depende=['banco']),
+    pipeline_dag.Etapa('proposta', etapa_proposta, depende=['seed']),
+    pipeline_dag.Etapa('wellbeing', etapa_wellbeing, depende=['seed']),
+    pipeline_dag.Etapa('relatorio', etapa_relatorio, depende=['seed']),
+]
+
+
+def main(argv=None):
+    """Executa o pipeline de demonstração; retorna True se todas as etapas concluíram."""
+    parser = argparse.ArgumentParser(description='Pipeline de demonstração')
+    parser.add_argument('--reset', action='store_true', help='ignora o checkpoint e recomeça do zero')
+    parser.add_argument('--processos', type=int, default=None, help='1 = executa em série')
+    args = parser.parse_args(argv)
+
+    print('Iniciando pipeline...')
+    inicio = time.perf_counter()
+    ok, relatorio = pipeline_dag.executar(ETAPAS, CHECKPOINT, args.processos, retomar=not args.reset)
+    pipeline_dag.imprimir_relatorio(ETAPAS, relatorio, time.perf_counter() - inicio)
+    if ok:
+        print('Pipeline finalizado.')
+    else:
+        print('Pipeline interrompido; execute novamente para retomar da etapa que falhou.')
+    return ok
 
 
 if __name__ == '__main__':
-    main()
+    raise SystemExit(0 if main() else 1)
@@ -1,96 +1,226 @@
-import random
-from setup_project import setup_database, add_employee_securely, insert_client, populate_training_data, DB_NAME
-from wellbeing_module import analyze_sentiment, suggest_alternative
-import sqlite3
+"""Gerador de dados sintéticos (fixtures) em volume.
+
+`gerar` cria funcionários, clientes, propostas, atividades e logs de
+estresse de forma determinística (mesma `semente` -> mesmos dados), com
+todos os INSERTs em uma única transação via `executemany` e linhas
+produzidas sob demanda (memória constante mesmo com milhões de logs).
+Hashes de senha são calculados uma vez por senha distinta e scores de
+sentimento uma vez por texto de exemplo. Em cargas grandes o trigger de
+agregados é suspenso e os agregados são reconstruídos no fim.
+
+`seed()` mantém o conjunto pequeno usado pela demo e pelos testes
+('User{i} Test' / 'pwd{i}2025').
+
+Uso:
+    python seed_fixtures.py
+    python seed_fixtures.py --saida bench.db --funcionarios 1000 --clientes 500 --logs 1000000
+"""
+
+import argparse
 from datetime import date, timedelta
-import time
+import json
+import os
+import random
 
+import database
+import estresse_agregado
+import gamificacao
+import migrations
+from setup_project import hash_password, DB_NAME
+from wellbeing_module import analyze_sentiment_many, suggest_alternative
 
-def _exec_write(query, params=(), retries=5):
-    for i in range(retries):
-        try:
-            conn = sqlite3.connect(DB_NAME)
-            c = conn.cursor()
-            c.execute(query, params)
-            conn.commit()
-            conn.close()
-            return True
-        except sqlite3.OperationalError:
-            time.sleep(0.1)
-    return False
+CARGOS = ['SDR', 'Closer', 'Engenheiro']
+TEXTOS_EXEMPLO = [
+    'Estou muito frustrado com metas e pressao',
+    'Tive um otimo dia, fechei 2 contratos',
+    'Perdendo tempo com atividades manuais',
+    'Uso automacao e me sinto mais produtivo',
+    'Sobrecarga e prazos impossiveis',
+    'Dia normal, sem novidades',
+]
+# Acima disto os agregados de estresse são reconstruídos uma vez ao final
+# em vez de atualizados pelo trigger a cada linha.
+LIMIAR_CARGA_EM_MASSA = 50_000
+DATASET_TREINAMENTO = [
+    ('Não consigo agendar nada esta semana, muito frustrado.', 1),
+    ('A meta está muito alta e a pressão é grande.', 1),
+    ('Tive um ótimo dia e converti leads!', 0),
+    ('Dia tranquilo, tudo dentro do esperado.', 0),
+    ('Perdendo muito tempo com relatórios manuais.', 1),
+    ('A automação ajudou e aumentou minha produtividade.', 0),
+]
 
 
-def seed():
-    setup_database()
-    populate_training_data()
-    cargos = ['SDR', 'Closer', 'Engenheiro']
-    employees = []
-    for i in range(1, 11):
-        nome = f'User{i} Test'
-        cargo = random.choice(cargos)
-        senha = f'pwd{i}2025'
-        uid = add_employee_securely(nome, cargo, senha)
-        if not uid:
-            conn = sqlite3.connect(DB_NAME)
-            c = conn.cursor()
-            c.execute('SELECT id_funcionario FROM FUNCIONARIOS WHERE nome = ?', (nome,))
-            r = c.fetchone()
-            uid = r[0] if r else None
-            conn.close()
-        if uid:
-            tempo_manual = random.uniform(120, 300)
-            tempo_reduzido = max(0, tempo_manual - random.uniform(10, 120))
-            update_sql = (
-                'UPDATE FUNCIONARIOS SET tempo_operacional_manual = ?, '
-                'tempo_reduzido_copilot = ? WHERE id_funcionario = ?'
-            )
-            _exec_write(update_sql, (tempo_manual, tempo_reduzido, uid))
-            employees.append((uid, nome, cargo))
-    clients = []
-    for j in range(1, 9):
-        nome_empresa = f'Client{j} SA'
-        cnpj = f'99.999.99{j:02d}/0001-9{j}'
-        decisor = f'Decisor{j}'
-        email = f'decisor{j}@client{j}.com'
-        responsavel = random.choice(employees)[0]
-        cid = insert_client(nome_empresa, cnpj, decisor, email, responsavel)
-        if cid:
-            clients.append((cid, nome_empresa))
-    for cid, _ in clients:
-        for k in range(random.randint(1, 3)):
-            valor = random.uniform(5000, 120000)
-            _exec_write(
-                'INSERT INTO PROPOSTAS (id_cliente, tipo, valor_total, caminho_arquivo) VALUES (?, ?, ?, ?)',
-                (cid, 'Comercial', valor, None),
-            )
-    for uid, _, _ in employees:
-        for a in range(random.randint(0, 4)):
-            vencida = random.choice([True, False, False])
-            status = 'VENCIDA' if vencida else random.choice(['PENDENTE', 'CONCLUIDA'])
-            dv = (date.today() - timedelta(days=random.randint(0, 20))).isoformat()
-            _exec_write(
-                'INSERT INTO ATIVIDADES (id_funcionario, descricao, data_vencimento, status) VALUES (?, ?, ?, ?)',
-                (uid, f'Tarefa {a}', dv, status),
-            )
-    sample_texts = [
-        'Estou muito frustrado com metas e pressao',
-        'Tive um otimo dia, fechei 2 contratos',
-        'Perdendo tempo com atividades manuais',
-        'Uso automacao e me sinto mais produtivo',
-        'Sobrecarga e prazos impossiveis',
-        'Dia normal, sem novidades',
+def _senha(i, senhas_distintas):
+    # Os 10 primeiros usuários mantêm as senhas conhecidas da demo (pwd{i}2025).
+    return f'pwd{(i - 1) % senhas_distintas + 1}2025'
+
+
+def _funcionarios(conn, rng, n, senhas_distintas):
+    nomes = [f'User{i} Test' for i in range(1, n + 1)]
+    existentes = {
+        nome: (uid, cargo)
+        for uid, nome, cargo in conn.execute(
+            'SELECT MIN(id_funcionario), nome, cargo FROM FUNCIONARIOS '
+            'WHERE nome IN (SELECT value FROM json_each(?)) GROUP BY nome',
+            (json.dumps(nomes),),
+        )
+    }
+    hashes = {}
+    novos = []
+    for i, nome in enumerate(nomes, start=1):
+        cargo = rng.choice(CARGOS)
+        tempo_manual = rng.uniform(120, 300)
+        tempo_reduzido = max(0, tempo_manual - rng.uniform(10, 120))
+        if nome in existentes:
+            continue
+        senha = _senha(i, senhas_distintas)
+        if senha not in hashes:
+            hashes[senha] = hash_password(senha)
+        novos.append((nome, cargo, hashes[senha], tempo_manual, tempo_reduzido))
+    conn.executemany(
+        'INSERT INTO FUNCIONARIOS (nome, cargo, senha_hash, tempo_operacional_manual, tempo_reduzido_copilot) '
+        'VALUES (?, ?, ?, ?, ?)',
+        novos,
+    )
+    return [
+        (uid, cargo)
+        for uid, cargo in conn.execute(
+            'SELECT MIN(id_funcionario), cargo FROM FUNCIONARIOS '
+            'WHERE nome IN (SELECT value FROM json_each(?)) GROUP BY nome ORDER BY MIN(id_funcionario)',
+            (json.dumps(nomes),),
+        )
     ]
-    for uid, _, cargo in employees:
-        for _ in range(random.randint(1, 4)):
-            texto = random.choice(sample_texts)
-            score = analyze_sentiment(texto)
-            sugest = suggest_alternative(score, cargo)
-            insert_sql = (
-                'INSERT INTO LOG_ESTRESSE (id_funcionario, descricao_problema, '
-                'score_sentimento, sugestao_ia, pontos) VALUES (?, ?, ?, ?, ?)'
+
+
+def _clientes(conn, rng, n, funcionarios):
+    hoje = date.today().isoformat()
+    cnpjs = [f'99.999.99{j:02d}/0001-9{j}' for j in range(1, n + 1)]
+    conn.executemany(
+        'INSERT OR IGNORE INTO CLIENTES '
+        '(nome_empresa, cnpj, decisor_nome, decisor_email, data_cadastro, responsavel_vendas) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        (
+            (f'Client{j} SA', cnpj, f'Decisor{j}', f'decisor{j}@client{j}.com', hoje, rng.choice(funcionarios)[0])
+            for j, cnpj in enumerate(cnpjs, start=1)
+        ),
+    )
+    return [r[0] for r in conn.execute(
+        'SELECT id_cliente FROM CLIENTES WHERE cnpj IN (SELECT value FROM json_each(?)) ORDER BY id_cliente',
+        (json.dumps(cnpjs),),
+    )]
+
+
+def _atividades(rng, funcionarios, por_funcionario):
+    for uid, _ in funcionarios:
+        for a in range(rng.randint(*por_funcionario)):
+            vencida = rng.choice([True, False, False])
+            status = 'VENCIDA' if vencida else rng.choice(['PENDENTE', 'CONCLUIDA'])
+            vencimento = (date.today() - timedelta(days=rng.randint(0, 20))).isoformat()
+            yield uid, f'Tarefa {a}', vencimento, status
+
+
+def _logs(rng, funcionarios, total, dias, bloco=10_000):
+    scores = dict(zip(TEXTOS_EXEMPLO, analyze_sentiment_many(TEXTOS_EXEMPLO)))
+    sugestoes = {}
+    inicio = date.today() - timedelta(days=dias)
+    datas = [(inicio + timedelta(days=d)).isoformat() for d in range(dias + 1)]
+    horarios = [f'{h:02d}:{m:02d}:00' for h in range(8, 20) for m in range(60)]
+    # Sorteios em blocos com `choices(k=...)`: bem mais rápido que um sorteio por campo.
+    for feitos in range(0, total, bloco):
+        k = min(bloco, total - feitos)
+        for (uid, cargo), texto, dia, hora, pontual, vencidas in zip(
+            rng.choices(funcionarios, k=k),
+            rng.choices(TEXTOS_EXEMPLO, k=k),
+            rng.choices(datas, k=k),
+            rng.choices(horarios, k=k),
+            rng.choices((1, 0), weights=(4, 1), k=k),
+            rng.choices(range(4), weights=(5, 2, 2, 1), k=k),
+        ):
+            sugestao = sugestoes.get((texto, cargo))
+            if sugestao is None:
+                sugestao = sugestoes[texto, cargo] = suggest_alternative(scores[texto], cargo)
+            yield uid, f'{dia} {hora}', texto, scores[texto], sugestao, pontual, vencidas
+
+
+def gerar(funcionarios=10, clientes=8, logs=None, atividades_por_funcionario=(0, 4),
+          propostas_por_cliente=(1, 3), dias=30, semente=None, senhas_distintas=10, db_path=None):
+    """Gera o volume pedido em uma única transação; retorna as contagens inseridas.
+
+    `logs=None` gera de 1 a 4 logs por funcionário (como a demo). `semente`
+    torna os dados reproduzíveis; None usa uma semente aleatória.
+    """
+    db_path = db_path or DB_NAME
+    migrations.migrar(db_path)
+    rng = random.Random(semente)
+    with database.transaction(db_path) as conn:
+        if conn.execute('SELECT COUNT(*) FROM DATASET_TREINAMENTO').fetchone()[0] == 0:
+            conn.executemany(
+                'INSERT INTO DATASET_TREINAMENTO (texto_problema, label_estresse) VALUES (?, ?)', DATASET_TREINAMENTO
             )
-            _exec_write(insert_sql, (uid, texto, score, sugest, random.randint(0, 15)))
+        funcs = _funcionarios(conn, rng, funcionarios, senhas_distintas)
+        ids_clientes = _clientes(conn, rng, clientes, funcs)
+        propostas = [
+            (cid, 'Comercial', rng.uniform(5000, 120000), None)
+            for cid in ids_clientes
+            for _ in range(rng.randint(*propostas_por_cliente))
+        ]
+        conn.executemany(
+            'INSERT INTO PROPOSTAS (id_cliente, tipo, valor_total, caminho_arquivo) VALUES (?, ?, ?, ?)', propostas
+        )
+        cur = conn.executemany(
+            'INSERT INTO ATIVIDADES (id_funcionario, descricao, data_vencimento, status) VALUES (?, ?, ?, ?)',
+            _atividades(rng, funcs, atividades_por_funcionario),
+        )
+        n_atividades = cur.rowcount
+        if logs is None:
+            logs = sum(rng.randint(1, 4) for _ in funcs)
+        insert_logs = (
+            'INSERT INTO LOG_ESTRESSE (id_funcionario, data_registro, descricao_problema, '
+            'score_sentimento, sugestao_ia, pontualidade_ok, vencidas_no_registro) VALUES (?, ?, ?, ?, ?, ?, ?)'
+        )
+        if logs >= LIMIAR_CARGA_EM_MASSA:
+            with estresse_agregado.carga_em_massa(conn):
+                conn.executemany(insert_logs, _logs(rng, funcs, logs, dias))
+        else:
+            conn.executemany(insert_logs, _logs(rng, funcs, logs, dias))
+        # Pontos dos logs, saldos (via ledger) e ranking pelas regras atuais.
+        gamificacao.recalcular_em(conn)
+    return {
+        'funcionarios': len(funcs),
+        'clientes': len(ids_clientes),
+        'propostas': len(propostas),
+        'atividades': n_atividades,
+        'logs': logs,
+    }
+
+
+def seed():
+    """Conjunto pequeno da demo: 10 funcionários e 8 clientes."""
+    return gerar()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gera dados sintéticos no banco')
+    parser.add_argument('--saida', help='cria um banco novo neste caminho (ex.: para benchmarks)')
+    parser.add_argument('--sobrescrever', action='store_true', help='apaga o arquivo de --saida se existir')
+    parser.add_argument('--funcionarios', type=int, default=10)
+    parser.add_argument('--clientes', type=int, default=8)
+    parser.add_argument('--logs', type=int, default=None)
+    parser.add_argument('--dias', type=int, default=30, help='período coberto pelos logs')
+    parser.add_argument('--semente', type=int, default=None)
+    args = parser.parse_args(argv)
+    db_path = args.saida or DB_NAME
+    if args.saida and os.path.exists(args.saida):
+        if not args.sobrescrever:
+            parser.error(f'{args.saida} já existe (use --sobrescrever)')
+        for sufixo in ('', '-wal', '-shm'):
+            if os.path.exists(args.saida + sufixo):
+                os.remove(args.saida + sufixo)
+    contagens = gerar(args.funcionarios, args.clientes, args.logs, dias=args.dias,
+                      semente=args.semente, db_path=db_path)
+    print(f'{db_path}: {contagens}')
 
 
 if __name__ == '__main__':
-    seed()
+    main()
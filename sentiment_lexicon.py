@@ -0,0 +1,167 @@
+"""Motor de léxico de sentimento compilado (pt-BR).
+
+Os vocabulários positivo/negativo são normalizados (sem acentos, minúsculos)
+e compilados uma vez. Termos terminados em `*` são radicais (casam qualquer
+sufixo: `frustr*` cobre "frustrado", "frustração"...); os demais casam a
+palavra inteira. Um negador ("não", "nunca", "nem", "sem") até uma palavra
+antes do primeiro termo seguinte inverte sua polaridade ("não consigo" conta como negativo).
+
+Cada texto é percorrido uma única vez: os tokens são resolvidos em uma tabela
+token -> termos (`map` em C sobre um dict) e só os tokens com termos são
+visitados em Python. A classificação de um token novo (normalização + busca
+de radical) é feita uma vez e memorizada, então o custo por mensagem não
+cresce com o tamanho do vocabulário.
+
+O score mantém o contrato de `wellbeing_module.analyze_sentiment`:
+(positivos - negativos) / (positivos + negativos), em [-1, 1], contando cada
+termo distinto uma única vez por texto.
+"""
+
+from itertools import compress, repeat
+import re
+import unicodedata
+
+NEGATIVOS = {
+    'frustr*': 1.0,
+    'estress*': 1.0,
+    'pressao': 1.0,
+    'dificil': 1.0,
+    'impossivel': 1.0,
+    'impossiveis': 1.0,
+    'perdendo': 1.0,
+    'sobrecarreg*': 1.0,
+    'sobrecarga': 1.0,
+    'cobranca': 1.0,
+}
+
+POSITIVOS = {
+    'otim*': 1.0,
+    'sucesso': 1.0,
+    'bom': 1.0,
+    'bem': 1.0,
+    'consegu*': 1.0,
+    'consigo': 1.0,
+    'produtiv*': 1.0,
+}
+
+NEGADORES = ('nao', 'nunca', 'nem', 'sem')
+
+# Quantas palavras podem separar o negador do termo.
+JANELA_NEGACAO = 1
+
+CACHE_MAX = 100_000
+
+_NEGADOR = object()
+_PALAVRA = re.compile(r'\w+')
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos ("Pressão" -> "pressao")."""
+    texto = texto.lower()
+    if texto.isascii():
+        return texto
+    decomposto = unicodedata.normalize('NFKD', texto)
+    return ''.join(ch for ch in decomposto if not unicodedata.combining(ch))
+
+
+class _TokenCache(dict):
+    """Tabela token -> termos; tokens novos são classificados sob demanda."""
+
+    def __init__(self, classificar):
+        super().__init__()
+        self._classificar = classificar
+
+    def __missing__(self, token):
+        if len(self) >= CACHE_MAX:
+            self.clear()
+        hits = self[token] = self._classificar(token)
+        return hits
+
+
+class SentimentLexicon:
+    """Léxico compilado; `score` devolve um float em [-1, 1]."""
+
+    def __init__(self, positivos=None, negativos=None, negadores=NEGADORES, janela=JANELA_NEGACAO):
+        positivos = POSITIVOS if positivos is None else positivos
+        negativos = NEGATIVOS if negativos is None else negativos
+        self._janela = janela + 1
+        self._negadores = {normalizar(n) for n in negadores}
+        self._palavras = {}
+        # pesos por termo, separados por polaridade (para somas via `map`)
+        self._pesos = ({}, {})
+        radicais = {}
+        for polaridade, vocab in enumerate((positivos, negativos)):
+            for termo, peso in vocab.items():
+                termo = normalizar(termo)
+                alvo = radicais if termo.endswith('*') else self._palavras
+                alvo[termo.rstrip('*')] = termo
+                self._pesos[polaridade][termo] = float(peso)
+        self._radicais = radicais
+        # Radicais mais longos primeiro, para o casamento mais específico vencer.
+        ordem = sorted(radicais, key=len, reverse=True)
+        self._regex_radical = re.compile('|'.join(re.escape(r) for r in ordem)) if ordem else None
+        self._cache = _TokenCache(self._classificar)
+
+    def _classificar(self, token):
+        hits = []
+        for palavra in _PALAVRA.findall(normalizar(token)):
+            if palavra in self._negadores:
+                hits.append(_NEGADOR)
+            elif palavra in self._palavras:
+                hits.append(self._palavras[palavra])
+            elif self._regex_radical is not None:
+                m = self._regex_radical.match(palavra)
+                if m:
+                    hits.append(self._radicais[m.group()])
+        return tuple(hits)
+
+    def _pontuar(self, texto):
+        hits_por_token = list(map(self._cache.__getitem__, texto.lower().split()))
+        termos = set().union(*hits_por_token)
+        positivos, negativos = self._pesos
+        if _NEGADOR not in termos:
+            # caminho rápido: sem negação, só importa o conjunto de termos
+            pos = sum(map(positivos.get, termos, repeat(0.0)))
+            neg = sum(map(negativos.get, termos, repeat(0.0)))
+            return pos, neg
+        # Mesma regra do caminho rápido: cada vocabulário em que o termo está
+        # contribui com o seu peso (termo nos dois conta nos dois); a negação
+        # troca o lado. {(termo, vocabulário): peso}; cada par conta uma vez.
+        vistos_pos = {}
+        vistos_neg = {}
+        ultimo_negador = -self._janela - 1
+        for i in compress(range(len(hits_por_token)), hits_por_token):
+            for termo in hits_por_token[i]:
+                if termo is _NEGADOR:
+                    ultimo_negador = i
+                    continue
+                negado = i - ultimo_negador <= self._janela
+                if negado:
+                    # a negação vale só para o primeiro termo após o negador
+                    ultimo_negador = -self._janela - 1
+                if termo in positivos:
+                    (vistos_neg if negado else vistos_pos)[(termo, 0)] = positivos[termo]
+                if termo in negativos:
+                    (vistos_pos if negado else vistos_neg)[(termo, 1)] = negativos[termo]
+        return sum(vistos_pos.values()), sum(vistos_neg.values())
+
+    def score(self, texto):
+        if not texto:
+            return 0.0
+        pos, neg = self._pontuar(texto)
+        total = pos + neg
+        if total == 0:
+            return 0.0
+        return max(-1.0, min(1.0, (pos - neg) / total))
+
+    def score_many(self, textos):
+        """Pontua uma sequência de textos; textos repetidos são pontuados uma vez."""
+        textos = list(textos)
+        scores = {t: self.score(t) for t in dict.fromkeys(textos)}
+        return list(map(scores.__getitem__, textos))
+
+    def has_negative(self, texto):
+        return bool(texto) and self._pontuar(texto)[1] > 0
+
+
+LEXICO_PADRAO = SentimentLexicon()
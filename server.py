@@ -4,37 +4,49 @@ Versão canônica do servidor para uso local e em contêiner.
 Mensagens expostas ao usuário estão em pt-BR.
 """
 
+import cProfile
+from concurrent import futures
 from datetime import datetime, timedelta
 from functools import wraps
+import hashlib
+import mimetypes
 import os
-import subprocess
+import random
+import re
+import time
 import traceback
+import uuid
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_from_directory
 from flask_cors import CORS
+from werkzeug.security import safe_join
+
+import auth
+import database
+import deliverables
+import job_queue
+import metricas
+import migrations
+import painel
 
 try:
     import jwt
 except Exception:
     jwt = None
 
-try:
-    from setup_project import verify_password
-except Exception:
-    def verify_password(plain, hashed):
-        try:
-            import hashlib
-            return hashlib.sha256(plain.encode('utf-8')).hexdigest() == hashed
-        except Exception:
-            return False
-
-
 app = Flask(__name__, static_folder='web', static_url_path='/')
 CORS(app)
 
 ROOT = os.path.dirname(os.path.abspath(__file__))
-DB = os.path.join(ROOT, 'ai_sales_copilot.db')
-DELIVERABLES_DIR = os.path.join(ROOT, 'deliverables')
+# Sobrescrevíveis por variável de ambiente (ex.: teste de carga em banco temporário).
+DB = os.environ.get('COPILOT_DB') or os.path.join(ROOT, 'ai_sales_copilot.db')
+DELIVERABLES_DIR = os.environ.get('COPILOT_DELIVERABLES') or os.path.join(ROOT, 'deliverables')
+DELIVERABLES_POR_PAGINA = 100
+DELIVERABLES_POR_PAGINA_MAX = 1000
+
+# O import não escreve no banco: o schema é migrado antes de servir, pelo
+# hook `on_starting` do gunicorn.conf.py (uma vez, no master), por
+# `python3 migrations.py --db ...` no deploy ou no `__main__` abaixo.
 
 JWT_SECRET = os.environ.get('JWT_SECRET', 'please-change-this-secret')
 JWT_ALGORITHM = 'HS256'
@@ -43,25 +55,108 @@ JWT_ALGORITHM = 'HS256'
 try:
     import seed_fixtures
     import automation_module
+    import campanha
     import wellbeing_module
 except Exception:
     seed_fixtures = None
     automation_module = None
+    campanha = None
     wellbeing_module = None
 
 
+# Profiler opt-in: com PROFILER_HABILITADO=1, requisições com o cabeçalho
+# `X-Profile: 1` (ou sorteadas com probabilidade PROFILER_AMOSTRAGEM) rodam
+# sob cProfile e o resultado vai para PROFILER_DIR (abrir com pstats/snakeviz)
+# quando a requisição levar pelo menos PROFILER_MIN_MS.
+PROFILER_HABILITADO = os.environ.get('PROFILER_HABILITADO') == '1'
+PROFILER_AMOSTRAGEM = float(os.environ.get('PROFILER_AMOSTRAGEM', 0))
+PROFILER_MIN_MS = float(os.environ.get('PROFILER_MIN_MS', 0))
+PROFILER_DIR = os.environ.get('PROFILER_DIR') or os.path.join(ROOT, 'outputs', 'profiles')
+# Inclui o traceback nas respostas 500 (sempre incluído com debug=True).
+EXPOR_TRACE = os.environ.get('EXPOR_TRACE') == '1'
+
+database.observar_consultas(metricas.consulta_sqlite)
+
+
+def _rota():
+    return request.url_rule.rule if request.url_rule else 'sem_rota'
+
+
+@app.before_request
+def _iniciar_instrumentacao():
+    g.inicio = time.perf_counter()
+    metricas.iniciar_requisicao()
+    metricas.ajustar('http_requisicoes_em_andamento', 1, rota=_rota())
+    g.em_andamento = True
+    if PROFILER_HABILITADO and (request.headers.get('X-Profile') == '1' or random.random() < PROFILER_AMOSTRAGEM):
+        g.perfil = cProfile.Profile()
+        g.perfil.enable()
+
+
+@app.after_request
+def _registrar_tempo(resp):
+    inicio = g.get('inicio')
+    if inicio is None:
+        return resp
+    segundos = time.perf_counter() - inicio
+    rota = _rota()
+    consultas, segundos_db = metricas.finalizar_requisicao()
+    metricas.observar('http_requisicoes_segundos', segundos, metodo=request.method, rota=rota, status=resp.status_code)
+    metricas.incrementar('sqlite_consultas_por_rota_total', consultas, rota=rota)
+    metricas.incrementar('sqlite_segundos_por_rota_total', segundos_db, rota=rota)
+    if resp.status_code >= 500:
+        metricas.incrementar('http_erros_total', rota=rota, status=resp.status_code)
+    resp.headers['Server-Timing'] = (
+        f'app;dur={segundos * 1000:.1f}, db;dur={segundos_db * 1000:.1f};desc="{consultas} consultas"'
+    )
+    return resp
+
+
+@app.teardown_request
+def _finalizar_instrumentacao(_erro):
+    if g.pop('em_andamento', False):
+        metricas.ajustar('http_requisicoes_em_andamento', -1, rota=_rota())
+    perfil = g.pop('perfil', None)
+    if perfil is None:
+        return
+    perfil.disable()
+    ms = (time.perf_counter() - g.inicio) * 1000
+    if ms < PROFILER_MIN_MS:
+        return
+    os.makedirs(PROFILER_DIR, exist_ok=True)
+    rota = re.sub(r'[^A-Za-z0-9_-]+', '_', _rota()).strip('_') or 'raiz'
+    nome = f'{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}-{request.method}-{rota}-{ms:.0f}ms.prof'
+    perfil.dump_stats(os.path.join(PROFILER_DIR, nome))
+
+
+def _erro_interno(e):
+    app.logger.exception('Erro em %s %s', request.method, request.path)
+    corpo = {'ok': False, 'error': str(e)}
+    if app.debug or EXPOR_TRACE:
+        corpo['trace'] = traceback.format_exc()
+    return jsonify(corpo), 500
+
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(metricas.prometheus(), mimetype='text/plain; version=0.0.4')
+
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         if jwt is None:
             return f(*args, **kwargs)
-        auth = request.headers.get('Authorization', '')
-        if not auth.startswith('Bearer '):
+        cabecalho = request.headers.get('Authorization', '')
+        if not cabecalho.startswith('Bearer '):
             return jsonify({'ok': False, 'error': 'Autenticação requerida'}), 401
-        token = auth.split(' ', 1)[1].strip()
+        token = cabecalho.split(' ', 1)[1].strip()
         try:
-            payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+            payload = auth.decodificar_token(token, JWT_SECRET, JWT_ALGORITHM, DB)
             request.user = payload
+            request.token = token
+        except auth.TokenRevogado:
+            return jsonify({'ok': False, 'error': 'Token revogado'}), 401
         except jwt.ExpiredSignatureError:
             return jsonify({'ok': False, 'error': 'Token expirado'}), 401
         except Exception:
@@ -88,32 +183,24 @@ def api_login():
         return jsonify({'ok': False, 'error': 'A senha é obrigatória'}), 400
 
     try:
-        import sqlite3
-
-        conn = sqlite3.connect(DB)
-        cur = conn.cursor()
-        cur.execute(
-            'SELECT id_funcionario, nome, cargo, senha_hash '
-            'FROM FUNCIONARIOS WHERE nome = ?',
-            (nome,),
-        )
-        row = cur.fetchone()
-        conn.close()
-
+        row = auth.buscar_usuario(nome, DB)
         if not row:
             return jsonify({'ok': False, 'error': 'Usuário não encontrado'}), 404
 
-        uid, uname, cargo, stored_hash = row
+        uid, uname, cargo, _ = row
 
-        if stored_hash and verify_password(senha, stored_hash):
+        if auth.verificar(row, senha, DB):
             if jwt is None:
                 token = None
             else:
                 payload = {
-                    'sub': uid,
+                    # PyJWT >= 2.10 exige `sub` como string.
+                    'sub': str(uid),
                     'nome': uname,
                     'cargo': cargo,
                     'exp': datetime.utcnow() + timedelta(hours=1),
+                    # Identificador único: o logout revoga só esta sessão.
+                    'jti': uuid.uuid4().hex,
                 }
                 token = jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
                 if isinstance(token, bytes):
@@ -127,8 +214,26 @@ def api_login():
             return jsonify(resp)
 
         return jsonify({'ok': False, 'error': 'Credenciais inválidas'}), 401
+    except auth.ServidorOcupado as e:
+        return jsonify({'ok': False, 'error': str(e)}), 503
     except Exception as e:
-        return jsonify({'ok': False, 'error': str(e), 'trace': traceback.format_exc()}), 500
+        return _erro_interno(e)
+
+
+@app.route('/api/logout', methods=['POST'])
+@token_required
+def api_logout():
+    if jwt is not None:
+        auth.revogar(request.token, request.user['exp'], DB)
+    return jsonify({'ok': True})
+
+
+@app.route('/api/metrics', methods=['GET'])
+@token_required
+def api_metrics():
+    return jsonify({
+        'ok': True, 'pid': os.getpid(), 'metricas': auth.metricas(), 'requisicoes': metricas.tempos(),
+    })
 
 
 @app.route('/api/seed', methods=['POST'])
@@ -140,30 +245,252 @@ def api_seed():
         seed_fixtures.seed()
         return jsonify({'ok': True, 'message': 'Seed executado'})
     except Exception as e:
-        return jsonify({'ok': False, 'error': str(e), 'trace': traceback.format_exc()}), 500
+        return _erro_interno(e)
+
+
+WELLBEING_BATCH_MAX = int(os.environ.get('WELLBEING_BATCH_MAX', 5000))
+
+
+@app.route('/api/wellbeing/batch', methods=['POST'])
+@token_required
+def api_wellbeing_batch():
+    data = request.json or {}
+    registros = data.get('registros')
+    if not isinstance(registros, list) or not registros:
+        return jsonify({'ok': False, 'error': 'Informe a lista "registros"'}), 400
+    if len(registros) > WELLBEING_BATCH_MAX:
+        return jsonify({'ok': False, 'error': f'Máximo de {WELLBEING_BATCH_MAX} registros por lote'}), 413
+
+    try:
+        if wellbeing_module is None:
+            raise RuntimeError('Módulo de wellbeing não disponível')
+
+        resultados = [None] * len(registros)
+        validos = []
+        posicoes = []
+        for i, item in enumerate(registros):
+            item = item if isinstance(item, dict) else {}
+            uid = item.get('id_funcionario')
+            problema = item.get('problema')
+            if not isinstance(uid, int) or isinstance(uid, bool) or not isinstance(problema, str):
+                resultados[i] = {'ok': False, 'error': 'Registro inválido: id_funcionario e problema são obrigatórios'}
+                continue
+            validos.append((uid, problema, bool(item.get('pontualidade_ok', True))))
+            posicoes.append(i)
+
+        for i, res in zip(posicoes, wellbeing_module.registrar_logs_em_lote(validos, db_path=DB)):
+            if res is None:
+                resultados[i] = {'ok': False, 'error': 'Funcionário não encontrado'}
+            else:
+                resultados[i] = {'ok': True, **res}
+
+        registrados = sum(1 for r in resultados if r['ok'])
+        return jsonify({'ok': True, 'registrados': registrados, 'resultados': resultados})
+    except Exception as e:
+        return _erro_interno(e)
+
+
+def _enfileirar(tipo, payload):
+    try:
+        id_job = job_queue.enfileirar(tipo, payload, DB)
+        return jsonify({'ok': True, 'job_id': id_job, 'status': 'queued', 'status_url': f'/api/jobs/{id_job}'}), 202
+    except Exception as e:
+        return _erro_interno(e)
+
+
+@app.route('/api/proposals', methods=['POST'])
+@app.route('/api/generate_proposal', methods=['POST'])
+@token_required
+def api_enqueue_proposal():
+    data = request.json or {}
+    try:
+        payload = {
+            'id_cliente': int(data['id_cliente']),
+            'valor': float(data['valor']),
+            'id_responsavel': int(data['id_responsavel']),
+        }
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'ok': False, 'error': 'Informe id_cliente, valor e id_responsavel'}), 400
+    return _enfileirar('proposta_comercial', payload)
+
+
+PROPOSTAS_BATCH_MAX = int(os.environ.get('PROPOSTAS_BATCH_MAX', 50000))
+
+
+@app.route('/api/proposals/batch', methods=['POST'])
+@token_required
+def api_proposals_batch():
+    """Campanha de propostas (lista explícita ou filtro sobre CLIENTES), processada como job."""
+    data = request.json or {}
+    if campanha is None:
+        return _erro_interno(RuntimeError('Módulo de campanhas não disponível'))
+    if 'propostas' in data:
+        propostas = data['propostas']
+        if not isinstance(propostas, list) or not propostas:
+            return jsonify({'ok': False, 'error': 'Informe a lista "propostas"'}), 400
+        if len(propostas) > PROPOSTAS_BATCH_MAX:
+            return jsonify({'ok': False, 'error': f'Máximo de {PROPOSTAS_BATCH_MAX} propostas por lote'}), 413
+        payload = {'propostas': propostas}
+    else:
+        filtro = data.get('filtro') or {}
+        try:
+            if not isinstance(filtro, dict):
+                raise TypeError
+            campanha.validar_filtro(filtro)
+            payload = {'filtro': filtro, 'valor': float(data['valor'])}
+            if data.get('id_responsavel') is not None:
+                payload['id_responsavel'] = int(data['id_responsavel'])
+        except (KeyError, TypeError, ValueError):
+            return jsonify({
+                'ok': False,
+                'error': f'Informe "propostas" ou "valor" com "filtro" opcional ({", ".join(campanha.FILTROS)})',
+            }), 400
+    if data.get('processos') is not None:
+        try:
+            payload['processos'] = max(1, int(data['processos']))
+        except (TypeError, ValueError):
+            return jsonify({'ok': False, 'error': '"processos" deve ser inteiro'}), 400
+    return _enfileirar('campanha_propostas', payload)
+
+
+@app.route('/api/run_report', methods=['POST'])
+@token_required
+def api_run_report():
+    # Os PNGs vão para deliverables/, prontos para download.
+    return _enfileirar('relatorio_gerencial', {'destino': DELIVERABLES_DIR})
+
+
+# Orçamento de latência do registro síncrono de wellbeing.
+WELLBEING_ORCAMENTO_MS = float(os.environ.get('WELLBEING_ORCAMENTO_MS', 500))
+_wellbeing_pool = futures.ThreadPoolExecutor(
+    max_workers=int(os.environ.get('WELLBEING_WORKERS', 4)), thread_name_prefix='wellbeing'
+)
+
+
+@app.route('/api/register_wellbeing', methods=['POST'])
+@token_required
+def api_register_wellbeing():
+    data = request.json or {}
+    uid = data.get('id_funcionario')
+    problema = data.get('problema')
+    if not isinstance(uid, int) or isinstance(uid, bool) or not isinstance(problema, str) or not problema.strip():
+        return jsonify({'ok': False, 'error': 'Informe id_funcionario e problema'}), 400
+    if wellbeing_module is None:
+        return jsonify({'ok': False, 'error': 'Módulo de wellbeing não disponível'}), 500
+
+    futuro = _wellbeing_pool.submit(
+        wellbeing_module.registrar_log_estresse_e_pontuar, uid, problema, bool(data.get('pontualidade_ok', True)),
+        db_path=DB,
+    )
+    try:
+        res = futuro.result(timeout=WELLBEING_ORCAMENTO_MS / 1000)
+    except futures.TimeoutError:
+        # O registro continua em segundo plano; reenviar criaria um log duplicado.
+        return jsonify({
+            'ok': True, 'status': 'processando',
+            'message': 'Registro aceito; a conclusão excedeu o orçamento de latência e segue em segundo plano',
+        }), 202
+    except Exception as e:
+        return _erro_interno(e)
+    if res is None:
+        return jsonify({'ok': False, 'error': 'Funcionário não encontrado'}), 404
+    return jsonify({'ok': True, **res})
+
+
+@app.route('/api/jobs/<int:id_job>', methods=['GET'])
+@token_required
+def api_job_status(id_job):
+    job = job_queue.status(id_job, DB)
+    if job is None:
+        return jsonify({'ok': False, 'error': 'Job não encontrado'}), 404
+    return jsonify({'ok': True, 'job': job})
 
 
 @app.route('/api/deliverables', methods=['GET'])
 @token_required
 def api_deliverables():
+    pagina = request.args.get('pagina', 1, type=int)
+    por_pagina = request.args.get('por_pagina', DELIVERABLES_POR_PAGINA, type=int)
+    if pagina < 1 or not 1 <= por_pagina <= DELIVERABLES_POR_PAGINA_MAX:
+        return jsonify({
+            'ok': False, 'error': f'Use pagina >= 1 e por_pagina entre 1 e {DELIVERABLES_POR_PAGINA_MAX}',
+        }), 400
+    try:
+        itens, total = deliverables.listar(DELIVERABLES_DIR, pagina, por_pagina)
+        return jsonify({
+            'ok': True,
+            'files': [i['nome'] for i in itens],
+            'itens': itens,
+            'total': total,
+            'pagina': pagina,
+            'por_pagina': por_pagina,
+        })
+    except Exception as e:
+        return _erro_interno(e)
+
+
+def _resposta_painel(dados, *chave):
+    # ETag = versão dos dados do painel + parâmetros: quem faz polling recebe
+    # 304 enquanto nada mudou.
+    resp = jsonify({'ok': True, **dados})
+    resp.set_etag(hashlib.sha256('\0'.join([dados['versao'], *map(str, chave)]).encode()).hexdigest()[:32])
+    resp.cache_control.private = True
+    resp.cache_control.no_cache = True
+    return resp.make_conditional(request)
+
+
+@app.route('/api/leaderboard', methods=['GET'])
+@token_required
+def api_leaderboard():
+    limite = request.args.get('limite', 10, type=int)
+    cargo = request.args.get('cargo') or None
+    if not 1 <= limite <= painel.RANKING_MAX:
+        return jsonify({'ok': False, 'error': f'Use limite entre 1 e {painel.RANKING_MAX}'}), 400
+    try:
+        return _resposta_painel({**painel.leaderboard(limite, cargo, DB), 'limite': limite, 'cargo': cargo},
+                                limite, cargo or '')
+    except Exception as e:
+        return _erro_interno(e)
+
+
+@app.route('/api/dashboard', methods=['GET'])
+@token_required
+def api_dashboard():
     try:
-        if not os.path.exists(DELIVERABLES_DIR):
-            return jsonify({'ok': True, 'files': []})
-        files = os.listdir(DELIVERABLES_DIR)
-        files = [f for f in files if os.path.isfile(os.path.join(DELIVERABLES_DIR, f))]
-        return jsonify({'ok': True, 'files': files})
+        return _resposta_painel(painel.dashboard(DB))
     except Exception as e:
-        return jsonify({'ok': False, 'error': str(e), 'trace': traceback.format_exc()}), 500
+        return _erro_interno(e)
 
 
 @app.route('/deliverables/<path:filename>')
 @token_required
 def download_deliverable(filename):
-    if not os.path.exists(DELIVERABLES_DIR):
-        return jsonify({'ok': False, 'error': 'Arquivo não encontrado'}), 404
-    return send_from_directory(DELIVERABLES_DIR, filename, as_attachment=True)
+    nome, codificacao, entrada = deliverables.escolher_variante(
+        filename, request.headers.get('Accept-Encoding'), DELIVERABLES_DIR
+    )
+    if entrada is None:
+        # O índice cobre só o topo do diretório: arquivos em subpastas saem
+        # direto do disco, sem ETag do índice nem variante comprimida.
+        caminho = safe_join(DELIVERABLES_DIR, filename) if '/' in filename else None
+        if caminho is None or not os.path.isfile(caminho):
+            return jsonify({'ok': False, 'error': 'Arquivo não encontrado'}), 404
+        return send_from_directory(DELIVERABLES_DIR, filename, as_attachment=True)
+    # ETag forte (sha256 do arquivo enviado) + Last-Modified: o Werkzeug
+    # responde 304 a If-None-Match/If-Modified-Since e 206 a Range.
+    resp = send_from_directory(
+        DELIVERABLES_DIR, nome, as_attachment=True, download_name=filename,
+        mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+        etag=entrada['hash'], last_modified=entrada['mtime'], conditional=True, max_age=None,
+    )
+    if codificacao:
+        resp.headers['Content-Encoding'] = codificacao
+    resp.vary.add('Accept-Encoding')
+    resp.cache_control.private = True
+    resp.cache_control.no_cache = True
+    return resp
 
 
 if __name__ == '__main__':
+    migrations.migrar(DB)
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=True)
@@ -1,8 +1,16 @@
+import os
 import sqlite3
 from datetime import date
 
+import database
+import migrations
+
 DB_NAME = 'ai_sales_copilot.db'
 
+# Custo do bcrypt (2^rounds iterações). Hashes com outro custo são
+# regravados no próximo login bem-sucedido (ver `auth.py`).
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+
 try:
     import bcrypt
 except Exception:
@@ -17,7 +25,7 @@ def hash_password(senha: str) -> str:
     digest is returned for compatibility.
     """
     if bcrypt is not None:
-        hashed = bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt())
+        hashed = bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS))
         return hashed.decode('utf-8')
     import hashlib
 
@@ -42,105 +50,40 @@ def verify_password(plain: str, hashed: str) -> bool:
     return hashlib.sha256(plain.encode('utf-8')).hexdigest() == hashed
 
 
+def needs_rehash(hashed: str) -> bool:
+    """True when a stored hash should be replaced by a bcrypt hash at BCRYPT_ROUNDS.
+
+    Legacy sha256 hex digests and bcrypt hashes with a different cost both
+    qualify. Without bcrypt nothing is rehashed.
+    """
+    if bcrypt is None or not hashed:
+        return False
+    if not hashed.startswith(('$2', '$y$', '$b$')):
+        return True
+    try:
+        return int(hashed.split('$')[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
 def setup_database():
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute(
-        """
-        CREATE TABLE IF NOT EXISTS FUNCIONARIOS (
-            id_funcionario INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL,
-            cargo TEXT NOT NULL,
-            senha_hash TEXT,
-            pontos_gamificacao INTEGER DEFAULT 0,
-            tempo_operacional_manual REAL DEFAULT 180,
-            tempo_reduzido_copilot REAL DEFAULT 0,
-            nivel_estresse_agregado REAL DEFAULT 0.0
-        )
-        """
-    )
-    c.execute(
-        """
-        CREATE TABLE IF NOT EXISTS CLIENTES (
-            id_cliente INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome_empresa TEXT NOT NULL,
-            cnpj TEXT UNIQUE,
-            decisor_nome TEXT,
-            decisor_email TEXT,
-            data_cadastro DATE,
-            responsavel_vendas INTEGER
-        )
-        """
-    )
-    c.execute(
-        """
-        CREATE TABLE IF NOT EXISTS PROPOSTAS (
-            id_proposta INTEGER PRIMARY KEY AUTOINCREMENT,
-            id_cliente INTEGER,
-            tipo TEXT,
-            valor_total REAL,
-            data_criacao DATETIME DEFAULT CURRENT_TIMESTAMP,
-            caminho_arquivo TEXT,
-            FOREIGN KEY(id_cliente) REFERENCES CLIENTES(id_cliente)
-        )
-        """
-    )
-    c.execute(
-        """
-        CREATE TABLE IF NOT EXISTS ATIVIDADES (
-            id_atividade INTEGER PRIMARY KEY AUTOINCREMENT,
-            id_funcionario INTEGER,
-            descricao TEXT,
-            data_vencimento DATE,
-            status TEXT DEFAULT 'PENDENTE',
-            FOREIGN KEY(id_funcionario) REFERENCES FUNCIONARIOS(id_funcionario)
-        )
-        """
-    )
-    c.execute(
-        """
-        CREATE TABLE IF NOT EXISTS LOG_ESTRESSE (
-            id_log INTEGER PRIMARY KEY AUTOINCREMENT,
-            id_funcionario INTEGER,
-            data_registro DATETIME DEFAULT CURRENT_TIMESTAMP,
-            descricao_problema TEXT,
-            score_sentimento REAL,
-            sugestao_ia TEXT,
-            pontos INTEGER DEFAULT 0,
-            FOREIGN KEY(id_funcionario) REFERENCES FUNCIONARIOS(id_funcionario)
-        )
-        """
-    )
-    c.execute(
-        """
-        CREATE TABLE IF NOT EXISTS DATASET_TREINAMENTO (
-            id_dado INTEGER PRIMARY KEY AUTOINCREMENT,
-            texto_problema TEXT NOT NULL,
-            label_estresse INTEGER NOT NULL
-        )
-        """
-    )
-    conn.commit()
-    conn.close()
+    """Cria ou atualiza o schema do banco (ver `migrations.py`)."""
+    migrations.migrar(DB_NAME)
 
 
 def add_employee_securely(nome, cargo, senha):
     senha_hash = hash_password(senha)
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
     try:
-        c.execute("INSERT INTO FUNCIONARIOS (nome, cargo, senha_hash) VALUES (?, ?, ?)", (nome, cargo, senha_hash))
-        conn.commit()
+        with database.transaction(DB_NAME) as conn:
+            c = conn.execute(
+                "INSERT INTO FUNCIONARIOS (nome, cargo, senha_hash) VALUES (?, ?, ?)", (nome, cargo, senha_hash)
+            )
         return c.lastrowid
     except sqlite3.IntegrityError:
         return None
-    finally:
-        conn.close()
 
 
 def insert_client(nome_empresa, cnpj, decisor_nome, decisor_email, responsavel_vendas_id=None):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
     try:
         insert_sql = (
             "INSERT INTO CLIENTES (nome_empresa, cnpj, decisor_nome, decisor_email, data_cadastro, responsavel_vendas) "
@@ -154,13 +97,11 @@ def insert_client(nome_empresa, cnpj, decisor_nome, decisor_email, responsavel_v
             date.today().isoformat(),
             responsavel_vendas_id,
         )
-        c.execute(insert_sql, params)
-        conn.commit()
+        with database.transaction(DB_NAME) as conn:
+            c = conn.execute(insert_sql, params)
         return c.lastrowid
     except sqlite3.IntegrityError:
         return None
-    finally:
-        conn.close()
 
 
 def populate_training_data():
@@ -172,17 +113,13 @@ def populate_training_data():
         ("Perdendo muito tempo com relatórios manuais.", 1),
         ("A automação ajudou e aumentou minha produtividade.", 0),
     ]
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("SELECT COUNT(*) FROM DATASET_TREINAMENTO")
-    if c.fetchone()[0] == 0:
-        insert_sql = (
-            "INSERT INTO DATASET_TREINAMENTO (texto_problema, label_estresse) "
-            "VALUES (?, ?)"
-        )
-        c.executemany(insert_sql, samples)
-        conn.commit()
-    conn.close()
+    with database.transaction(DB_NAME) as conn:
+        if conn.execute("SELECT COUNT(*) FROM DATASET_TREINAMENTO").fetchone()[0] == 0:
+            insert_sql = (
+                "INSERT INTO DATASET_TREINAMENTO (texto_problema, label_estresse) "
+                "VALUES (?, ?)"
+            )
+            conn.executemany(insert_sql, samples)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,169 @@
+"""Classificador de estresse treinado a partir de DATASET_TREINAMENTO.
+
+Bag-of-words com hashing (unigramas e bigramas, `zlib.crc32` para ser
+estável entre processos) + regressão logística treinada com gradiente em
+NumPy. O modelo é salvo em um arquivo `.npz` versionado e carregado uma vez
+por processo (`carregar_modelo`); sem o arquivo (ex.: checkout novo, `models/`
+não é versionado) ele é treinado do banco e salvo no primeiro uso. O score
+segue o contrato do léxico:
+`1 - 2 * P(estresse)`, em [-1, 1] (estresse -> negativo).
+
+Uso:
+    python stress_model.py            # treina a partir do banco e salva
+"""
+
+from datetime import datetime
+import os
+import re
+import threading
+import zlib
+
+import database
+from sentiment_lexicon import normalizar
+
+DB_PATH = 'ai_sales_copilot.db'
+MODEL_PATH = os.path.join('models', 'stress_model.npz')
+
+# Incrementar quando o layout do arquivo ou as features mudarem.
+FORMATO_MODELO = 1
+DIMENSAO = 2 ** 16
+
+_PALAVRA = re.compile(r'\w+')
+
+_lock = threading.Lock()
+# {caminho absoluto do arquivo: StressClassifier}
+_modelos = {}
+
+
+def _tokens(texto):
+    palavras = _PALAVRA.findall(normalizar(texto or ''))
+    return palavras + [f'{a} {b}' for a, b in zip(palavras, palavras[1:])]
+
+
+def _hash(token, dimensao):
+    return zlib.crc32(token.encode('utf-8')) % dimensao
+
+
+def _features(textos, dimensao):
+    """Retorna (linhas, colunas) da matriz esparsa binária textos x buckets."""
+    import numpy as np
+
+    linhas = []
+    colunas = []
+    for i, texto in enumerate(textos):
+        buckets = {_hash(t, dimensao) for t in _tokens(texto)}
+        linhas.extend([i] * len(buckets))
+        colunas.extend(buckets)
+    return np.asarray(linhas, dtype=np.int64), np.asarray(colunas, dtype=np.int64)
+
+
+class StressClassifier:
+    def __init__(self, pesos, bias=0.0, versao=None, n_amostras=0):
+        self.pesos = pesos
+        self.bias = float(bias)
+        self.versao = versao or datetime.now().strftime('%Y%m%d%H%M%S')
+        self.n_amostras = int(n_amostras)
+
+    @property
+    def dimensao(self):
+        return len(self.pesos)
+
+    def predict_proba(self, textos):
+        """P(estresse) para cada texto, em uma única chamada vetorizada."""
+        import numpy as np
+
+        textos = list(textos)
+        linhas, colunas = _features(textos, self.dimensao)
+        z = np.bincount(linhas, weights=self.pesos[colunas], minlength=len(textos)) + self.bias
+        return 1.0 / (1.0 + np.exp(-z))
+
+    def score_many(self, textos):
+        return (1.0 - 2.0 * self.predict_proba(textos)).tolist()
+
+    def score(self, texto):
+        return self.score_many([texto])[0]
+
+    def save(self, path=MODEL_PATH):
+        import numpy as np
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = f'{path}.tmp.npz'
+        np.savez_compressed(
+            tmp,
+            formato=FORMATO_MODELO,
+            versao=self.versao,
+            pesos=self.pesos,
+            bias=self.bias,
+            n_amostras=self.n_amostras,
+        )
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        import numpy as np
+
+        with np.load(path) as dados:
+            formato = int(dados['formato'])
+            if formato != FORMATO_MODELO:
+                raise ValueError(
+                    f'Modelo {path} tem formato {formato}; esperado {FORMATO_MODELO}. Treine novamente.'
+                )
+            return cls(dados['pesos'], float(dados['bias']), str(dados['versao']), int(dados['n_amostras']))
+
+
+def treinar_textos(textos, labels, dimensao=DIMENSAO, epocas=300, taxa=0.5, l2=1e-4):
+    """Treina a regressão logística por gradiente descendente (batch)."""
+    import numpy as np
+
+    textos = list(textos)
+    y = np.asarray(labels, dtype=np.float64)
+    if len(textos) == 0 or len(textos) != len(y):
+        raise ValueError('Informe textos e labels não vazios e de mesmo tamanho')
+    linhas, colunas = _features(textos, dimensao)
+    n = len(textos)
+    pesos = np.zeros(dimensao)
+    bias = 0.0
+    for _ in range(epocas):
+        z = np.bincount(linhas, weights=pesos[colunas], minlength=n) + bias
+        erro = 1.0 / (1.0 + np.exp(-z)) - y
+        grad = np.bincount(colunas, weights=erro[linhas], minlength=dimensao) / n
+        pesos -= taxa * (grad + l2 * pesos)
+        bias -= taxa * erro.mean()
+    return StressClassifier(pesos, bias, n_amostras=n)
+
+
+def treinar(db_path=None, path=MODEL_PATH, **kwargs):
+    """Treina a partir de DATASET_TREINAMENTO e salva o modelo em `path`."""
+    db_path = db_path or DB_PATH
+    with database.connection(db_path) as conn:
+        dados = conn.execute('SELECT texto_problema, label_estresse FROM DATASET_TREINAMENTO').fetchall()
+    if not dados:
+        raise RuntimeError(
+            f'DATASET_TREINAMENTO vazio em {db_path}: popule o banco (python3 setup_project.py) '
+            'antes de treinar o modelo de estresse'
+        )
+    modelo = treinar_textos([d[0] for d in dados], [d[1] for d in dados], **kwargs)
+    modelo.save(path)
+    return modelo
+
+
+def carregar_modelo(path=MODEL_PATH, db_path=None):
+    """Modelo de `path` compartilhado no processo, carregado do disco no primeiro uso.
+
+    Se `path` não existe, treina a partir de `db_path` e salva em `path`.
+    """
+    chave = os.path.abspath(path)
+    modelo = _modelos.get(chave)
+    if modelo is None:
+        with _lock:
+            modelo = _modelos.get(chave)
+            if modelo is None:
+                modelo = StressClassifier.load(path) if os.path.exists(path) else treinar(db_path, path)
+                _modelos[chave] = modelo
+    return modelo
+
+
+if __name__ == '__main__':
+    m = treinar()
+    print(f'Modelo {m.versao} treinado com {m.n_amostras} amostras -> {MODEL_PATH}')
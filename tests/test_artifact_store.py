@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+import artifact_store
+import automation_module
+import database
+import setup_project
+
+
+@pytest.fixture
+def db_temporario(tmp_path, monkeypatch):
+    db = str(tmp_path / 'teste.db')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(setup_project, 'DB_NAME', db)
+    monkeypatch.setattr(automation_module, 'DB_PATH', db)
+    setup_project.setup_database()
+    uid = setup_project.add_employee_securely('Maria SDR', 'SDR', 'senha')
+    cid = setup_project.insert_client('ACME Ltda', '00.000.000/0001-00', 'Alice', 'alice@acme.com', uid)
+    return db, uid, cid
+
+
+def test_mesmas_entradas_reaproveitam_artefato(db_temporario):
+    db, uid, cid = db_temporario
+    chamadas = []
+
+    def renderizar():
+        chamadas.append(1)
+        return b'conteudo'
+
+    a = artifact_store.obter_ou_criar('teste', {'x': 1}, renderizar, '.txt', db)
+    b = artifact_store.obter_ou_criar('teste', {'x': 1}, renderizar, '.txt', db)
+    assert a == b and len(chamadas) == 1
+    # Conteúdo idêntico por outra chave cai no mesmo blob.
+    assert artifact_store.guardar(b'conteudo', '.txt', db) == a
+
+    p1 = automation_module.gerar_proposta_comercial(cid, 1000, uid)
+    p2 = automation_module.gerar_proposta_comercial(cid, 1000, uid)
+    assert p1 == p2 and p1.startswith(artifact_store.STORE_DIR)
+    assert automation_module.generate_bpmn_diagram('Fluxo', 'api') == automation_module.generate_bpmn_diagram(
+        'Fluxo', 'integracao'
+    )
+
+
+def test_refcount_e_coleta_de_lixo(db_temporario):
+    db, uid, cid = db_temporario
+    caminho = automation_module.gerar_proposta_comercial(cid, 1000, uid)
+    automation_module.gerar_proposta_comercial(cid, 1000, uid)
+    solto = automation_module.gerar_cronograma_implementacao(cid, '2025-01-06')
+
+    def refcount():
+        with database.connection(db) as conn:
+            return conn.execute('SELECT refcount FROM ARTEFATOS WHERE caminho = ?', (caminho,)).fetchone()[0]
+
+    assert refcount() == 2
+    with database.transaction(db) as conn:
+        conn.execute("UPDATE ARTEFATOS SET ultimo_acesso = datetime('now', '-30 days')")
+    assert artifact_store.coletar_lixo(db)['removidos'] == 1
+    assert os.path.exists(caminho) and not os.path.exists(solto)
+
+    with database.transaction(db) as conn:
+        conn.execute('DELETE FROM PROPOSTAS')
+        conn.execute("UPDATE ARTEFATOS SET ultimo_acesso = datetime('now', '-30 days')")
+    assert refcount() == 0
+    assert artifact_store.coletar_lixo(db)['removidos'] == 1
+    assert not os.path.exists(caminho)
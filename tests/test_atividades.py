@@ -0,0 +1,56 @@
+import pytest
+
+import atividades
+import database
+import setup_project
+import wellbeing_module
+
+
+@pytest.fixture
+def db_temporario(tmp_path, monkeypatch):
+    db = str(tmp_path / 'teste.db')
+    monkeypatch.setattr(setup_project, 'DB_NAME', db)
+    monkeypatch.setattr(wellbeing_module, 'DB_PATH', db)
+    setup_project.setup_database()
+    sdr = setup_project.add_employee_securely('Maria SDR', 'SDR', 'senha')
+    closer = setup_project.add_employee_securely('Carlos Closer', 'Closer', 'senha')
+    return db, sdr, closer
+
+
+def _contadores(db):
+    with database.connection(db) as conn:
+        return conn.execute(
+            'SELECT f.atividades_vencidas, '
+            "(SELECT COUNT(*) FROM ATIVIDADES a WHERE a.id_funcionario = f.id_funcionario AND a.status = 'VENCIDA') "
+            'FROM FUNCIONARIOS f ORDER BY f.id_funcionario'
+        ).fetchall()
+
+
+def test_varredura_em_lotes_mantem_contador_e_pontuacao(db_temporario):
+    db, sdr, closer = db_temporario
+    with database.transaction(db) as conn:
+        conn.executemany(
+            'INSERT INTO ATIVIDADES (id_funcionario, descricao, data_vencimento, status) VALUES (?, ?, ?, ?)',
+            [
+                (sdr, 'Follow-up', '2025-03-01', 'PENDENTE'),
+                (sdr, 'Ligação', '2025-03-09', 'PENDENTE'),
+                (sdr, 'No prazo', '2025-03-10', 'PENDENTE'),
+                (closer, 'Já vencida', '2025-01-01', 'VENCIDA'),
+                (closer, 'Concluída', '2025-01-01', 'CONCLUIDA'),
+                (closer, 'Contrato', '2025-02-01', 'PENDENTE'),
+            ],
+        )
+    assert _contadores(db) == [(0, 0), (1, 1)]
+    # Antes da varredura a pendente atrasada ainda não conta.
+    assert wellbeing_module.registrar_log_estresse_e_pontuar(sdr, 'Dia tranquilo')['pontos'] == 15
+
+    assert atividades.varrer(db, hoje='2025-03-10', lote=2) == 3
+    assert atividades.varrer(db, hoje='2025-03-10') == 0
+    assert _contadores(db) == [(2, 2), (2, 2)]
+    assert wellbeing_module.registrar_log_estresse_e_pontuar(sdr, 'Dia tranquilo')['pontos'] == 5
+
+    with database.transaction(db) as conn:
+        conn.execute("UPDATE ATIVIDADES SET status = 'CONCLUIDA' WHERE id_funcionario = ?", (closer,))
+        conn.execute("UPDATE ATIVIDADES SET id_funcionario = ? WHERE descricao = 'Follow-up'", (closer,))
+        conn.execute("DELETE FROM ATIVIDADES WHERE descricao = 'Ligação'")
+    assert _contadores(db) == [(0, 0), (1, 1)]
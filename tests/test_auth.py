@@ -0,0 +1,75 @@
+import hashlib
+import threading
+import time
+
+import jwt
+import pytest
+
+import auth
+import database
+import setup_project
+
+
+@pytest.fixture
+def db_temporario(tmp_path, monkeypatch):
+    db = str(tmp_path / 'teste.db')
+    monkeypatch.setattr(setup_project, 'DB_NAME', db)
+    monkeypatch.setattr(setup_project, 'BCRYPT_ROUNDS', 4)
+    setup_project.setup_database()
+    legado = hashlib.sha256(b'segredo').hexdigest()
+    with database.transaction(db) as conn:
+        conn.execute("INSERT INTO FUNCIONARIOS (nome, cargo, senha_hash) VALUES ('Ana Legado', 'SDR', ?)", (legado,))
+    auth.invalidar()
+    yield db
+    auth.invalidar()
+
+
+def _hash(db):
+    with database.connection(db) as conn:
+        return conn.execute("SELECT senha_hash FROM FUNCIONARIOS WHERE nome = 'Ana Legado'").fetchone()[0]
+
+
+def test_login_regrava_hash_legado_com_bcrypt(db_temporario):
+    usuario = auth.buscar_usuario('Ana Legado', db_temporario)
+    assert not auth.verificar(usuario, 'errada', db_temporario)
+    assert len(_hash(db_temporario)) == 64
+
+    assert auth.verificar(usuario, 'segredo', db_temporario)
+    novo = _hash(db_temporario)
+    assert novo.startswith('$2') and not setup_project.needs_rehash(novo)
+    # O cache foi invalidado: a próxima busca já traz o hash novo, que continua válido.
+    usuario = auth.buscar_usuario('Ana Legado', db_temporario)
+    assert usuario[3] == novo
+    assert auth.verificar(usuario, 'segredo', db_temporario)
+    assert _hash(db_temporario) == novo
+
+
+def test_cache_de_usuarios_e_fila_limitada(db_temporario, monkeypatch):
+    usuario = auth.buscar_usuario('Ana Legado', db_temporario)
+    with database.transaction(db_temporario) as conn:
+        conn.execute("UPDATE FUNCIONARIOS SET cargo = 'Closer' WHERE nome = 'Ana Legado'")
+    assert auth.buscar_usuario('Ana Legado', db_temporario) == usuario
+    auth.invalidar('Ana Legado')
+    assert auth.buscar_usuario('Ana Legado', db_temporario)[2] == 'Closer'
+    assert auth.buscar_usuario('Ninguém', db_temporario) is None
+
+    monkeypatch.setattr(auth, '_vagas', threading.BoundedSemaphore(1))
+    auth._vagas.acquire()
+    with pytest.raises(auth.ServidorOcupado):
+        auth.verificar(usuario, 'segredo', db_temporario)
+
+
+def test_revogacao_de_outro_processo_invalida_token_em_cache(db_temporario, monkeypatch):
+    monkeypatch.setattr(auth, 'JWT_REVOGACAO_SYNC', 0)
+    token = jwt.encode({'sub': '1', 'exp': int(time.time()) + 60}, 's' * 32, algorithm='HS256')
+    assert auth.decodificar_token(token, 's' * 32, 'HS256', db_temporario)['sub'] == '1'
+    hits = auth.metricas()['jwt_cache_hits']
+    auth.decodificar_token(token, 's' * 32, 'HS256', db_temporario)
+    assert auth.metricas()['jwt_cache_hits'] == hits + 1
+
+    # Simula o logout gravado por outro worker (sem passar pelo cache deste processo).
+    with database.transaction(db_temporario) as conn:
+        conn.execute('INSERT INTO TOKENS_REVOGADOS (digest, expira_em) VALUES (?, ?)',
+                     (auth._digest(token), time.time() + 60))
+    with pytest.raises(auth.TokenRevogado):
+        auth.decodificar_token(token, 's' * 32, 'HS256', db_temporario)
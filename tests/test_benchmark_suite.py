@@ -0,0 +1,28 @@
+import importlib.util
+import os
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _suite():
+    spec = importlib.util.spec_from_file_location('suite', os.path.join(RAIZ, 'benchmarks', 'suite.py'))
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def test_comparar_aponta_regressoes_pelo_sentido_da_metrica():
+    suite = _suite()
+    anterior = {'resultados': {'1000': {
+        'banco': {'geracao_s': 1.0},
+        'sentimento': {'n': 10, 'por_segundo': 1000.0},
+        'api': {'login': {'n': 10, 'mediana_ms': 100.0}, 'deliverables': {'n': 10, 'mediana_ms': 2.0}},
+    }}}
+    atual = {'resultados': {'1000': {
+        'banco': {'geracao_s': 9.0},
+        'sentimento': {'n': 10, 'por_segundo': 800.0},
+        'api': {'login': {'n': 10, 'mediana_ms': 50.0}, 'deliverables': {'n': 10, 'mediana_ms': 2.1}},
+    }}}
+    regressoes = suite.comparar(anterior, atual, tolerancia=0.10)
+    # Menos mensagens/s é piora; login mais rápido não; 5% está na tolerância; geração do banco é ignorada.
+    assert regressoes == ['1000.sentimento.por_segundo']
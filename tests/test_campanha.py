@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+import automation_module
+import campanha
+import database
+import job_queue
+import setup_project
+
+
+@pytest.fixture
+def db_temporario(tmp_path, monkeypatch):
+    db = str(tmp_path / 'teste.db')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(setup_project, 'DB_NAME', db)
+    monkeypatch.setattr(automation_module, 'DB_PATH', db)
+    # Pool mesmo em lotes pequenos.
+    monkeypatch.setattr(automation_module, 'MINIMO_PARA_POOL', 1)
+    setup_project.setup_database()
+    uid = setup_project.add_employee_securely('Maria SDR', 'SDR', 'senha')
+    clientes = [
+        setup_project.insert_client(f'Cliente {i}', f'00.000.000/000{i}-00', 'Alice', 'alice@x.com', uid)
+        for i in range(5)
+    ]
+    return db, uid, clientes
+
+
+def _propostas(db):
+    with database.connection(db) as conn:
+        return conn.execute('SELECT id_cliente, valor_total FROM PROPOSTAS ORDER BY id_cliente').fetchall()
+
+
+def test_campanha_csv_em_pool_com_falhas(db_temporario, tmp_path, capsys):
+    db, uid, clientes = db_temporario
+    arquivo = tmp_path / 'campanha.csv'
+    linhas = [f'{cid},{1000 + cid},{uid}' for cid in clientes] + ['x,y,z', '999,10,1']
+    arquivo.write_text('id_cliente,valor,id_responsavel\n' + '\n'.join(linhas) + '\n', encoding='utf-8')
+
+    campanha.main(['--csv', str(arquivo), '--processos', '2'])
+    assert '5/7 propostas' in capsys.readouterr().out
+    assert _propostas(db) == [(cid, 1000.0 + cid) for cid in clientes]
+
+    itens, linhas, falhas = campanha.ler_csv(arquivo)
+    relatorio = campanha.executar(itens, linhas, falhas, processos=2)
+    assert relatorio['do_cache'] == 5 and relatorio['renderizadas'] == 0
+    # Falhas apontam o registro de entrada, mesmo depois de um registro descartado.
+    assert [(f['linha'], f.get('id_cliente')) for f in relatorio['falhas']] == [(6, None), (7, 999)]
+    assert relatorio['falhas'][1]['erro'] == 'Cliente nao encontrado'
+
+
+def test_ler_itens_rejeita_registros_que_nao_sao_objeto_ou_lista():
+    itens, linhas, falhas = campanha.ler_itens(['123', {'id_cliente': 1, 'valor': 10, 'id_responsavel': 2}, 7])
+    assert itens == [(1, 10.0, 2)] and linhas == [2]
+    assert [f['linha'] for f in falhas] == [1, 3]
+
+
+def test_campanha_por_filtro_e_job(db_temporario, tmp_path, monkeypatch):
+    db, uid, clientes = db_temporario
+    assert [i[0] for i in campanha.por_filtro(500, {'ids': clientes[:2]}, db_path=db)] == clientes[:2]
+    assert campanha.por_filtro(500, where=f'id_cliente > {clientes[2]}', db_path=db) == [
+        (cid, 500.0, uid) for cid in clientes[3:]
+    ]
+    with pytest.raises(ValueError):
+        campanha.por_filtro(500, {'nome': 'x'}, db_path=db)
+
+    # O job lê e grava no banco da fila, não no padrão do módulo.
+    monkeypatch.setattr(automation_module, 'DB_PATH', str(tmp_path / 'outro.db'))
+    id_job = job_queue.enfileirar(
+        'campanha_propostas', {'filtro': {'responsavel': uid}, 'valor': 750, 'processos': 2}, db
+    )
+    assert job_queue.processar_proximo(db) == id_job
+    job = job_queue.status(id_job, db)
+    assert job['status'] == 'done', json.dumps(job)
+    assert job['resultado']['geradas'] == 5
+    assert _propostas(db) == [(cid, 750.0) for cid in clientes]
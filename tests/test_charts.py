@@ -0,0 +1,28 @@
+import os
+
+import charts
+import setup_project
+
+
+def test_renderizar_usa_cache_por_dados(tmp_path, monkeypatch):
+    db = str(tmp_path / 'teste.db')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(setup_project, 'DB_NAME', db)
+    setup_project.setup_database()
+
+    def specs(kpi):
+        return [
+            charts.grafico_barras('a.png', ['SDR', 'Closer'], [-0.2, 0.1], 'Estresse', 'Cargo', 'Score',
+                                  horizontal=True, linha_zero=True),
+            charts.grafico_barras('b.png', ['SDR', 'Closer'], kpi, 'KPI', 'Cargo', '%', rotulos=True),
+            charts.grafico_linhas('c.png', ['2025-01-01', '2025-01-02'], {'SDR': [0.1, -0.3]}, 'Tendencia',
+                                  'Dia', 'Score'),
+        ]
+
+    assert set(charts.renderizar(specs([10, 20]), db, processos=2).values()) == {'renderizado'}
+    assert all(open(f, 'rb').read(4) == b'\x89PNG' for f in ('a.png', 'b.png', 'c.png'))
+    mtime = os.path.getmtime('a.png')
+    assert charts.renderizar(specs([10, 25]), db, processos=2) == {
+        'a.png': 'cache', 'b.png': 'renderizado', 'c.png': 'cache'
+    }
+    assert os.path.getmtime('a.png') == mtime
@@ -0,0 +1,32 @@
+import pytest
+
+import database
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'test.db')
+    with database.transaction(path) as conn:
+        conn.execute('CREATE TABLE T (id INTEGER PRIMARY KEY, v TEXT)')
+    yield path
+    database.close_all()
+
+
+def test_connection_uses_wal_and_is_pooled(db_path):
+    with database.connection(db_path) as conn:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == database.BUSY_TIMEOUT_MS
+        first = conn
+    with database.connection(db_path) as conn:
+        assert conn is first
+
+
+def test_transaction_rolls_back_on_error(db_path):
+    with pytest.raises(RuntimeError):
+        with database.transaction(db_path) as conn:
+            conn.execute("INSERT INTO T (v) VALUES ('x')")
+            raise RuntimeError('falha')
+    with database.transaction(db_path) as conn:
+        conn.execute("INSERT INTO T (v) VALUES ('y')")
+    with database.connection(db_path) as conn:
+        assert [r[0] for r in conn.execute('SELECT v FROM T')] == ['y']
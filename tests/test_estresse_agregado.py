@@ -0,0 +1,42 @@
+import pytest
+
+import database
+import estresse_agregado
+import setup_project
+import wellbeing_module
+
+
+@pytest.fixture
+def db_temporario(tmp_path, monkeypatch):
+    db = str(tmp_path / 'teste.db')
+    monkeypatch.setattr(setup_project, 'DB_NAME', db)
+    monkeypatch.setattr(wellbeing_module, 'DB_PATH', db)
+    setup_project.setup_database()
+    sdr = setup_project.add_employee_securely('Maria SDR', 'SDR', 'senha')
+    closer = setup_project.add_employee_securely('Carlos Closer', 'Closer', 'senha')
+    return db, sdr, closer
+
+
+def test_agregados_incrementais_batem_com_reconstrucao(db_temporario):
+    db, sdr, closer = db_temporario
+    textos = ['Estou muito frustrado com metas', 'Tive um otimo dia', 'Sobrecarga e prazos impossiveis']
+    wellbeing_module.registrar_logs_em_lote([(sdr, t) for t in textos * 5] + [(closer, 'Dia tranquilo')])
+
+    incremental = estresse_agregado.por_funcionario(db)
+    cargos = estresse_agregado.por_cargo(db)
+    estresse_agregado.reconstruir(db)
+    assert estresse_agregado.por_funcionario(db) == pytest.approx(incremental)
+    assert estresse_agregado.por_cargo(db) == pytest.approx(cargos)
+
+    with database.connection(db) as conn:
+        scores = [r[0] for r in conn.execute(
+            'SELECT score_sentimento FROM LOG_ESTRESSE WHERE id_funcionario = ? ORDER BY id_log', (sdr,)
+        )]
+        nivel = conn.execute('SELECT nivel_estresse_agregado FROM FUNCIONARIOS WHERE id_funcionario = ?',
+                             (sdr,)).fetchone()[0]
+    maria = incremental[0]
+    assert maria['n'] == 15
+    assert maria['media'] == pytest.approx(sum(scores) / len(scores))
+    assert maria['media_janela'] == pytest.approx(sum(scores[-10:]) / 10)
+    assert nivel == pytest.approx(maria['ewma'])
+    assert {c['cargo']: c['n'] for c in cargos} == {'Closer': 1, 'SDR': 15}
@@ -0,0 +1,108 @@
+import sqlite3
+import threading
+
+import pytest
+
+import database
+import gamificacao
+import setup_project
+import wellbeing_module
+
+
+@pytest.fixture
+def db_temporario(tmp_path, monkeypatch):
+    db = str(tmp_path / 'teste.db')
+    monkeypatch.setattr(setup_project, 'DB_NAME', db)
+    monkeypatch.setattr(wellbeing_module, 'DB_PATH', db)
+    setup_project.setup_database()
+    sdr = setup_project.add_employee_securely('Maria SDR', 'SDR', 'senha')
+    closer = setup_project.add_employee_securely('Carlos Closer', 'Closer', 'senha')
+    with database.transaction(db) as conn:
+        conn.execute(
+            "INSERT INTO ATIVIDADES (id_funcionario, descricao, data_vencimento, status) "
+            "VALUES (?, 'Proposta atrasada', '2025-01-01', 'VENCIDA')",
+            (closer,),
+        )
+    return db, sdr, closer
+
+
+def _saldos(db):
+    with database.connection(db) as conn:
+        return conn.execute(
+            'SELECT f.id_funcionario, f.pontos_gamificacao, '
+            '(SELECT SUM(pontos) FROM LEDGER_PONTOS g WHERE g.id_funcionario = f.id_funcionario) '
+            'FROM FUNCIONARIOS f ORDER BY f.id_funcionario'
+        ).fetchall()
+
+
+def test_regras_pontuam_via_ledger_com_totais_correntes(db_temporario):
+    db, sdr, closer = db_temporario
+    resultados = wellbeing_module.registrar_logs_em_lote(
+        [(sdr, 'Dia tranquilo', True), (closer, 'Prazos impossiveis', True), (sdr, 'Sobrecarga', False), (999, 'x')]
+    )
+    assert [(r['pontos'], r['novo_total']) for r in resultados[:3]] == [(15, 15), (5, 5), (10, 25)]
+    assert resultados[3] is None
+    assert _saldos(db) == [(sdr, 25, 25), (closer, 5, 5)]
+    with database.connection(db) as conn:
+        assert conn.execute('SELECT pontos FROM LOG_ESTRESSE ORDER BY id_log').fetchall() == [(15,), (5,), (10,)]
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute('DELETE FROM LEDGER_PONTOS')
+
+
+def test_registros_concorrentes_nao_perdem_incrementos(db_temporario):
+    db, sdr, _ = db_temporario
+    threads = [
+        threading.Thread(target=wellbeing_module.registrar_log_estresse_e_pontuar, args=(sdr, 'Dia tranquilo'))
+        for _ in range(20)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert _saldos(db)[0] == (sdr, 300, 300)
+
+
+def test_recalcular_aplica_regra_nova_e_ranking(db_temporario):
+    db, sdr, closer = db_temporario
+    wellbeing_module.registrar_logs_em_lote([(sdr, 'Dia tranquilo', False), (closer, 'Prazos', True)] * 3)
+    assert gamificacao.recalcular(db)['funcionarios_ajustados'] == 0
+
+    gamificacao.definir_regra('sem_vencidas', pontos=1, db_path=db)
+    gamificacao.definir_regra('registro', condicao='sempre', pontos=2, db_path=db)
+    resumo = gamificacao.recalcular(db)
+    assert resumo['logs_alterados'] == 6 and resumo['funcionarios_ajustados'] == 2
+    # sdr: 3 x (1 + 2); closer: 3 x (5 + 2).
+    assert _saldos(db) == [(sdr, 9, 9), (closer, 21, 21)]
+    with database.connection(db) as conn:
+        assert conn.execute('SELECT posicao_ranking FROM FUNCIONARIOS ORDER BY id_funcionario').fetchall() == [
+            (2,), (1,)
+        ]
+    with pytest.raises(ValueError):
+        gamificacao.definir_regra('invalida', condicao='1; DROP TABLE FUNCIONARIOS', pontos=1, db_path=db)
+
+
+def test_wellbeing_copilot_pontua_pelo_ledger(db_temporario, monkeypatch):
+    import wellbeing_copilot
+
+    db, sdr, closer = db_temporario
+    monkeypatch.setattr(wellbeing_copilot, 'DB_NAME', db)
+    assert wellbeing_copilot.registrar_log_estresse_e_pontuar(sdr, 'Dia tranquilo')['pontos'] == 15
+    assert wellbeing_copilot.registrar_log_estresse_e_pontuar(999, 'x') is None
+    assert gamificacao.recalcular(db)['funcionarios_ajustados'] == 0
+    assert _saldos(db) == [(sdr, 15, 15), (closer, 0, None)]
+
+
+def test_pontuacao_do_texto_fora_da_transacao(db_temporario, monkeypatch):
+    db, sdr, _ = db_temporario
+    original = wellbeing_module.analyze_sentiment_many
+
+    def pontuar_sem_lock(textos, *args):
+        # Outro escritor consegue o lock de escrita enquanto o texto é pontuado.
+        conn = sqlite3.connect(db, timeout=0)
+        conn.execute('BEGIN IMMEDIATE')
+        conn.rollback()
+        conn.close()
+        return original(textos, *args)
+
+    monkeypatch.setattr(wellbeing_module, 'analyze_sentiment_many', pontuar_sem_lock)
+    assert wellbeing_module.registrar_log_estresse_e_pontuar(sdr, 'Dia tranquilo')['pontos'] == 15
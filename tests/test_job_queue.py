@@ -0,0 +1,57 @@
+import time
+
+import charts
+import database
+import job_queue
+import setup_project
+
+
+def test_relatorio_em_processo_worker_usa_pool_de_graficos(tmp_path, monkeypatch):
+    db = str(tmp_path / 'teste.db')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(setup_project, 'DB_NAME', db)
+    setup_project.setup_database()
+    setup_project.add_employee_securely('Maria SDR', 'SDR', 'senha')
+    setup_project.add_employee_securely('Carlos Closer', 'Closer', 'senha')
+    # Os gráficos de KPI saem de um ProcessPoolExecutor dentro do worker.
+    monkeypatch.setattr(charts, 'PROCESSOS', 2)
+    monkeypatch.setattr(job_queue, 'POLL_SEGUNDOS', 0.05)
+
+    id_job = job_queue.enfileirar('relatorio_gerencial', {'destino': str(tmp_path)}, db)
+    workers = job_queue.iniciar_workers(1, db)
+    try:
+        fim = time.monotonic() + 60
+        while job_queue.status(id_job, db)['status'] in ('queued', 'running') and time.monotonic() < fim:
+            time.sleep(0.1)
+    finally:
+        for p in workers:
+            p.terminate()
+            p.join()
+    job = job_queue.status(id_job, db)
+    assert job['status'] == 'done', job['erro']
+    assert job['resultado']['arquivos'] == {
+        'kpi_reducao_tempo.png': 'renderizado', 'dashboard_eficiencia_operacional.png': 'renderizado'
+    }
+
+
+def test_heartbeat_renova_lease_de_job_longo(tmp_path, monkeypatch):
+    db = str(tmp_path / 'teste.db')
+    monkeypatch.setattr(setup_project, 'DB_NAME', db)
+    setup_project.setup_database()
+    monkeypatch.setattr(job_queue, 'LEASE_SEGUNDOS', 0.3)
+    execucoes = []
+
+    def lento(payload, id_job, db_path):
+        execucoes.append(id_job)
+        time.sleep(1.0)
+        # Passou de LEASE_SEGUNDOS, mas o heartbeat manteve o lease: nada volta à fila.
+        return {'recuperados': job_queue.recuperar_expirados(db_path)}, None
+
+    monkeypatch.setitem(job_queue.HANDLERS, 'lento', lento)
+    id_job = job_queue.enfileirar('lento', {}, db)
+    assert job_queue.processar_proximo(db) == id_job
+    job = job_queue.status(id_job, db)
+    assert job['status'] == 'done' and job['resultado'] == {'recuperados': 0}
+    assert job_queue.processar_proximo(db) is None and execucoes == [id_job]
+    with database.connection(db) as conn:
+        assert conn.execute('SELECT worker FROM JOBS WHERE id_job = ?', (id_job,)).fetchone()[0]
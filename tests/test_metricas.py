@@ -0,0 +1,31 @@
+import json
+
+import metricas
+
+
+def test_histograma_no_formato_prometheus_e_soma_entre_processos(tmp_path, monkeypatch):
+    monkeypatch.setattr(metricas, 'METRICAS_DIR', str(tmp_path))
+    metricas.limpar()
+    metricas.observar('pdf_render_segundos', 0.003)
+    metricas.observar('pdf_render_segundos', 20)
+    metricas.incrementar('http_erros_total', rota='/api/x', status=500)
+    metricas.ajustar('http_requisicoes_em_andamento', 1, rota='/api/x')
+
+    # Retratos de outros processos: um vivo (pai do pytest) e um que já terminou.
+    chave = [['rota', '/api/x']]
+    for pid in (1, 999999999):
+        (tmp_path / f'{pid}.json').write_text(json.dumps({
+            'contadores': [['http_erros_total', chave + [['status', '500']], 2]],
+            'gauges': [['http_requisicoes_em_andamento', chave, 3]],
+            'histogramas': [],
+        }))
+
+    texto = metricas.prometheus()
+    assert '# TYPE pdf_render_segundos histogram' in texto
+    assert 'pdf_render_segundos_bucket{le="0.005"} 1' in texto
+    assert 'pdf_render_segundos_bucket{le="+Inf"} 2' in texto
+    assert 'pdf_render_segundos_count 2' in texto
+    assert 'http_erros_total{rota="/api/x",status="500"} 5' in texto
+    # O gauge do processo morto é descartado: 1 (este) + 3 (pid 1).
+    assert 'http_requisicoes_em_andamento{rota="/api/x"} 4' in texto
+    metricas.limpar()
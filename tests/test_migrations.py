@@ -0,0 +1,59 @@
+import sqlite3
+
+import pytest
+
+import database
+import migrations
+
+CONSULTAS_FREQUENTES = {
+    'login': ('SELECT id_funcionario, nome, cargo, senha_hash FROM FUNCIONARIOS WHERE nome = ?', ('x',)),
+    'atividades_vencidas': (
+        "SELECT id_funcionario, COUNT(*) FROM ATIVIDADES WHERE status = 'VENCIDA' "
+        'AND id_funcionario IN (SELECT value FROM json_each(?)) GROUP BY id_funcionario',
+        ('[1, 2]',),
+    ),
+    'historico_estresse': (
+        'SELECT data_registro, score_sentimento FROM LOG_ESTRESSE WHERE id_funcionario = ? '
+        'ORDER BY data_registro DESC',
+        (1,),
+    ),
+    'propostas_cliente': ('SELECT id_proposta, valor_total FROM PROPOSTAS WHERE id_cliente = ?', (1,)),
+}
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / 'teste.db')
+
+
+def test_migrar_aplica_uma_vez(db, monkeypatch):
+    assert migrations.migrar(db) == [m[0] for m in migrations.MIGRACOES]
+    assert migrations.versao(db) == migrations.VERSAO_ATUAL
+    # Novo processo (cache limpo): só lê user_version, não reaplica nada.
+    monkeypatch.setattr(migrations, '_migrados', set())
+    assert migrations.migrar(db) == []
+    with database.connection(db) as conn:
+        assert conn.execute('SELECT COUNT(*) FROM SCHEMA_MIGRACOES').fetchone()[0] == len(migrations.MIGRACOES)
+
+
+def test_migra_banco_legado_do_wellbeing(db):
+    conn = sqlite3.connect(db)
+    conn.execute(
+        'CREATE TABLE LOG_ESTRESSE (id_log INTEGER PRIMARY KEY AUTOINCREMENT, id_funcionario INTEGER NOT NULL, '
+        'data_registro DATETIME DEFAULT CURRENT_TIMESTAMP, descricao_problema TEXT, score_sentimento REAL, '
+        'sugestao_ia TEXT)'
+    )
+    conn.close()
+    migrations.migrar(db)
+    with database.connection(db) as conn:
+        assert 'pontos' in migrations._colunas(conn, 'LOG_ESTRESSE')
+
+
+@pytest.mark.parametrize('nome', sorted(CONSULTAS_FREQUENTES))
+def test_consultas_frequentes_usam_indice(db, nome):
+    migrations.migrar(db)
+    sql, params = CONSULTAS_FREQUENTES[nome]
+    with database.connection(db) as conn:
+        plano = [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params)]
+    scans = [p for p in plano if p.startswith('SCAN ') and 'VIRTUAL TABLE' not in p]
+    assert not scans, plano
@@ -0,0 +1,51 @@
+import pytest
+
+import database
+import estresse_agregado
+import painel
+import setup_project
+import wellbeing_module
+
+
+@pytest.fixture
+def db_temporario(tmp_path, monkeypatch):
+    db = str(tmp_path / 'teste.db')
+    monkeypatch.setattr(setup_project, 'DB_NAME', db)
+    monkeypatch.setattr(wellbeing_module, 'DB_PATH', db)
+    monkeypatch.setattr(painel, 'PAINEL_TTL', 0)
+    painel.limpar()
+    setup_project.setup_database()
+    sdr = setup_project.add_employee_securely('Maria SDR', 'SDR', 'senha')
+    closer = setup_project.add_employee_securely('Carlos Closer', 'Closer', 'senha')
+    yield db, sdr, closer
+    painel.limpar()
+
+
+def test_cache_incremental_bate_com_agregados(db_temporario, monkeypatch):
+    db, sdr, closer = db_temporario
+    wellbeing_module.registrar_logs_em_lote([(sdr, 'Estou muito frustrado'), (closer, 'Dia tranquilo')])
+    assert [r['nome'] for r in painel.leaderboard(db_path=db)['ranking']] == ['Maria SDR', 'Carlos Closer']
+
+    wellbeing_module.registrar_logs_em_lote([(closer, 'Sobrecarga e prazos', True)] * 3)
+    dados = painel.dashboard(db)
+    esperado = estresse_agregado.por_cargo(db)
+    assert [(e['cargo'], e['n']) for e in dados['estresse_por_cargo']] == [('Closer', 4), ('SDR', 1)]
+    assert [e['media'] for e in dados['estresse_por_cargo']] == pytest.approx([e['media'] for e in esperado])
+    ranking = painel.leaderboard(db_path=db)['ranking']
+    assert (ranking[0]['nome'], ranking[0]['pontos']) == ('Carlos Closer', 60)
+
+    # Mudança de cadastro (KPI) é vista após o TTL; antes dele, nada de banco.
+    with database.transaction(db) as conn:
+        conn.execute('UPDATE FUNCIONARIOS SET tempo_reduzido_copilot = 90 WHERE id_funcionario = ?', (sdr,))
+    monkeypatch.setattr(painel, 'PAINEL_TTL', 3600)
+    consultas = []
+    anterior = database._observador
+    database.observar_consultas(consultas.append)
+    try:
+        assert painel.dashboard(db)['versao'] == dados['versao']
+    finally:
+        database.observar_consultas(anterior)
+    assert consultas == []
+    monkeypatch.setattr(painel, 'PAINEL_TTL', 0)
+    kpi = {k['cargo']: k['pct_reducao'] for k in painel.dashboard(db)['kpi_reducao']}
+    assert kpi['SDR'] == pytest.approx(50.0)
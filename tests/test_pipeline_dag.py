@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+import pipeline_dag
+
+EXECUTADAS = []
+
+
+def _ok():
+    EXECUTADAS.append('ok')
+    return 3
+
+
+def _instavel():
+    EXECUTADAS.append('instavel')
+    if os.environ.get('PIPELINE_TESTE_FALHAR'):
+        raise RuntimeError('falha simulada')
+    return 1
+
+
+def _linhas():
+    return 7
+
+
+def test_retoma_da_etapa_que_falhou(tmp_path, monkeypatch):
+    checkpoint = str(tmp_path / 'checkpoint.json')
+    etapas = [
+        pipeline_dag.Etapa('a', _ok),
+        pipeline_dag.Etapa('b', _instavel, depende=['a']),
+        pipeline_dag.Etapa('c', _ok, depende=['b']),
+    ]
+    monkeypatch.setenv('PIPELINE_TESTE_FALHAR', '1')
+    ok, relatorio = pipeline_dag.executar(etapas, checkpoint, processos=1)
+    assert not ok
+    assert [relatorio[n]['status'] for n in 'abc'] == ['ok', 'falhou', 'bloqueada']
+    assert os.path.exists(checkpoint)
+
+    monkeypatch.delenv('PIPELINE_TESTE_FALHAR')
+    EXECUTADAS.clear()
+    ok, relatorio = pipeline_dag.executar(etapas, checkpoint, processos=1)
+    assert ok and EXECUTADAS == ['instavel', 'ok']
+    assert relatorio['a']['status'] == 'retomada' and relatorio['c']['linhas'] == 3
+    assert not os.path.exists(checkpoint)
+
+
+def test_etapas_independentes_em_processos():
+    etapas = [pipeline_dag.Etapa('raiz', _linhas)] + [
+        pipeline_dag.Etapa(f'f{i}', _linhas, depende=['raiz']) for i in range(3)
+    ]
+    ok, relatorio = pipeline_dag.executar(etapas, processos=3)
+    assert ok
+    assert all(r['linhas'] == 7 and r['pico_rss_kb'] > 0 for r in relatorio.values())
+
+
+def test_rejeita_ciclo():
+    with pytest.raises(ValueError):
+        pipeline_dag.executar([pipeline_dag.Etapa('a', _ok, ['b']), pipeline_dag.Etapa('b', _ok, ['a'])])
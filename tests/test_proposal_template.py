@@ -0,0 +1,49 @@
+from datetime import date
+import re
+
+import pytest
+
+import automation_module
+import proposal_template
+import setup_project
+
+
+def _sem_data_criacao(pdf):
+    return re.sub(rb'/CreationDate \(D:\d+\)', b'', pdf)
+
+
+def test_template_matches_uncached_render():
+    campos = ('ACME Ltda', 'Alice', 'alice@acme.com', 12345.67, 'Maria SDR', date(2025, 11, 17))
+    com_cache = proposal_template.obter_template().renderizar(*campos)
+    assert com_cache.startswith(b'%PDF') and com_cache.rstrip().endswith(b'%%EOF')
+    assert _sem_data_criacao(com_cache) == _sem_data_criacao(proposal_template.renderizar_sem_cache(*campos))
+
+
+@pytest.fixture
+def db_temporario(tmp_path, monkeypatch):
+    db = str(tmp_path / 'teste.db')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(setup_project, 'DB_NAME', db)
+    monkeypatch.setattr(automation_module, 'DB_PATH', db)
+    setup_project.setup_database()
+    uid = setup_project.add_employee_securely('Maria SDR', 'SDR', 'senha')
+    cid = setup_project.insert_client('ACME Ltda', '00.000.000/0001-00', 'Alice', 'alice@acme.com', uid)
+    return db, uid, cid
+
+
+def test_gerar_propostas_em_lote(db_temporario):
+    db, uid, cid = db_temporario
+    caminhos = automation_module.gerar_propostas_em_lote([(cid, 1000, uid), (999, 10, uid), (cid, 2000, uid)])
+    assert caminhos[1] is None
+    assert len({caminhos[0], caminhos[2]}) == 2
+    with automation_module.database.connection(db) as conn:
+        rows = conn.execute('SELECT valor_total, caminho_arquivo FROM PROPOSTAS ORDER BY id_proposta').fetchall()
+    assert rows == [(1000.0, caminhos[0]), (2000.0, caminhos[2])]
+
+
+def test_valor_inteiro_e_float_compartilham_o_pdf(db_temporario):
+    db, uid, cid = db_temporario
+    unitario = automation_module.renderizar_proposta_comercial(cid, 1000, uid)
+    assert automation_module.renderizar_proposta_comercial(cid, 1000.0, uid) == unitario
+    resultado = automation_module.renderizar_propostas_em_lote([(cid, 1000, uid)])
+    assert resultado['caminhos'] == [unitario] and resultado['do_cache'] == 1
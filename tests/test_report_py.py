@@ -0,0 +1,44 @@
+import pytest
+
+import database
+import report_py
+import setup_project
+
+
+@pytest.fixture
+def db_temporario(tmp_path, monkeypatch):
+    db = str(tmp_path / 'teste.db')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(setup_project, 'DB_NAME', db)
+    monkeypatch.setattr(report_py, 'DB', db)
+    setup_project.setup_database()
+    ids = [setup_project.add_employee_securely(f'F{i}', cargo, 'senha') for i, cargo in enumerate(['SDR', 'Closer'])]
+    return db, ids
+
+
+def _inserir_logs(db, registros):
+    with database.transaction(db) as conn:
+        conn.executemany('INSERT INTO LOG_ESTRESSE (id_funcionario, score_sentimento) VALUES (?, ?)', registros)
+
+
+def test_relatorio_incremental_usa_marca_dagua(db_temporario):
+    db, (sdr, closer) = db_temporario
+    _inserir_logs(db, [(sdr, -1.0), (sdr, 0.0), (closer, 1.0)])
+    completo = report_py.generate_reports()
+    assert dict(zip(completo['cargo'], completo['media'])) == {'Closer': 1.0, 'SDR': -0.5}
+
+    _inserir_logs(db, [(sdr, 1.0), (closer, -1.0), (closer, 0.0)])
+    novos = report_py.generate_reports(since=True, chunksize=2)
+    assert dict(zip(novos['cargo'], novos['n'])) == {'Closer': 2, 'SDR': 1}
+    assert dict(zip(novos['cargo'], novos['media'])) == {'Closer': -0.5, 'SDR': 1.0}
+    assert report_py.generate_reports(since=True).empty
+
+
+def test_relatorio_gerencial_gera_pngs_do_relatorio_r(db_temporario):
+    db, (sdr, closer) = db_temporario
+    _inserir_logs(db, [(sdr, -1.0), (closer, 0.5)])
+    arquivos = report_py.gerar_relatorio_gerencial()
+    assert set(arquivos) == {
+        'dashboard_estresse_por_cargo.png', 'stress_by_cargo.png',
+        'kpi_reducao_tempo.png', 'dashboard_eficiencia_operacional.png',
+    }
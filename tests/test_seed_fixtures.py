@@ -0,0 +1,33 @@
+import database
+import estresse_agregado
+import seed_fixtures
+
+
+def _tabela(db, sql):
+    with database.connection(db) as conn:
+        return conn.execute(sql).fetchall()
+
+
+def test_gerar_deterministico_e_idempotente_nos_funcionarios(tmp_path, monkeypatch):
+    monkeypatch.setattr(seed_fixtures, 'LIMIAR_CARGA_EM_MASSA', 100)
+    a, b = str(tmp_path / 'a.db'), str(tmp_path / 'b.db')
+    contagens = seed_fixtures.gerar(funcionarios=12, clientes=5, logs=300, semente=42, senhas_distintas=3, db_path=a)
+    seed_fixtures.gerar(funcionarios=12, clientes=5, logs=300, semente=42, senhas_distintas=3, db_path=b)
+    assert contagens['funcionarios'] == 12 and contagens['logs'] == 300
+
+    sql = 'SELECT id_funcionario, data_registro, descricao_problema, score_sentimento FROM LOG_ESTRESSE ORDER BY id_log'
+    assert _tabela(a, sql) == _tabela(b, sql)
+    # Hashes calculados uma vez por senha distinta.
+    assert len(_tabela(a, 'SELECT DISTINCT senha_hash FROM FUNCIONARIOS')) == 3
+
+    # Carga em massa: trigger recriado e agregados iguais a uma reconstrução.
+    assert _tabela(a, "SELECT name FROM sqlite_master WHERE name = 'TRG_LOG_ESTRESSE_AGREGADOS'")
+    agregados = estresse_agregado.por_funcionario(a)
+    assert sum(f['n'] for f in agregados) == 300
+    estresse_agregado.reconstruir(a)
+    assert estresse_agregado.por_funcionario(a) == agregados
+
+    # Nova execução reaproveita funcionários e clientes existentes.
+    seed_fixtures.gerar(funcionarios=12, clientes=5, logs=10, semente=1, db_path=a)
+    assert _tabela(a, 'SELECT COUNT(*) FROM FUNCIONARIOS') == [(12,)]
+    assert _tabela(a, 'SELECT COUNT(*) FROM CLIENTES') == [(5,)]
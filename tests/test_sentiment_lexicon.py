@@ -0,0 +1,38 @@
+from sentiment_lexicon import SentimentLexicon, LEXICO_PADRAO
+from wellbeing_module import analyze_sentiment, analyze_sentiment_many
+
+
+def test_score_contract_and_accents():
+    assert analyze_sentiment('Estou muito frustrado com metas e pressão') == -1.0
+    assert analyze_sentiment('Tive um ótimo dia, fechei 2 contratos') == 1.0
+    assert analyze_sentiment('Dia normal') == 0.0
+    assert analyze_sentiment('Estou bem, mas com muita pressao') == 0.0
+
+
+def test_stems_count_once_and_negation_flips():
+    assert LEXICO_PADRAO.score('frustrado, frustrada, frustracao') == -1.0
+    assert analyze_sentiment('Não consigo agendar nada') == -1.0
+    assert analyze_sentiment('Hoje sem estresse, consegui fechar') == 1.0
+    assert LEXICO_PADRAO.has_negative('nao consigo bater a meta')
+
+
+def test_weights_and_many():
+    lex = SentimentLexicon(positivos={'bom': 3}, negativos={'ruim': 1})
+    assert lex.score('bom e ruim') == 0.5
+    textos = ['otimo', 'pressao', '']
+    assert analyze_sentiment_many(textos) == [analyze_sentiment(t) for t in textos]
+
+
+def test_peso_zero_e_termo_nas_duas_polaridades_com_negacao():
+    lex = SentimentLexicon(positivos={'bom': 0, 'forte': 2}, negativos={'ruim': 1, 'forte': 1})
+    # 'bom' pesa 0 (não cai no dicionário negativo).
+    assert lex.score('nao ruim, bom') == 1.0
+    # Termo nos dois vocabulários soma os dois pesos; a negação troca os lados.
+    assert abs(lex.score('forte') - 1 / 3) < 1e-9
+    assert abs(lex.score('nao forte') - (-1 / 3)) < 1e-9
+
+
+def test_negador_sem_alvo_nao_muda_o_score():
+    lex = SentimentLexicon(positivos={'forte': 1}, negativos={'forte': 2})
+    assert lex.score('forte nao') == lex.score('forte') == -1 / 3
+    assert LEXICO_PADRAO.score('frustrado nao') == LEXICO_PADRAO.score('frustrado')
@@ -1,16 +1,45 @@
 import pytest
 
+import server
 from server import app
 
 
 @pytest.fixture(scope='module')
-def client():
-    # ensure we use the test client and seed DB
-    from seed_fixtures import seed
-    seed()
-    app.config['TESTING'] = True
-    with app.test_client() as c:
-        yield c
+def client(tmp_path_factory):
+    # Banco, store de artefatos (outputs/store) e entregáveis em um diretório
+    # temporário: os testes não tocam no banco nem nos arquivos da raiz.
+    import seed_fixtures
+
+    tmp = tmp_path_factory.mktemp('servidor')
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(tmp)
+        mp.setattr(server, 'DB', str(tmp / 'ai_sales_copilot.db'))
+        mp.setattr(server, 'DELIVERABLES_DIR', str(tmp / 'deliverables'))
+        (tmp / 'deliverables').mkdir()
+        seed_fixtures.gerar(db_path=server.DB)
+        app.config['TESTING'] = True
+        with app.test_client() as c:
+            yield c
+
+
+@pytest.fixture
+def outro_banco(client, tmp_path, monkeypatch):
+    # server.DB com outro nome: gravações no ai_sales_copilot.db do diretório atual não contam.
+    import setup_project
+
+    db = str(tmp_path / 'outro.db')
+    monkeypatch.setattr(setup_project, 'DB_NAME', db)
+    setup_project.setup_database()
+    uid = setup_project.add_employee_securely('Ana Outro', 'SDR', 'senha')
+    monkeypatch.setattr(server, 'DB', db)
+    return db, uid
+
+
+def _logs(db, uid):
+    import database
+
+    with database.connection(db) as conn:
+        return conn.execute('SELECT COUNT(*) FROM LOG_ESTRESSE WHERE id_funcionario = ?', (uid,)).fetchone()[0]
 
 
 def test_login_success(client):
@@ -32,3 +61,200 @@ def test_deliverables_list(client):
     data = resp.get_json()
     assert 'ok' in data
     assert isinstance(data.get('files', []), list)
+
+
+def test_wellbeing_batch(client):
+    resp = client.post('/api/wellbeing/batch', json={'registros': [
+        {'id_funcionario': 1, 'problema': 'Estou frustrado com a pressao', 'pontualidade_ok': True},
+        {'id_funcionario': 999999, 'problema': 'Tive um otimo dia'},
+        {'problema': 'sem funcionario'},
+    ]})
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data['registrados'] == 1
+    first, missing, invalid = data['resultados']
+    assert first['ok'] is True and first['score'] < 0
+    assert missing['ok'] is False
+    assert invalid['ok'] is False
+
+
+def test_wellbeing_batch_grava_no_banco_do_servidor(client, outro_banco):
+    db, uid = outro_banco
+    registros = [{'id_funcionario': uid, 'problema': 'Dia tranquilo'}]
+    resp = client.post('/api/wellbeing/batch', json={'registros': registros})
+    assert resp.get_json()['registrados'] == 1
+    assert _logs(db, uid) == 1
+
+
+def test_proposal_job_queue(client):
+    import artifact_store
+    import job_queue
+
+    resp = client.post('/api/proposals', json={'id_cliente': 1, 'valor': 1000, 'id_responsavel': 1})
+    assert resp.status_code == 202
+    id_job = resp.get_json()['job_id']
+    assert client.get(f'/api/jobs/{id_job}').get_json()['job']['status'] == 'queued'
+
+    while job_queue.processar_proximo(server.DB) is not None:
+        pass
+    job = client.get(f'/api/jobs/{id_job}').get_json()['job']
+    assert job['status'] == 'done'
+    assert job['resultado']['caminho_arquivo'].startswith(artifact_store.STORE_DIR)
+    assert client.get('/api/jobs/999999999').status_code == 404
+
+
+def test_jwt_cache_e_logout(client):
+    token = client.post('/api/login', json={'nome': 'User1 Test', 'senha': 'pwd12025'}).get_json()['token']
+    cabecalho = {'Authorization': f'Bearer {token}'}
+    antes = client.get('/api/metrics', headers=cabecalho).get_json()['metricas']
+    client.get('/api/deliverables', headers=cabecalho)
+    depois = client.get('/api/metrics', headers=cabecalho).get_json()['metricas']
+    assert depois['jwt_cache_hits'] >= antes['jwt_cache_hits'] + 2
+
+    assert client.post('/api/logout', headers=cabecalho).status_code == 200
+    resp = client.get('/api/deliverables', headers=cabecalho)
+    assert resp.status_code == 401
+    assert resp.get_json()['error'] == 'Token revogado'
+    # Outras sessões do mesmo usuário continuam válidas.
+    assert client.get('/api/deliverables').status_code == 200
+
+
+def test_deliverables_cache_http_range_e_variante(client, tmp_path, monkeypatch):
+    import gzip
+
+    import deliverables
+    import server
+
+    monkeypatch.setattr(server, 'DELIVERABLES_DIR', str(tmp_path))
+    (tmp_path / 'a.pdf').write_bytes(b'%PDF' + b'0' * 2000)
+    (tmp_path / 'b.csv').write_text('x;y\n' * 1000)
+    assert deliverables.comprimir(str(tmp_path)) == ['b.csv.gz']
+
+    data = client.get('/api/deliverables?por_pagina=1&pagina=2').get_json()
+    assert data['total'] == 2 and data['files'] == ['b.csv']
+    assert set(data['itens'][0]) >= {'nome', 'tamanho', 'mtime', 'hash'}
+    assert client.get('/api/deliverables?por_pagina=0').status_code == 400
+
+    resp = client.get('/deliverables/a.pdf')
+    assert resp.status_code == 200 and resp.headers['ETag']
+    assert client.get('/deliverables/a.pdf', headers={'If-None-Match': resp.headers['ETag']}).status_code == 304
+    parcial = client.get('/deliverables/a.pdf', headers={'Range': 'bytes=0-3'})
+    assert parcial.status_code == 206 and parcial.data == b'%PDF'
+
+    comprimido = client.get('/deliverables/b.csv', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert comprimido.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(comprimido.data) == (tmp_path / 'b.csv').read_bytes()
+    assert 'Content-Encoding' not in client.get('/deliverables/b.csv').headers
+    assert client.get('/deliverables/b.csv.gz').status_code == 404
+    (tmp_path / 'campanha').mkdir()
+    (tmp_path / 'campanha' / 'p1.pdf').write_bytes(b'%PDF sub')
+    sub = client.get('/deliverables/campanha/p1.pdf')
+    assert sub.status_code == 200 and sub.data == b'%PDF sub'
+    assert client.get('/deliverables/campanha/p2.pdf').status_code == 404
+    assert client.get('/deliverables/campanha/../../teste.db').status_code == 404
+
+
+def test_register_wellbeing_sincrono_com_orcamento(client, monkeypatch):
+    import threading
+
+    import server
+    import wellbeing_module
+
+    resp = client.post('/api/register_wellbeing', json={'id_funcionario': 1, 'problema': 'Sobrecarga e prazos'})
+    assert resp.status_code == 200 and resp.get_json()['ok'] is True
+    assert resp.headers['Server-Timing'].startswith('app;dur=')
+    assert client.post('/api/register_wellbeing', json={'id_funcionario': 999999, 'problema': 'x'}).status_code == 404
+    assert client.post('/api/register_wellbeing', json={'problema': 'x'}).status_code == 400
+
+    liberar = threading.Event()
+    monkeypatch.setattr(wellbeing_module, 'registrar_log_estresse_e_pontuar', lambda *a, **k: liberar.wait(5))
+    monkeypatch.setattr(server, 'WELLBEING_ORCAMENTO_MS', 10)
+    resp = client.post('/api/register_wellbeing', json={'id_funcionario': 1, 'problema': 'lento'})
+    liberar.set()
+    assert resp.status_code == 202 and resp.get_json()['status'] == 'processando'
+    tempos = client.get('/api/metrics').get_json()['requisicoes']
+    assert tempos['POST /api/register_wellbeing']['n'] >= 4
+
+
+def test_register_wellbeing_grava_no_banco_do_servidor(client, outro_banco):
+    db, uid = outro_banco
+    resp = client.post('/api/register_wellbeing', json={'id_funcionario': uid, 'problema': 'Dia tranquilo'})
+    assert resp.status_code == 200
+    assert _logs(db, uid) == 1
+
+
+def test_generate_proposal_e_run_report_retornam_job(client, tmp_path, monkeypatch):
+    import job_queue
+    import server
+
+    resp = client.post('/api/generate_proposal', json={'id_cliente': 1, 'valor': 19990, 'id_responsavel': 1})
+    assert resp.status_code == 202 and resp.get_json()['status_url'].startswith('/api/jobs/')
+
+    monkeypatch.setattr(server, 'DELIVERABLES_DIR', str(tmp_path))
+    resp = client.post('/api/run_report')
+    assert resp.status_code == 202
+    id_job = resp.get_json()['job_id']
+    while job_queue.processar_proximo(server.DB) is not None:
+        pass
+    job = client.get(f'/api/jobs/{id_job}').get_json()['job']
+    assert job['status'] == 'done', job
+    assert set(job['resultado']['arquivos']) <= set(client.get('/api/deliverables').get_json()['files'])
+    assert 'stress_by_cargo.png' in job['resultado']['arquivos']
+
+
+def test_metrics_prometheus_e_profiler(client, tmp_path, monkeypatch):
+    import server
+
+    monkeypatch.setattr(server, 'PROFILER_HABILITADO', True)
+    monkeypatch.setattr(server, 'PROFILER_DIR', str(tmp_path))
+    resp = client.get('/api/deliverables', headers={'X-Profile': '1'})
+    assert 'db;dur=' in resp.headers['Server-Timing']
+    assert len(list(tmp_path.glob('*-GET-api_deliverables-*ms.prof'))) == 1
+    client.get('/api/deliverables')
+    assert len(list(tmp_path.glob('*.prof'))) == 1
+
+    texto = client.get('/metrics').get_data(as_text=True)
+    assert 'http_requisicoes_segundos_bucket{metodo="GET",rota="/api/deliverables",status="200",le="+Inf"}' in texto
+    assert 'sqlite_consultas_total' in texto
+    assert 'bcrypt_verificacao_segundos_count' in texto
+
+
+def test_leaderboard_e_dashboard_em_cache_com_etag(client, monkeypatch):
+    import painel
+
+    monkeypatch.setattr(painel, 'PAINEL_TTL', 0)
+    resp = client.get('/api/leaderboard?limite=3')
+    assert resp.status_code == 200
+    ranking = resp.get_json()['ranking']
+    assert len(ranking) == 3 and ranking[0]['posicao'] == 1
+    assert [r['pontos'] for r in ranking] == sorted((r['pontos'] for r in ranking), reverse=True)
+    assert client.get('/api/leaderboard?limite=0').status_code == 400
+
+    resp = client.get('/api/dashboard')
+    data = resp.get_json()
+    assert data['ok'] is True and data['estresse_por_cargo'] and data['kpi_reducao']
+    etag = resp.headers['ETag']
+    assert client.get('/api/dashboard', headers={'If-None-Match': etag}).status_code == 304
+
+    # Um log novo muda a versão e entra na média do cargo.
+    client.post('/api/wellbeing/batch', json={'registros': [{'id_funcionario': 1, 'problema': 'Tive um otimo dia'}]})
+    novo = client.get('/api/dashboard', headers={'If-None-Match': etag})
+    assert novo.status_code == 200
+    assert novo.get_json()['totais']['logs_estresse'] == data['totais']['logs_estresse'] + 1
+
+
+def test_proposals_batch_valida_e_enfileira_campanha(client):
+    import job_queue
+
+    assert client.post('/api/proposals/batch', json={'filtro': {'nome': 'x'}, 'valor': 10}).status_code == 400
+    assert client.post('/api/proposals/batch', json={'propostas': []}).status_code == 400
+    resp = client.post('/api/proposals/batch', json={
+        'propostas': [{'id_cliente': 1, 'valor': 5000, 'id_responsavel': 1}, {'id_cliente': 'x'}],
+    })
+    assert resp.status_code == 202
+    id_job = resp.get_json()['job_id']
+    while job_queue.processar_proximo(server.DB) is not None:
+        pass
+    job = client.get(f'/api/jobs/{id_job}').get_json()['job']
+    assert job['status'] == 'done', job
+    assert job['resultado']['geradas'] == 1 and job['resultado']['n_falhas'] == 1
@@ -0,0 +1,80 @@
+import pytest
+
+import database
+import setup_project
+import stress_model
+
+TEXTOS = [
+    'Não consigo agendar nada, muito frustrado',
+    'A pressão está muito grande',
+    'Tive um ótimo dia e converti leads',
+    'Dia tranquilo, tudo dentro do esperado',
+]
+LABELS = [1, 1, 0, 0]
+
+
+def test_train_score_and_roundtrip(tmp_path):
+    modelo = stress_model.treinar_textos(TEXTOS, LABELS, dimensao=2 ** 10)
+    scores = modelo.score_many(TEXTOS)
+    assert all(-1.0 <= s <= 1.0 for s in scores)
+    assert scores[0] < 0 < scores[2]
+
+    path = str(tmp_path / 'modelo.npz')
+    modelo.save(path)
+    carregado = stress_model.StressClassifier.load(path)
+    assert carregado.versao == modelo.versao
+    assert carregado.score_many(TEXTOS) == pytest.approx(scores)
+
+
+def test_rejects_other_format(tmp_path, monkeypatch):
+    path = str(tmp_path / 'modelo.npz')
+    stress_model.treinar_textos(TEXTOS, LABELS, dimensao=2 ** 10).save(path)
+    monkeypatch.setattr(stress_model, 'FORMATO_MODELO', stress_model.FORMATO_MODELO + 1)
+    with pytest.raises(ValueError):
+        stress_model.StressClassifier.load(path)
+
+
+def test_carregar_modelo_treina_e_salva_quando_falta_o_arquivo(tmp_path, monkeypatch):
+    db = str(tmp_path / 'teste.db')
+    monkeypatch.setattr(setup_project, 'DB_NAME', db)
+    monkeypatch.setattr(stress_model, '_modelos', {})
+    setup_project.setup_database()
+    path = str(tmp_path / 'models' / 'modelo.npz')
+    with pytest.raises(RuntimeError, match='DATASET_TREINAMENTO vazio'):
+        stress_model.carregar_modelo(path, db)
+
+    with database.transaction(db) as conn:
+        conn.executemany('INSERT INTO DATASET_TREINAMENTO (texto_problema, label_estresse) VALUES (?, ?)',
+                         list(zip(TEXTOS, LABELS)))
+    modelo = stress_model.carregar_modelo(path, db)
+    assert modelo.n_amostras == len(TEXTOS)
+    assert stress_model.StressClassifier.load(path).versao == modelo.versao
+
+
+def test_carregar_modelo_guarda_um_modelo_por_arquivo(tmp_path, monkeypatch):
+    monkeypatch.setattr(stress_model, '_modelos', {})
+    a, b = str(tmp_path / 'a.npz'), str(tmp_path / 'b.npz')
+    stress_model.treinar_textos(TEXTOS, LABELS, dimensao=2 ** 10).save(a)
+    stress_model.StressClassifier(stress_model.treinar_textos(TEXTOS, LABELS, dimensao=2 ** 8).pesos,
+                                  versao='outro').save(b)
+    assert stress_model.carregar_modelo(a).dimensao == 2 ** 10
+    assert stress_model.carregar_modelo(b).versao == 'outro'
+    assert stress_model.carregar_modelo(a) is stress_model.carregar_modelo(a)
+
+
+def test_wellbeing_treinado_usa_o_banco_informado(tmp_path, monkeypatch):
+    import wellbeing_module
+
+    # Diretório atual sem ai_sales_copilot.db: o modelo só pode vir de `db`.
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(stress_model, '_modelos', {})
+    db = str(tmp_path / 'teste.db')
+    monkeypatch.setattr(setup_project, 'DB_NAME', db)
+    setup_project.setup_database()
+    uid = setup_project.add_employee_securely('Maria SDR', 'SDR', 'senha')
+    with database.transaction(db) as conn:
+        conn.executemany('INSERT INTO DATASET_TREINAMENTO (texto_problema, label_estresse) VALUES (?, ?)',
+                         list(zip(TEXTOS, LABELS)))
+    resultado, = wellbeing_module.registrar_logs_em_lote([(uid, 'estou frustrado', True)], 'treinado', db)
+    assert -1.0 <= resultado['score'] <= 1.0
+    assert (tmp_path / stress_model.MODEL_PATH).exists()
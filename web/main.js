@@ -40,6 +40,7 @@ function showPanel(){
 }
 
 function logout(){
+  if(dashboardTimer) stopDashboard()
   setToken(null, null)
   currentUser = null
   userLabel.innerText = ''
@@ -121,6 +122,53 @@ $('#btnList').addEventListener('click', async () => {
   } else appendOut('Erro: '+(j.error||''))
 })
 
+// Dashboard: polling a cada 5s enquanto visível. O servidor responde do
+// cache em memória e o navegador revalida com ETag (304 sem corpo).
+const dashboard = $('#dashboard')
+const DASHBOARD_INTERVALO_MS = 5000
+let dashboardTimer = null
+
+function fillTable(sel, header, rows){
+  const table = $(sel)
+  table.innerHTML = ''
+  const tr = document.createElement('tr')
+  header.forEach(h => { const th = document.createElement('th'); th.textContent = h; tr.appendChild(th) })
+  table.appendChild(tr)
+  rows.forEach(r => {
+    const row = document.createElement('tr')
+    r.forEach(v => { const td = document.createElement('td'); td.textContent = v; row.appendChild(td) })
+    table.appendChild(row)
+  })
+}
+
+async function refreshDashboard(){
+  const [rRank, rDash] = await Promise.all([authFetch('leaderboard?limite=10'), authFetch('dashboard')])
+  if(rRank.status === 401 || rDash.status === 401){ stopDashboard(); logout(); return }
+  const rank = await rRank.json()
+  const dash = await rDash.json()
+  if(!rank.ok || !dash.ok){ appendOut('Erro no dashboard: '+(rank.error || dash.error || '')); return }
+  fillTable('#tblRanking', ['#', 'Nome', 'Cargo', 'Pontos'],
+    rank.ranking.map(r => [r.posicao, r.nome, r.cargo, r.pontos]))
+  fillTable('#tblEstresse', ['Cargo', 'Registros', 'Média'],
+    dash.estresse_por_cargo.map(e => [e.cargo, e.n, e.media.toFixed(3)]))
+  fillTable('#tblKpi', ['Cargo', 'Manual (min)', 'Com copilot (min)', 'Redução'],
+    dash.kpi_reducao.map(k => [k.cargo, k.tempo_operacional_manual.toFixed(0),
+      k.tempo_reduzido_copilot.toFixed(0), k.pct_reducao.toFixed(1) + '%']))
+}
+
+function stopDashboard(){
+  clearInterval(dashboardTimer)
+  dashboardTimer = null
+  dashboard.classList.add('hidden')
+}
+
+$('#btnDash').addEventListener('click', () => {
+  if(dashboardTimer){ stopDashboard(); return }
+  dashboard.classList.remove('hidden')
+  refreshDashboard()
+  dashboardTimer = setInterval(refreshDashboard, DASHBOARD_INTERVALO_MS)
+})
+
 async function downloadFile(filename){
   appendOut('Preparando download: '+filename)
   const res = await fetch(`/deliverables/${encodeURIComponent(filename)}`,{headers:authHeaders()})
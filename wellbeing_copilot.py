@@ -1,5 +1,7 @@
 import sqlite3
-import random
+
+import migrations
+import wellbeing_module
 
 # ==============================================================================
 # REQUISITO: PYTHON, BANCO DE DADOS, CYBERSECURITY (simulação)
@@ -10,49 +12,9 @@ DB_NAME = 'ai_sales_copilot.db'
 
 def setup_database():
     """Cria o banco de dados e as tabelas essenciais para o MVP."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
     print("Configurando o banco de dados para Mapeamento de Estresse...")
-
-    # Tabela 1: FUNCIONARIOS (Inclui campo para simular armazenamento seguro de senha)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS FUNCIONARIOS (
-            id_funcionario INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL,
-            cargo TEXT NOT NULL, -- SDR, Closer, Engenheiro
-            senha_hash TEXT,    -- Requisito: Cybersecurity
-            pontos_gamificacao INTEGER DEFAULT 0,
-            nivel_estresse_agregado REAL DEFAULT 0.0
-        )
-    """)
-
-    # Tabela 2: LOG_ESTRESSE (Dados brutos para o ML e R)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS LOG_ESTRESSE (
-            id_log INTEGER PRIMARY KEY AUTOINCREMENT,
-            id_funcionario INTEGER NOT NULL,
-            data_registro DATETIME DEFAULT CURRENT_TIMESTAMP,
-            descricao_problema TEXT,  -- Input do usuário (análise de ML)
-            score_sentimento REAL,    -- Output do modelo ML (ex: -1.0 a 1.0)
-            sugestao_ia TEXT,         -- Alternativa dada pela IA
-            FOREIGN KEY (id_funcionario) REFERENCES FUNCIONARIOS(id_funcionario)
-        )
-    """)
-
-    # Tabela 3: ATIVIDADES (Para Gamificação: 'atividades não vencidas')
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS ATIVIDADES (
-            id_atividade INTEGER PRIMARY KEY AUTOINCREMENT,
-            id_funcionario INTEGER NOT NULL,
-            descricao TEXT NOT NULL,
-            data_vencimento DATE,
-            status TEXT DEFAULT 'PENDENTE', -- PENDENTE, CONCLUIDA, VENCIDA
-            FOREIGN KEY (id_funcionario) REFERENCES FUNCIONARIOS(id_funcionario)
-        )
-    """)
-
-    conn.commit()
-    conn.close()
+    # O schema é único para todo o projeto e versionado em migrations.py.
+    migrations.migrar(DB_NAME)
     print("Configuração do Banco de Dados concluída.")
 
 
@@ -82,65 +44,6 @@ def add_sample_employees():
         conn.close()
 
 
-# ==============================================================================
-# REQUISITO: MACHINE LEARNING / REDES NEURAIS (NLP/Análise de Sentimento)
-# ==============================================================================
-
-
-def analyze_sentiment(text):
-    """
-    Simula um modelo de NLP para Análise de Sentimento em português.
-    Retorna um score de -1.0 (Alto Estresse/Negativo) a 1.0 (Baixo Estresse/Positivo).
-    """
-    stress_words = [
-        "difícil",
-        "estresse",
-        "frustrada",
-        "cobrança",
-        "não consigo",
-        "pressão",
-        "perdendo",
-    ]
-
-    # Score base aleatório para simulação (variabilidade)
-    score = random.uniform(-0.1, 0.4)
-
-    # Lógica de ajuste baseada em palavras-chave (simulando a complexidade do modelo)
-    if any(word in text.lower() for word in stress_words):
-        score -= 0.6  # Reduz o score se houver palavras de estresse
-
-    # Garante que o score esteja no range [-1.0, 1.0]
-    final_score = max(-1.0, min(1.0, score))
-    return final_score
-
-
-def suggest_alternative(score, cargo):
-    """Gera uma alternativa/sugestão de suporte baseada no score de estresse e cargo."""
-    if score < -0.3:
-        if cargo == 'SDR':
-            return (
-                "A IA detectou alto estresse. Sugerimos usar o GPT para aprimorar 5 e-mails de decisores "
-                "e buscar novos contatos no LinkedIn, focando em diversificar os canais."
-            )
-
-        # Closer / Engenheiro
-        return (
-            "A IA detectou alto estresse. Sugerimos fazer uma pausa de 10 minutos. "
-            "Revise o passo a passo da documentação no 'Copilot' para simplificar sua próxima proposta/ projeto."
-        )
-
-    if score > 0.3:
-        return (
-            "Ótimo estado de ânimo! Continue assim e compartilhe sua estratégia de sucesso "
-            "com a equipe."
-        )
-
-    return (
-        "Estado neutro. Lembre-se de priorizar as atividades mais críticas "
-        "para garantir os pontos de Gamificação."
-    )
-
-
 # ==============================================================================
 # REQUISITO: GAMIFICAÇÃO & Integração Principal
 # ==============================================================================
@@ -149,71 +52,26 @@ def suggest_alternative(score, cargo):
 def registrar_log_estresse_e_pontuar(id_funcionario, problema_descrito, pontualidade_ok=True):
     """
     Função principal que integra ML, Banco de Dados e Lógica de Gamificação.
-    """
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
 
-    # 1. Obter informações do funcionário (para sugestão específica)
-    cursor.execute(
-        "SELECT cargo FROM FUNCIONARIOS WHERE id_funcionario = ?",
-        (id_funcionario,),
-    )
-    result = cursor.fetchone()
-    if not result:
+    Score e sugestão vêm de `wellbeing_module` (léxico compartilhado, sem
+    o score base aleatório da simulação antiga). O log e os pontos passam
+    por `wellbeing_module.registrar_logs_em_lote`:
+    as regras de `gamificacao` lançam os pontos no ledger LEDGER_PONTOS,
+    única fonte do saldo (nada de UPDATE direto em pontos_gamificacao).
+    """
+    resultado = wellbeing_module.registrar_logs_em_lote(
+        [(id_funcionario, problema_descrito, pontualidade_ok)], db_path=DB_NAME
+    )[0]
+    if resultado is None:
         print(f"Funcionário com ID {id_funcionario} não encontrado.")
-        conn.close()
-        return
-
-    cargo = result[0]
-
-    # 2. Análise de Sentimento (ML)
-    score = analyze_sentiment(problema_descrito)
-    sugestao = suggest_alternative(score, cargo)
-
-    # 3. Gamificação: Cálculo da Pontuação
-    pontos_ganhos = 0
-
-    # Bonificação 1: Pontualidade (Bater ponto no horário)
-    if pontualidade_ok:
-        pontos_ganhos += 5
-        print("Bônus: +5 pontos por Pontualidade!")
+        return None
 
-    # Bonificação 2: Atividades não vencidas
-    # Verifica se o funcionário tem atividades VENCIDAS (Status = 'VENCIDA')
-    cursor.execute(
-        "SELECT COUNT(*) FROM ATIVIDADES WHERE id_funcionario = ? AND status = 'VENCIDA'",
-        (id_funcionario,),
-    )
-    vencidas = cursor.fetchone()[0]
-
-    if vencidas == 0:
-        pontos_ganhos += 10
-        print("Bônus: +10 pontos por 100% das Atividades em Dia!")
-
-    # 4. Inserir Log de Estresse (BD)
-    cursor.execute(
-        """
-        INSERT INTO LOG_ESTRESSE (id_funcionario, descricao_problema, score_sentimento, sugestao_ia)
-        VALUES (?, ?, ?, ?)
-        """,
-        (id_funcionario, problema_descrito, score, sugestao),
-    )
-
-    # 5. Atualizar Pontuação do Funcionário (Gamificação)
-    cursor.execute(
-        """
-        UPDATE FUNCIONARIOS SET pontos_gamificacao = pontos_gamificacao + ? WHERE id_funcionario = ?
-        """,
-        (pontos_ganhos, id_funcionario),
-    )
-
-    conn.commit()
-    conn.close()
     print("\n--- RELATÓRIO DE SUPORTE ---")
-    print(f"Score de Estresse (IA): {score:.2f} (Entre -1.0 e 1.0)")
-    print(f"Sugestão da IA: {sugestao}")
-    print(f"Pontos Ganhos Nesta Rodada: {pontos_ganhos}")
+    print(f"Score de Estresse (IA): {resultado['score']:.2f} (Entre -1.0 e 1.0)")
+    print(f"Sugestão da IA: {resultado['sugestao']}")
+    print(f"Pontos Ganhos Nesta Rodada: {resultado['pontos']} (total: {resultado['novo_total']})")
     print("-----------------------------\n")
+    return resultado
 
 
 # ==============================================================================
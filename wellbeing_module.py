@@ -1,41 +1,35 @@
-import sqlite3
+import json
+import os
+
+import database
+import gamificacao
+from sentiment_lexicon import LEXICO_PADRAO
 
 DB_PATH = 'ai_sales_copilot.db'
 
+# 'lexico' (padrao) ou 'treinado' (stress_model, treinado em DATASET_TREINAMENTO)
+MODELOS = ('lexico', 'treinado')
+MODELO = os.environ.get('WELLBEING_MODELO', 'lexico')
+
+
+def _motor(modelo=None, db_path=None):
+    modelo = modelo or MODELO
+    if modelo == 'lexico':
+        return LEXICO_PADRAO
+    if modelo == 'treinado':
+        import stress_model
+
+        # Sem o arquivo do modelo, treina com o DATASET_TREINAMENTO de db_path.
+        return stress_model.carregar_modelo(db_path=db_path or DB_PATH)
+    raise ValueError(f'Modelo de sentimento desconhecido: {modelo!r} (use um de {MODELOS})')
+
+
+def analyze_sentiment(texto, modelo=None, db_path=None):
+    return _motor(modelo, db_path).score(texto)
 
-def analyze_sentiment(texto):
-    text = texto.lower()
-    negative = [
-        'frustr',
-        'frustrado',
-        'frustrada',
-        'estress',
-        'estressado',
-        'estressada',
-        'pressao',
-        'dificil',
-        'impossivel',
-        'perdendo',
-        'sobrecarregado',
-    ]
-    positive = [
-        'otimo',
-        'sucesso',
-        'bom',
-        'bem',
-        'consegui',
-        'produtividade',
-    ]
-    neg_count = sum(1 for w in negative if w in text)
-    pos_count = sum(1 for w in positive if w in text)
-    if neg_count + pos_count == 0:
-        return 0.0
-    score = (pos_count - neg_count) / max(1, (pos_count + neg_count))
-    if score > 1.0:
-        score = 1.0
-    if score < -1.0:
-        score = -1.0
-    return float(score)
+
+def analyze_sentiment_many(textos, modelo=None, db_path=None):
+    return _motor(modelo, db_path).score_many(textos)
 
 
 def suggest_alternative(score, cargo):
@@ -66,35 +60,78 @@ def suggest_alternative(score, cargo):
     return 'Considere conversar com o time e fazer uma pausa curta.'
 
 
-def registrar_log_estresse_e_pontuar(id_funcionario, problema, pontualidade_ok=True):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('SELECT cargo, pontos_gamificacao FROM FUNCIONARIOS WHERE id_funcionario = ?', (id_funcionario,))
-    row = c.fetchone()
-    if not row:
-        conn.close()
-        return None
-    cargo, pontos_atuais = row
-    score = analyze_sentiment(problema)
-    sugestao = suggest_alternative(score, cargo)
-    pontos = 0
-    if pontualidade_ok:
-        pontos += 5
-    c.execute("SELECT COUNT(*) FROM ATIVIDADES WHERE id_funcionario = ? AND status = 'VENCIDA'", (id_funcionario,))
-    vencidas = c.fetchone()[0]
-    if vencidas == 0:
-        pontos += 10
-    insert_sql = (
-        'INSERT INTO LOG_ESTRESSE (id_funcionario, descricao_problema, '
-        'score_sentimento, sugestao_ia, pontos) VALUES (?, ?, ?, ?, ?)'
-    )
-    c.execute(insert_sql, (id_funcionario, problema, score, sugestao, pontos))
-    novo_total = pontos_atuais + pontos
-    update_sql = (
-        'UPDATE FUNCIONARIOS SET pontos_gamificacao = ?, '
-        'nivel_estresse_agregado = ? WHERE id_funcionario = ?'
-    )
-    c.execute(update_sql, (novo_total, score, id_funcionario))
-    conn.commit()
-    conn.close()
-    return {'score': score, 'sugestao': sugestao, 'pontos': pontos, 'novo_total': novo_total}
+def registrar_log_estresse_e_pontuar(id_funcionario, problema, pontualidade_ok=True, modelo=None, db_path=None):
+    return registrar_logs_em_lote([(id_funcionario, problema, pontualidade_ok)], modelo=modelo, db_path=db_path)[0]
+
+
+def registrar_logs_em_lote(registros, modelo=None, db_path=None):
+    """Registra varios logs de estresse em uma unica transacao.
+
+    `registros` e uma sequencia de tuplas (id_funcionario, problema,
+    pontualidade_ok). Cargos e atividades vencidas vem de uma unica consulta
+    a FUNCIONARIOS, os logs entram com um `executemany` e os pontos sao
+    lancados no ledger pelas regras de `gamificacao` (incrementos atomicos).
+    Retorna uma lista alinhada com a entrada: o mesmo dict de
+    `registrar_log_estresse_e_pontuar` por item, ou None quando o
+    funcionario nao existe. `modelo` escolhe o motor de sentimento
+    ('lexico' ou 'treinado'); o padrao vem de WELLBEING_MODELO. `db_path`
+    tem DB_PATH como padrao.
+    """
+    registros = [(int(r[0]), r[1], bool(r[2]) if len(r) > 2 else True) for r in registros]
+    if not registros:
+        return []
+    db_path = db_path or DB_PATH
+    ids = json.dumps(sorted({r[0] for r in registros}))
+    # Fora da transacao: carregar/treinar o modelo e pontuar nao seguram o
+    # BEGIN IMMEDIATE (que bloqueia os outros escritores).
+    scores = analyze_sentiment_many([r[1] for r in registros], modelo, db_path)
+    with database.transaction(db_path) as conn:
+        # atividades_vencidas e mantido pelos triggers de ATIVIDADES (ver atividades.py).
+        funcionarios = {
+            uid: (cargo, vencidas)
+            for uid, cargo, vencidas in conn.execute(
+                'SELECT id_funcionario, cargo, atividades_vencidas FROM FUNCIONARIOS '
+                'WHERE id_funcionario IN (SELECT value FROM json_each(?))',
+                (ids,),
+            )
+        }
+        resultados = []
+        logs = []
+        for (id_funcionario, problema, pontualidade_ok), score in zip(registros, scores):
+            if id_funcionario not in funcionarios:
+                resultados.append(None)
+                continue
+            cargo, vencidas = funcionarios[id_funcionario]
+            sugestao = suggest_alternative(score, cargo)
+            logs.append((id_funcionario, problema, score, sugestao, int(pontualidade_ok), vencidas))
+            resultados.append({'score': score, 'sugestao': sugestao})
+        # Sob BEGIN IMMEDIATE ninguem mais insere: os logs deste lote recebem
+        # os ids seguintes a `ultimo`, na ordem de `logs`.
+        ultimo = gamificacao.ultimo_id_log(conn)
+        conn.executemany(
+            'INSERT INTO LOG_ESTRESSE (id_funcionario, descricao_problema, score_sentimento, '
+            'sugestao_ia, pontualidade_ok, vencidas_no_registro) VALUES (?, ?, ?, ?, ?, ?)',
+            logs,
+        )
+        # nivel_estresse_agregado (EWMA) e os agregados de estresse sao
+        # atualizados pelo trigger de LOG_ESTRESSE (ver estresse_agregado.py);
+        # os pontos vem das regras, via ledger (ver gamificacao.py).
+        pontos = gamificacao.pontuar_logs_em(conn, ultimo)
+        totais = dict(
+            conn.execute(
+                'SELECT id_funcionario, pontos_gamificacao FROM FUNCIONARIOS '
+                'WHERE id_funcionario IN (SELECT value FROM json_each(?))',
+                (ids,),
+            )
+        )
+    # Total corrente de cada item: parte do saldo final e desconta os pontos
+    # dos itens seguintes do mesmo funcionario.
+    id_log = ultimo + len(logs)
+    for resultado, (id_funcionario, *_) in zip(
+        reversed([r for r in resultados if r is not None]), reversed(logs)
+    ):
+        resultado['pontos'] = pontos.get(id_log, 0)
+        resultado['novo_total'] = totais[id_funcionario]
+        totais[id_funcionario] -= resultado['pontos']
+        id_log -= 1
+    return resultados